@@ -0,0 +1,61 @@
+"""
+Command throughput of a light whose observer takes longer and longer
+to be notified: synchronous notifications versus an `AsyncDispatcher`.
+
+Usage:
+    python benchmarks/bench_async_dispatch.py [commands]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from dispositivos.luz import Luz  # noqa: E402
+from observers.async_dispatcher import AsyncDispatcher  # noqa: E402
+from observers.observer import Observer  # noqa: E402
+
+LATENCIES = (0.0, 0.001, 0.01, 0.1)
+
+
+class SlowObserver(Observer):
+    """
+    A fake gateway that takes `latency` seconds to deliver a message.
+    """
+
+    __slots__ = ('latency',)
+
+    def __init__(self, latency: float) -> None:
+        super().__init__()
+        self.latency = latency
+
+    def notify(self, *args, **kwargs) -> None:
+        time.sleep(self.latency)
+
+
+def throughput(latency: float, commands: int, dispatcher=None) -> float:
+    light = Luz()
+    light.register(SlowObserver(latency))
+    light._dispatcher = dispatcher
+    start = time.perf_counter()
+    for _ in range(commands // 2):
+        light.ligar()
+        light.desligar()
+    return commands / (time.perf_counter() - start)
+
+
+def main() -> None:
+    commands = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f'{"latency (ms)":>12} {"sync (cmd/s)":>14} {"async (cmd/s)":>14}')
+    for latency in LATENCIES:
+        # The synchronous runs are capped to about one second.
+        sync_commands = commands if latency == 0 else int(1 / latency) or 2
+        sync = throughput(latency, max(sync_commands, 2))
+        dispatcher = AsyncDispatcher(max_queue=64)
+        asynchronous = throughput(latency, commands, dispatcher)
+        dispatcher.close()
+        print(f'{latency * 1000:>12.0f} {sync:>14,.0f} {asynchronous:>14,.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""
+Simulation steps of a `ClimateModel` controlling 10k thermostats:
+the time per step, and how few of the steps switch a thermostat,
+since only the crossings of a hysteresis band fire triggers.
+
+Usage:
+    python benchmarks/bench_climate.py [thermostats] [steps]
+"""
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from casa_inteligente import CasaInteligente  # noqa: E402
+from climate import ClimateModel  # noqa: E402
+from dispositivos.dispositivo_factory import DispositivosEnum  # noqa: E402
+
+
+def main() -> None:
+    n_thermostats = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 600
+    house = CasaInteligente(n_thermostats, columnar=True, singleton=False)
+    house.add_devices([(DispositivosEnum.TERMOSTATO, f'termo{i}', None)
+                       for i in range(n_thermostats)])
+    model = ClimateModel(house, outside=10.0)
+    for i in range(n_thermostats):
+        model.attach(f'termo{i}', 18.0 + i % 8, 10.0 + i % 20)
+
+    triggers = 0
+    start = perf_counter()
+    for _ in range(steps):
+        triggers += model.step(10.0)
+    elapsed = perf_counter() - start
+
+    print(f'{n_thermostats} thermostats, {steps} steps of 10 s')
+    print(f'{elapsed / steps * 1e3:.2f} ms/step, '
+          f'{n_thermostats * steps / elapsed:,.0f} thermostats/s')
+    print(f'{triggers} triggers fired, '
+          f'{triggers / (n_thermostats * steps):.2%} of the updates')
+
+
+if __name__ == '__main__':
+    main()
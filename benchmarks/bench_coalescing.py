@@ -0,0 +1,92 @@
+"""
+Outbound message volume of flapping lights, with and without a
+`CoalescingDispatcher`, over one simulated minute of churn.
+
+Usage:
+    python benchmarks/bench_coalescing.py [lights] [toggles_per_second]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from dispositivos.luz import Luz  # noqa: E402
+from observers.celular import Celular  # noqa: E402
+from observers.coalescing_dispatcher import CoalescingDispatcher  # noqa: E402
+from observers.email import EMail  # noqa: E402
+
+
+class Clock:
+    """
+    A simulated clock, advanced by the benchmark.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingCelular(Celular):
+    __slots__ = ('sent',)
+
+    def __init__(self, number: str) -> None:
+        super().__init__(number)
+        self.sent = 0
+
+    def notify(self, *args, **kwargs) -> None:
+        self.sent += 1
+
+
+class CountingEMail(EMail):
+    __slots__ = ('sent',)
+
+    def __init__(self, address: str) -> None:
+        super().__init__(address)
+        self.sent = 0
+
+    def notify(self, *args, **kwargs) -> None:
+        self.sent += 1
+
+
+def run(lights: int, rate: int, coalesce: bool) -> tuple[int, int, int]:
+    clock = Clock()
+    phone = CountingCelular('9090-9090')
+    mail = CountingEMail('observador@email.com')
+    dispatcher = CoalescingDispatcher(
+        windows={Celular: 5.0, EMail: 60.0},
+        clock=clock,
+    )
+    fleet = []
+    for _ in range(lights):
+        light = Luz()
+        light.register(phone)
+        light.register(mail)
+        if coalesce:
+            light._dispatcher = dispatcher
+        fleet.append(light)
+    transitions = 0
+    for tick in range(60 * rate):
+        clock.now = tick / rate
+        for light in fleet:
+            light.ligar()
+            light.desligar()
+            transitions += 2
+    dispatcher.close()
+    return transitions, phone.sent, mail.sent
+
+
+def main() -> None:
+    lights = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    rate = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    print(f'{lights} lights toggled {rate} times per second, for 60 s')
+    print(f'{"mode":>10} {"transitions":>12} {"SMS":>8} {"e-mails":>8}')
+    for coalesce in (False, True):
+        transitions, sms, mails = run(lights, rate, coalesce)
+        mode = 'coalesced' if coalesce else 'direct'
+        print(f'{mode:>10} {transitions:>12} {sms:>8} {mails:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Applying 1M commands to a house: one `control_single_device` call
+per command versus a single `control_many` call.
+
+Usage:
+    python benchmarks/bench_control_many.py [commands] [devices]
+"""
+import contextlib
+import io
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from casa_inteligente import CasaInteligente  # noqa: E402
+from dispositivos.dispositivo_factory import DispositivosEnum  # noqa: E402
+
+TYPES = (
+    (DispositivosEnum.LUZ, ('ligar', 'desligar'), (1, 2)),
+    (DispositivosEnum.TERMOSTATO, ('aquecer', 'desligar'), (1, 3)),
+    (DispositivosEnum.SISTEMA_SEGURANCA, ('armar_com_gente', 'desarmar'),
+     (1, 3)),
+)
+
+
+def build_house(devices: int) -> CasaInteligente:
+    house = CasaInteligente(max_devices=devices)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(devices):
+            house.add_device(TYPES[i % len(TYPES)][0], f'dev-{i}')
+    return house
+
+
+def main() -> None:
+    n_commands = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    devices = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    # Every device toggles back and forth, so all the commands are valid.
+    commands = []
+    options = []
+    for i in range(n_commands):
+        dev = i % devices
+        _, triggers, opts = TYPES[dev % len(TYPES)]
+        step = (i // devices) % 2
+        commands.append((f'dev-{dev}', triggers[step]))
+        options.append((f'dev-{dev}', opts[step]))
+    print(f'{n_commands} commands over {devices} devices')
+
+    house = build_house(devices)
+    start = perf_counter()
+    for name, option in options:
+        house.control_single_device(name, option)
+    single = perf_counter() - start
+    print(f'{"control_single_device":>22} {single:>8.3f} s '
+          f'{n_commands / single:>12,.0f} cmd/s')
+
+    house = build_house(devices)
+    start = perf_counter()
+    results = house.control_many(commands)
+    many = perf_counter() - start
+    assert all(results)
+    print(f'{"control_many":>22} {many:>8.3f} s '
+          f'{n_commands / many:>12,.0f} cmd/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Publishing to an `EventBus` with 100k subscriptions: matching the
+topics through the trie of patterns, versus scanning every
+subscription and matching its pattern segment by segment.
+
+Usage:
+    python benchmarks/bench_event_bus.py [subscriptions] [publishes]
+"""
+import os
+import random
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from observers.event_bus import EventBus  # noqa: E402
+from observers.observer import Observer  # noqa: E402
+
+
+class NullObserver(Observer):
+    """
+    An observer that discards the notifications.
+    """
+
+    __slots__ = ()
+
+    def notify(self, *args, **kwargs) -> None:
+        pass
+
+
+def matches(pattern: tuple, topic: tuple) -> bool:
+    for i, segment in enumerate(pattern):
+        if segment == '#':
+            return True
+        if i >= len(topic) or segment not in ('*', topic[i]):
+            return False
+    return len(pattern) == len(topic)
+
+
+def scan(patterns: list, topics: tuple) -> tuple:
+    found = {}
+    for observer, pattern in patterns:
+        if any(matches(pattern, topic) for topic in topics):
+            found[observer] = None
+    return tuple(found)
+
+
+def main() -> None:
+    n_subs = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    publishes = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(0)
+    devices = [f'dev{i}' for i in range(n_subs // 10)]
+    bus = EventBus()
+    patterns = []
+    for i in range(n_subs):
+        observer = NullObserver()
+        if i % 100 == 0:
+            pattern = ('type', 'LUZ', '*')
+        elif i % 1000 == 1:
+            pattern = ('house', '#')
+        else:
+            pattern = ('device', rng.choice(devices), 'state')
+        bus.subscribe(observer, pattern)
+        patterns.append((observer, pattern))
+    events = [
+        (('device', name, 'state'), ('type', 'LUZ', 'LIGADA'))
+        for name in rng.choices(devices, k=publishes)
+    ]
+
+    start = perf_counter()
+    for topics in events:
+        scan(patterns, topics)
+    scanned = perf_counter() - start
+
+    start = perf_counter()
+    for topics in events:
+        bus.subscribers(*topics)
+        bus._EventBus__cache.clear()
+    trie = perf_counter() - start
+
+    print(f'{n_subs} subscriptions, {publishes} publishes')
+    print(f'linear scan: {scanned:.3f} s '
+          f'({scanned / publishes * 1e6:.0f} us/publish)')
+    print(f'trie:        {trie:.3f} s '
+          f'({trie / publishes * 1e6:.0f} us/publish)')
+
+
+if __name__ == '__main__':
+    main()
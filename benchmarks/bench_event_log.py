@@ -0,0 +1,74 @@
+"""
+Writes millions of transitions of a fleet of security systems to an
+`EventLog`, and then reads them back through the memory map: counting
+and scanning the disarms, and rebuilding the states of the fleet at
+the middle of the log.
+
+Usage:
+    python benchmarks/bench_event_log.py [events] [devices]
+"""
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from dispositivos.dispositivo_factory import DispositivosEnum  # noqa: E402
+from dispositivos.event_log import EventLog, EventLogReader  # noqa: E402
+from dispositivos.sistema_seguranca import SistemaSeguranca  # noqa: E402
+
+
+def main() -> None:
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    n_devices = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    tick = iter(range(1, 1 << 62))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'audit.log')
+        devices = [SistemaSeguranca() for _ in range(n_devices)]
+        start = perf_counter()
+        with EventLog(path, clock=tick.__next__) as log:
+            for i, device in enumerate(devices):
+                device.name = f'alarme{i}'
+                log.pair(device, DispositivosEnum.SISTEMA_SEGURANCA)
+            for i in range(events // 2):
+                device = devices[i % n_devices]
+                if i % 3:
+                    device.armar_com_gente()
+                else:
+                    device.armar_sem_ninguem()
+                device.desarmar()
+        written = perf_counter() - start
+        size = os.path.getsize(path)
+        print(f'{events} events, {n_devices} devices, '
+              f'{size / 2**20:.1f} MiB')
+        print(f'write:     {written:.3f} s '
+              f'({events / written:,.0f} events/s)')
+
+        with EventLogReader(path) as reader:
+            start = perf_counter()
+            disarms = reader.count(
+                DispositivosEnum.SISTEMA_SEGURANCA, 'desarmar',
+            )
+            counted = perf_counter() - start
+            print(f'count:     {counted:.3f} s ({disarms} disarms)')
+
+            middle = len(reader) // 2
+            start = perf_counter()
+            found = sum(1 for _ in reader.scan(
+                DispositivosEnum.SISTEMA_SEGURANCA,
+                'armar_sem_ninguem',
+                since=middle,
+                until=middle + 100_000,
+            ))
+            scanned = perf_counter() - start
+            print(f'scan:      {scanned:.3f} s ({found} events in 100k)')
+
+            start = perf_counter()
+            states = reader.states_at(middle)
+            rebuilt = perf_counter() - start
+            print(f'states_at: {rebuilt:.3f} s ({len(states)} devices)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Throughput of a `HouseManager` with a growing number of worker
+processes: thousands of houses, each toggling all of its lights with
+a `control_many` per round.
+
+Usage:
+    python benchmarks/bench_house_manager.py [houses] [lights] [rounds]
+"""
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from dispositivos.dispositivo_factory import DispositivosEnum  # noqa: E402
+from house_manager import HouseManager  # noqa: E402
+
+
+def run(workers: int, n_houses: int, n_lights: int, rounds: int) -> float:
+    house_ids = [f'casa-{i}' for i in range(n_houses)]
+    lights = [(DispositivosEnum.LUZ, f'luz{i}', None)
+              for i in range(n_lights)]
+    with HouseManager(workers, max_devices=n_lights, columnar=True) as m:
+        m.create_houses(house_ids)
+        m.call_many([(house_id, 'add_devices', lights)
+                     for house_id in house_ids])
+        start = perf_counter()
+        for i in range(rounds):
+            trigger = 'ligar' if i % 2 == 0 else 'desligar'
+            commands = [(f'luz{j}', trigger) for j in range(n_lights)]
+            m.call_many([(house_id, 'control_many', commands)
+                         for house_id in house_ids])
+        elapsed = perf_counter() - start
+        status = m.status()
+    assert status['houses'] == n_houses
+    return n_houses * n_lights * rounds / elapsed
+
+
+def main() -> None:
+    n_houses = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    n_lights = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    cores = os.cpu_count() or 1
+    print(f'{n_houses} houses x {n_lights} lights, {rounds} rounds, '
+          f'{cores} cores')
+    workers = 1
+    while True:
+        rate = run(workers, n_houses, n_lights, rounds)
+        print(f'{workers:3} workers: {rate:12,.0f} commands/s')
+        if workers >= cores:
+            break
+        workers = min(workers * 2, cores)
+
+
+if __name__ == '__main__':
+    main()
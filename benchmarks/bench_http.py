@@ -0,0 +1,113 @@
+"""
+Load test of the `HouseServer`: concurrent keep-alive clients toggle
+lights over HTTP, optionally pipelining several requests per round
+trip, and the throughput and latency percentiles are reported. The
+server runs in a background thread, with its own event loop.
+
+Usage:
+    python benchmarks/bench_http.py [clients] [requests] [pipeline]
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import threading
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from casa_inteligente import CasaInteligente  # noqa: E402
+from dispositivos.dispositivo_factory import DispositivosEnum  # noqa: E402
+from http_server import HouseServer  # noqa: E402
+
+
+def start_server(house: CasaInteligente) -> tuple[HouseServer, callable]:
+    server = HouseServer(house, port=0)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def run() -> None:
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start())
+        started.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    started.wait()
+
+    def stop() -> None:
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+
+    return server, stop
+
+
+async def client(
+    port: int,
+    light: str,
+    n_requests: int,
+    depth: int,
+    latencies: list[float],
+) -> None:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    triggers = ('ligar', 'desligar')
+    sent = 0
+    while sent < n_requests:
+        batch = min(depth, n_requests - sent)
+        writer.write(b''.join(
+            f'POST /devices/{light}/{triggers[(sent + i) % 2]} HTTP/1.1\r\n'
+            f'Host: localhost\r\n\r\n'.encode()
+            for i in range(batch)
+        ))
+        start = perf_counter()
+        for _ in range(batch):
+            head = await reader.readuntil(b'\r\n\r\n')
+            length = int(head.split(b'Content-Length: ')[1].split(b'\r')[0])
+            await reader.readexactly(length)
+            latencies.append(perf_counter() - start)
+        sent += batch
+    writer.close()
+
+
+async def load(port: int, n_clients: int, n_requests: int, depth: int):
+    latencies: list[float] = []
+    start = perf_counter()
+    await asyncio.gather(*[
+        client(port, f'luz{i}', n_requests, depth, latencies)
+        for i in range(n_clients)
+    ])
+    return perf_counter() - start, latencies
+
+
+def percentile(values: list[float], p: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main() -> None:
+    n_clients = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    n_requests = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+    depth = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    house = CasaInteligente(n_clients, columnar=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(n_clients):
+            house.add_device(DispositivosEnum.LUZ, f'luz{i}')
+    server, stop = start_server(house)
+    try:
+        elapsed, latencies = asyncio.run(
+            load(server.port, n_clients, n_requests, depth),
+        )
+    finally:
+        stop()
+    latencies.sort()
+    total = len(latencies)
+    print(f'{n_clients} clients x {n_requests} requests, pipeline {depth}')
+    print(f'{total / elapsed:,.0f} requests/s')
+    print(f'p50: {percentile(latencies, 0.50) * 1e3:.2f} ms')
+    print(f'p99: {percentile(latencies, 0.99) * 1e3:.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
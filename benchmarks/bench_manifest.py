@@ -0,0 +1,63 @@
+"""
+Provisioning a house from a JSON Lines manifest of 1M devices, with
+one observer subscription per 1000 devices, through the streaming,
+chunked `provision` path. Reports the time and the peak memory of the
+process, with and without the house.
+
+Usage:
+    python benchmarks/bench_manifest.py [devices]
+"""
+import json
+import os
+import resource
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from casa_inteligente import CasaInteligente  # noqa: E402
+from manifest import provision  # noqa: E402
+
+TYPES = ['LUZ', 'TERMOSTATO', 'SISTEMA_SEGURANCA']
+
+
+def peak_rss() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main() -> None:
+    n_devices = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'house.jsonl')
+        with open(path, 'w', encoding='utf-8') as file:
+            for i in range(n_devices):
+                file.write(json.dumps(
+                    {'type': TYPES[i % 3], 'device': f'dev{i}'},
+                ) + '\n')
+                if i % 1000 == 999:
+                    file.write(json.dumps({
+                        'observer': 'celular',
+                        'address': f'9{i:08}',
+                        'device': f'dev{i}',
+                    }) + '\n')
+            # A few bad lines, reported in aggregate.
+            for i in range(100):
+                file.write(json.dumps(
+                    {'type': 'GELADEIRA', 'device': f'bad{i}'},
+                ) + '\n')
+        size = os.path.getsize(path)
+        before = peak_rss()
+        house = CasaInteligente(n_devices, columnar=True)
+        start = perf_counter()
+        report = provision(house, path)
+        elapsed = perf_counter() - start
+    print(f'{n_devices} devices, manifest of {size / 2**20:.1f} MiB')
+    print(f'provision: {elapsed:.2f} s '
+          f'({n_devices / elapsed:,.0f} devices/s)')
+    print(f'peak RSS:  {before:.0f} MiB before, {peak_rss():.0f} MiB after')
+    print(report.summary().splitlines()[0])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+1M transitions of a light with 0, 1 and 50 observers: the cached
+tuple of registered observers versus rebuilding the list of observers
+on every access, as `ObservableDevice.observers` used to.
+
+Usage:
+    python benchmarks/bench_notify.py [transitions]
+"""
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from dispositivos.luz import Luz  # noqa: E402
+from observers.observer import Observer  # noqa: E402
+
+
+class NullObserver(Observer):
+    """
+    An observer that discards the notifications.
+    """
+
+    __slots__ = ()
+
+    def notify(self, *args, **kwargs) -> None:
+        pass
+
+
+class RebuildingLuz(Luz):
+    """
+    A light whose `notify` rebuilds the list of observers on each
+    access and checks its length first, like `Luz.notify` used to.
+    """
+
+    __slots__ = ('_all',)
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._all = []
+
+    def register(self, observer: Observer) -> None:
+        super().register(observer)
+        self._all.append({'observer': observer, 'registered': True})
+
+    def notify(self) -> None:
+        def observers() -> list:
+            if len(self._all) > 0:
+                return [obs['observer'] for obs in self._all
+                        if obs['registered'] is True]
+            return []
+        if len(observers()) > 0:
+            for observer in observers():
+                observer.notify(state=self.state)
+
+
+def run(build, n_observers: int, transitions: int) -> float:
+    light = build()
+    for _ in range(n_observers):
+        light.register(NullObserver())
+    ligar, desligar = light.ligar, light.desligar
+    start = perf_counter()
+    for _ in range(transitions // 2):
+        ligar()
+        desligar()
+    return perf_counter() - start
+
+
+def main() -> None:
+    transitions = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f'{transitions} transitions')
+    print(f'{"observers":>10} {"rebuilt (s)":>12} {"cached (s)":>12}')
+    for n_observers in (0, 1, 50):
+        rebuilt = run(RebuildingLuz, n_observers, transitions)
+        cached = run(Luz, n_observers, transitions)
+        print(f'{n_observers:>10} {rebuilt:>12.3f} {cached:>12.3f}')
+
+
+if __name__ == '__main__':
+    main()
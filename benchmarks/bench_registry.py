@@ -0,0 +1,43 @@
+"""
+Lookup cost of the `DispositivoRegistry` as the house grows.
+
+Usage:
+    python benchmarks/bench_registry.py
+"""
+import os
+import sys
+from timeit import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from dispositivos.dispositivo_factory import DispositivosEnum  # noqa: E402
+from dispositivos.dispositivo_registry import DispositivoRegistry  # noqa: E402
+from dispositivos.luz import Luz  # noqa: E402
+
+SIZES = (10, 100, 1_000, 10_000, 100_000)
+LOOKUPS = 100_000
+
+
+def main() -> None:
+    # A single device instance is enough: only the indexes are measured.
+    device = Luz()
+    print(f'{"devices":>10} {"get (ns)":>10} {"remove+add (ns)":>16}')
+    for size in SIZES:
+        registry = DispositivoRegistry()
+        for i in range(size):
+            registry.add(f'dev-{i}', DispositivosEnum.LUZ, device)
+        name = f'dev-{size // 2}'
+        get_ns = timeit(
+            lambda: registry.get(name), number=LOOKUPS,
+        ) / LOOKUPS * 1e9
+
+        def cycle() -> None:
+            registry.remove(name)
+            registry.add(name, DispositivosEnum.LUZ, device)
+
+        cycle_ns = timeit(cycle, number=LOOKUPS) / LOOKUPS * 1e9
+        print(f'{size:>10} {get_ns:>10.1f} {cycle_ns:>16.1f}')
+
+
+if __name__ == '__main__':
+    main()
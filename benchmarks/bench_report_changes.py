@@ -0,0 +1,58 @@
+"""
+Polling a large house for its state: `get_device_states`, which visits
+every device, versus `report_changes`, which only visits the devices
+changed since the previous poll.
+
+Usage:
+    python benchmarks/bench_report_changes.py [devices] [changes] [polls]
+"""
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from casa_inteligente import CasaInteligente  # noqa: E402
+from dispositivos.dispositivo_factory import DispositivosEnum  # noqa: E402
+
+
+def main() -> None:
+    n_devices = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    n_changes = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    polls = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    house = CasaInteligente(n_devices, columnar=True, singleton=False)
+    house.add_devices([(DispositivosEnum.LUZ, f'luz{i}', None)
+                       for i in range(n_devices)])
+    step = max(1, n_devices // n_changes)
+    # Each poll turns a different slice of the lights on, and then,
+    # in the second pass, off again.
+    rounds = [
+        [f'luz{i}' for i in range(poll % step, n_devices, step)]
+        for poll in range(polls)
+    ]
+
+    full = 0.0
+    for names in rounds:
+        house.control_many([(name, 'ligar') for name in names])
+        start = perf_counter()
+        house.get_device_states()
+        full += perf_counter() - start
+
+    cursor, _ = house.report_changes()
+    delta = 0.0
+    seen = 0
+    for names in rounds:
+        house.control_many([(name, 'desligar') for name in names])
+        start = perf_counter()
+        cursor, changes = house.report_changes(cursor)
+        delta += perf_counter() - start
+        seen += len(changes)
+
+    print(f'{n_devices} devices, ~{n_changes} changes per poll')
+    print(f'get_device_states: {full / polls * 1e3:9.3f} ms/poll')
+    print(f'report_changes:    {delta / polls * 1e3:9.3f} ms/poll '
+          f'({seen / polls:.0f} changes)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Transitions per second with 10k rules in a `RuleEngine`. Each light
+has a rule turning its thermostat on when it is turned on, and off
+when it is turned off, so every command causes a second transition
+through the rules. The indexed matching is compared with scanning the
+whole rule list on each transition.
+
+Usage:
+    python benchmarks/bench_rules.py [rules] [transitions]
+"""
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from casa_inteligente import CasaInteligente  # noqa: E402
+from dispositivos.dispositivo_factory import DispositivosEnum  # noqa: E402
+from dispositivos.luz import LuzState  # noqa: E402
+from rules import Rule, RuleEngine  # noqa: E402
+
+
+def main() -> None:
+    n_rules = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    n_transitions = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    n_lights = n_rules // 2
+    house = CasaInteligente(2 * n_lights, columnar=True, singleton=False)
+    house.add_devices(
+        [(DispositivosEnum.LUZ, f'luz{i}', None) for i in range(n_lights)]
+        + [(DispositivosEnum.TERMOSTATO, f'termo{i}', None)
+           for i in range(n_lights)]
+    )
+    engine = RuleEngine()
+    for i in range(n_lights):
+        engine.add_rule(Rule(
+            f'aquece{i}', DispositivosEnum.LUZ, LuzState.LIGADA,
+            ((f'termo{i}', 'aquecer'),), device=f'luz{i}',
+        ))
+        engine.add_rule(Rule(
+            f'desliga{i}', DispositivosEnum.LUZ, LuzState.DESLIGADA,
+            ((f'termo{i}', 'desligar'),), device=f'luz{i}',
+        ))
+    house.set_rule_engine(engine)
+
+    on = [(f'luz{i}', 'ligar') for i in range(n_lights)]
+    off = [(f'luz{i}', 'desligar') for i in range(n_lights)]
+    version = house.version
+    start = perf_counter()
+    rounds = 0
+    while house.version - version < n_transitions:
+        house.control_many(on if rounds % 2 == 0 else off)
+        rounds += 1
+    elapsed = perf_counter() - start
+    transitions = house.version - version
+
+    # A linear scan visits every rule on every transition.
+    rules = engine.rules()
+    sample = 1_000
+    start = perf_counter()
+    for i in range(sample):
+        name = f'luz{i % n_lights}'
+        [rule for rule in rules
+         if rule.state is LuzState.LIGADA and rule.device == name]
+    scan = (perf_counter() - start) / sample
+
+    print(f'{len(engine)} rules, {transitions} transitions '
+          f'({transitions // 2} by rules)')
+    print(f'indexed:     {transitions / elapsed:12,.0f} transitions/s')
+    print(f'linear scan: {1 / scan:12,.0f} transitions/s (matching only)')
+    print(f'cycles: {len(engine.cycles)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+A simulated day of a `Scheduler` with 100k jobs, driven by a fake
+clock: half of them one-shot, a quarter recurring every few minutes,
+and a quarter on cron recurrences. Times scheduling the jobs, and
+running them tick by tick, one `control_many` per tick.
+
+Usage:
+    python benchmarks/bench_scheduler.py [jobs] [devices]
+"""
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from casa_inteligente import CasaInteligente  # noqa: E402
+from dispositivos.dispositivo_factory import DispositivosEnum  # noqa: E402
+from scheduler import Scheduler  # noqa: E402
+
+DAY = 86_400.0
+
+
+class FakeClock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def main() -> None:
+    n_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_devices = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    house = CasaInteligente(n_devices, columnar=True, singleton=False)
+    house.add_devices([(DispositivosEnum.LUZ, f'luz{i}', None)
+                       for i in range(n_devices)])
+    start_of_day = 1_767_225_600.0
+    clock = FakeClock(start_of_day)
+    scheduler = Scheduler(house, clock=clock, resolution=60.0)
+
+    start = perf_counter()
+    for i in range(n_jobs):
+        name = f'luz{i % n_devices}'
+        trigger = 'ligar' if i % 2 == 0 else 'desligar'
+        kind = i % 4
+        if kind < 2:
+            scheduler.at(start_of_day + (i * 7919) % DAY, [(name, trigger)])
+        elif kind == 2:
+            scheduler.every(60.0 * (1 + i % 30), [(name, trigger)])
+        else:
+            scheduler.cron(f'{i % 60} {i % 24} * * *', [(name, trigger)])
+    scheduled = perf_counter() - start
+
+    runs = ticks = 0
+    start = perf_counter()
+    while clock.now < start_of_day + DAY:
+        clock.now += 60.0
+        runs += scheduler.run_pending()
+        ticks += 1
+    elapsed = perf_counter() - start
+
+    print(f'{n_jobs} jobs over {n_devices} lights, {ticks} ticks')
+    print(f'schedule: {scheduled:.3f} s '
+          f'({n_jobs / scheduled:,.0f} jobs/s)')
+    print(f'run:      {elapsed:.3f} s for {runs} runs '
+          f'({runs / elapsed:,.0f} runs/s, '
+          f'{elapsed / ticks * 1e3:.2f} ms/tick)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Commands per second through the CLI: driving the interactive menu
+through a pipe (three prompts and a menu redraw per command), versus
+the scripted mode (`main.py --script -`). Both run `main.py` in a
+subprocess, on a house of 1000 lights and thermostats.
+
+Usage:
+    python benchmarks/bench_script.py [commands]
+"""
+import os
+import subprocess
+import sys
+from time import perf_counter
+
+MAIN = os.path.join(os.path.dirname(__file__), '..', 'src', 'main.py')
+DEVICES = 1000
+
+
+def run(args: list[str], text: str) -> float:
+    start = perf_counter()
+    subprocess.run(
+        [sys.executable, MAIN, '-m', str(DEVICES), *args],
+        input=text,
+        text=True,
+        stdout=subprocess.DEVNULL,
+        check=False,
+    )
+    return perf_counter() - start
+
+
+def main() -> None:
+    commands = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    half = DEVICES // 2
+
+    # The menu can only pair and control one device at a time.
+    menu = []
+    for i in range(half):
+        menu += ['1', '1', f'luz-{i}', '1', '2', f'termo-{i}']
+    menu_commands = min(commands, 5_000)
+    for i in range(menu_commands):
+        menu += ['7', f'luz-{i % half}', str(1 + i // half % 2)]
+    menu.append('0')
+    menu_time = run([], '\n'.join(menu) + '\n')
+
+    script = [f'add LUZ luz-{i}\nadd TERMOSTATO termo-{i}'
+              for i in range(half)]
+    triggers = ['aquecer', 'esfriar', 'desligar']
+    for i in range(commands):
+        if i % 2:
+            script.append(f'set termo-{i % half} {triggers[i % 3]}')
+        else:
+            script.append(f'{"on" if i // half % 2 else "off"} '
+                          f'luz-{i % half}')
+    script_time = run(['--script', '-'], '\n'.join(script) + '\n')
+
+    print(f'{DEVICES} devices')
+    print(f'menu:   {menu_commands} commands in {menu_time:.2f} s '
+          f'({menu_commands / menu_time:,.0f} cmd/s)')
+    print(f'script: {commands} commands in {script_time:.2f} s '
+          f'({commands / script_time:,.0f} cmd/s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Sensor readings per second through a `SensorPipeline`: 1k security
+systems with 10 zones each, half of them armed with people inside and
+half with nobody, fed 1M readings in batches.
+
+Usage:
+    python benchmarks/bench_sensors.py [readings] [batch size]
+"""
+import os
+import random
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from casa_inteligente import CasaInteligente  # noqa: E402
+from dispositivos.dispositivo_factory import DispositivosEnum  # noqa: E402
+from observers.observer import Observer  # noqa: E402
+from sensors import SensorPipeline, batched  # noqa: E402
+
+SYSTEMS = 1_000
+ZONES = 10
+KINDS = ('porta', 'janela', 'movimento')
+
+
+class Counting(Observer):
+    def __init__(self) -> None:
+        super().__init__()
+        self.events = 0
+
+    def notify(self, *args, **kwargs) -> None:
+        self.events += 1
+
+    def notify_batch(self, events: list[dict]) -> None:
+        self.events += len(events)
+
+
+def main() -> None:
+    n_readings = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 4096
+    house = CasaInteligente(SYSTEMS, columnar=True, singleton=False)
+    house.add_devices([(DispositivosEnum.SISTEMA_SEGURANCA, f'alarme{i}',
+                        None) for i in range(SYSTEMS)])
+    house.control_many([
+        (f'alarme{i}', 'armar_com_gente' if i % 2 else 'armar_sem_ninguem')
+        for i in range(0, SYSTEMS, 2)
+    ])
+    observer = Counting()
+    house.subscribe(observer, 'alarm.#')
+    pipeline = SensorPipeline(house)
+    for i in range(SYSTEMS):
+        for zone in range(ZONES):
+            pipeline.assign_zone(f'z{i}-{zone}', f'alarme{i}')
+
+    rng = random.Random(42)
+    zones = [f'z{i}-{zone}' for i in range(SYSTEMS) for zone in range(ZONES)]
+    readings = [
+        (rng.choice(zones), f's{rng.randrange(20)}', rng.choice(KINDS),
+         rng.random() < 0.01)
+        for _ in range(n_readings)
+    ]
+
+    start = perf_counter()
+    alarms = 0
+    for batch_alarms in pipeline.ingest(batched(readings, batch_size)):
+        alarms += len(batch_alarms)
+    elapsed = perf_counter() - start
+
+    print(f'{n_readings} readings in batches of {batch_size}, '
+          f'{SYSTEMS * ZONES} zones')
+    print(f'{n_readings / elapsed:,.0f} readings/s')
+    print(f'{alarms} alarms, {observer.events} delivered, '
+          f'stats: {dict(pipeline.stats)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Memory of 1M paired lights with a few observers each: the slotted
+`Luz` versus a replica of the previous dict-based representation.
+
+Usage:
+    python benchmarks/bench_slots.py [devices] [observers]
+"""
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from dispositivos.luz import Luz, LuzState  # noqa: E402
+from observers.celular import Celular  # noqa: E402
+
+
+class DictLuz:
+    """
+    A light with the per-instance attributes `Luz` had before `__slots__`:
+    a `__dict__`, and a dict of `{'observer': ..., 'registered': bool}`.
+    """
+
+    def __init__(self) -> None:
+        self.observers = {}
+        self.lastid = 0
+        self.listener = None
+        self.state = LuzState.DESLIGADA
+
+    def register(self, observer: object) -> None:
+        self.lastid += 1
+        self.observers[self.lastid] = {
+            'observer': observer,
+            'registered': True,
+        }
+
+
+def measure(build, devices: int, observers: list) -> float:
+    tracemalloc.start()
+    fleet = []
+    for i in range(devices):
+        device = build()
+        device.name = f'luz-{i}'
+        for observer in observers:
+            device.register(observer)
+        fleet.append(device)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / devices
+
+
+def main() -> None:
+    devices = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_obs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    observers = [Celular(f'9090-{i:04}') for i in range(n_obs)]
+    print(f'{devices} devices, {n_obs} observers each')
+    before = measure(DictLuz, devices, observers)
+    after = measure(Luz, devices, observers)
+    print(f'{"dict-based":>12} {before:>8.1f} B/device')
+    print(f'{"slotted":>12} {after:>8.1f} B/device')
+    print(f'{"factor":>12} {before / after:>8.2f}x')
+
+
+if __name__ == '__main__':
+    main()
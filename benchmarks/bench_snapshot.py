@@ -0,0 +1,68 @@
+"""
+Rebuilding a house of 100k devices: pairing every device again with
+`add_device`, versus loading a `Snapshot` of the house. Also times
+capturing and saving the snapshot, which `PeriodicSnapshot` does in
+the background.
+
+Usage:
+    python benchmarks/bench_snapshot.py [devices]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from casa_inteligente import CasaInteligente  # noqa: E402
+from dispositivos.dispositivo_factory import DispositivosEnum  # noqa: E402
+from observers.celular import Celular  # noqa: E402
+from snapshot import Snapshot  # noqa: E402
+
+TYPES = list(DispositivosEnum)
+
+
+def new_house(n_devices: int) -> CasaInteligente:
+    return CasaInteligente(n_devices, columnar=True, singleton=False)
+
+
+def main() -> None:
+    n_devices = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    house = new_house(n_devices)
+    start = perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(n_devices):
+            house.add_device(TYPES[i % len(TYPES)], f'dev{i}')
+    paired = perf_counter() - start
+    house.broadcast(DispositivosEnum.LUZ, 'ligar')
+    for i in range(0, n_devices, 100):
+        house.add_observer(Celular(f'9{i:08}'), f'dev{i}')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'house.snap')
+        start = perf_counter()
+        snapshot = house.snapshot()
+        captured = perf_counter() - start
+        start = perf_counter()
+        snapshot.save(path)
+        saved = perf_counter() - start
+
+        house = new_house(n_devices)
+        start = perf_counter()
+        house.load_snapshot(Snapshot.load(path))
+        loaded = perf_counter() - start
+        size = os.path.getsize(path)
+
+    print(f'{n_devices} devices, snapshot of {size / 2**20:.2f} MiB')
+    print(f'add_device:    {paired:.3f} s')
+    print(f'capture:       {captured:.3f} s')
+    print(f'save:          {saved:.3f} s')
+    print(f'load_snapshot: {loaded:.3f} s')
+    print(f'lights on: {len(house.get_lights_on())}, '
+          f'observers: {house.total_observers}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Startup time of the CLI and of a house: the time to import `main` and
+`casa_inteligente` in a fresh interpreter, with the modules loaded
+after the import. The device modules, `transitions` and `asyncio` are
+only imported when first used.
+
+Usage:
+    python benchmarks/bench_startup.py [runs]
+"""
+import os
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+PROBE = '''
+import sys
+from time import perf_counter
+start = perf_counter()
+import {module}
+elapsed = perf_counter() - start
+lazy = ('transitions', 'asyncio', 'dispositivos.luz',
+        'dispositivos.termostato', 'dispositivos.sistema_seguranca')
+print(elapsed, ' '.join(m for m in lazy if m in sys.modules))
+'''
+
+
+def measure(module: str, runs: int) -> tuple[float, str]:
+    best, loaded = float('inf'), ''
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, '-c', PROBE.format(module=module)],
+            cwd=SRC, capture_output=True, text=True, check=True,
+        ).stdout.split(' ', 1)
+        best, loaded = min(best, float(out[0])), out[1].strip()
+    return best, loaded
+
+
+def main() -> None:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    for module in ('casa_inteligente', 'main'):
+        elapsed, loaded = measure(module, runs)
+        print(f'import {module:16}: {elapsed * 1000:6.1f} ms '
+              f'(best of {runs}), loaded: {loaded or "-"}')
+
+
+if __name__ == '__main__':
+    main()
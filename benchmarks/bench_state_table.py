@@ -0,0 +1,89 @@
+"""
+Construction time and memory of 100k lights: one `transitions.Machine`
+per device (the previous implementation) versus the shared `StateTable`.
+
+Each variant runs in its own process, so the peak RSS is not shared.
+
+Usage:
+    python benchmarks/bench_state_table.py [devices]
+"""
+import os
+import resource
+import subprocess
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from dispositivos.luz import Luz, LuzState  # noqa: E402
+
+
+def machine_light() -> object:
+    """
+    A light built like `Luz` was before the shared state tables.
+    """
+    from transitions import Machine
+
+    class MachineLuz:
+        def notify(self) -> None:
+            pass
+
+    light = MachineLuz()
+    light._machine = Machine(
+        model=light,
+        states=LuzState,
+        initial=LuzState.DESLIGADA,
+        transitions=[
+            {
+                'trigger': 'ligar',
+                'source': LuzState.DESLIGADA,
+                'dest': LuzState.LIGADA,
+                'after': light.notify,
+            },
+            {
+                'trigger': 'desligar',
+                'source': LuzState.LIGADA,
+                'dest': LuzState.DESLIGADA,
+                'after': light.notify,
+            },
+        ],
+    )
+    return light
+
+
+VARIANTS = {
+    'machine': machine_light,
+    'table': Luz,
+}
+
+
+def run(variant: str, devices: int) -> None:
+    build = VARIANTS[variant]
+    build()
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = perf_counter()
+    fleet = [build() for _ in range(devices)]
+    elapsed = perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    fleet[-1].ligar()
+    print(
+        f'{variant:>8} {elapsed:>10.3f} {(peak_rss - base_rss) / 1024:>10.1f}'
+    )
+
+
+def main() -> None:
+    devices = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f'{devices} devices')
+    print(f'{"variant":>8} {"build (s)":>10} {"RSS (MiB)":>10}')
+    for variant in VARIANTS:
+        subprocess.run(
+            [sys.executable, __file__, '--run', variant, str(devices)],
+            check=True,
+        )
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--run':
+        run(sys.argv[2], int(sys.argv[3]))
+    else:
+        main()
@@ -1,15 +1,29 @@
 from __future__ import annotations
-from typing import Callable
+import gc
+from collections import Counter, deque
+from contextlib import contextmanager
+from fnmatch import fnmatchcase
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator
 from functools import reduce
 from observers.observer import Observer
-from dispositivos.dispositivo import ObservableDevice
+from observers.dispatcher import Dispatcher
+from observers.batch_dispatcher import BatchDispatcher
+from observers.event_bus import EventBus, Topic
+from observers.subscription_index import SubscriptionIndex
+from dispositivos.dispositivo import ObservableDevice, State
 from dispositivos.dispositivo_factory import (
     DispositivoFactory,
     DispositivosEnum,
 )
-from dispositivos.luz import Luz, LuzState
-from dispositivos.termostato import Termostato
-from dispositivos.sistema_seguranca import SistemaSeguranca
+from dispositivos.dispositivo_registry import DispositivoRegistry
+from dispositivos.event_log import EventLog, EventLogReader
+from rules import RuleEngine
+from snapshot import Snapshot
+from dispositivos.state_store import DeviceStateStore
+if TYPE_CHECKING:
+    from dispositivos.luz import Luz
+    from dispositivos.termostato import Termostato
+    from dispositivos.sistema_seguranca import SistemaSeguranca
 
 
 class CasaInteligente:
@@ -19,29 +33,42 @@ class CasaInteligente:
     """
 
     __instance = None
+    # The number of errors kept in `delivery_errors`.
+    __MAX_DELIVERY_ERRORS = 100
 
     @property
     def total_observers(self) -> int:
         """
-        The number of observers registered for any of the
-        house devices.
+        The number of distinct observers subscribed to any topic
+        of the house.
         """
-        return reduce(
-            lambda t, _: t + 1,
-            self.__observers,
-            0
-        )
+        return len(self.__bus)
 
     @property
     def total_devices(self) -> int:
         """
         The number of devices registered in the house.
         """
-        return reduce(
-            lambda t, _: t + 1,
-            self.__devices,
-            0
-        )
+        return len(self.__devices)
+
+    @property
+    def version(self) -> int:
+        """
+        A counter increased by every device paired, removed or changing
+        its state. Used as the cursor of `report_changes`, and to tell
+        when caches of the devices are stale.
+        """
+        return self.__version
+
+    @property
+    def delivery_errors(self) -> list[tuple[Observer, Exception]]:
+        """
+        The latest errors raised delivering the batches of the bulk
+        operations, by the observers when the house has no dispatcher,
+        or by the dispatcher itself, oldest first. An error doesn't keep
+        the other observers from getting their batches.
+        """
+        return list(self.__delivery_errors)
 
     @property
     def max_devices(self) -> int:
@@ -51,6 +78,15 @@ class CasaInteligente:
         """
         return self.__max_devices
 
+    @property
+    def state_store(self) -> DeviceStateStore | None:
+        """
+        The columnar store of the states of the devices, or None if the
+        house is not `columnar`. Read it, e.g. with `codes`, but leave
+        its writes to the house.
+        """
+        return self.__store
+
     @property
     def light_control_options(self) -> dict[int, str]:
         """The control options for a `Luz` device.
@@ -92,22 +128,51 @@ class CasaInteligente:
     def __new__(cls, *args, **kwargs) -> CasaInteligente:
         """
         Singleton implementation for the Main CLI class.
+        With `singleton=False`, a new independent house is created,
+        e.g. for each of the houses of a `HouseManager`.
         """
+        if not kwargs.get('singleton', True):
+            return super(CasaInteligente, cls).__new__(cls)
         if cls.__instance is None:
             cls.__instance = super(CasaInteligente, cls).__new__(cls)
         return CasaInteligente.__instance
 
-    def __init__(self, max_devices: int = 5) -> None:
+    def __init__(
+        self,
+        max_devices: int = 5,
+        columnar: bool = False,
+        singleton: bool = True,
+    ) -> None:
         """
         Constructor method for the `CasaInteligente` class.
 
         Args:
             max_devices (int, optional): The maximum amount of devices
             the `CasaInteligente` should support. Defaults to 5.
+            columnar (bool, optional): If True, the states of the paired
+            devices are kept in a `DeviceStateStore`, and the fleet-wide
+            queries run over its arrays. Defaults to False.
+            singleton (bool, optional): If True, the house is the single
+            instance of the class, shared by every `CasaInteligente()`
+            call. If False, it is an independent house. Must be passed
+            as a keyword. Defaults to True.
         """
         self.__max_devices = max_devices
-        self.__devices: list[ObservableDevice] = []
-        self.__observers: list[Observer] = []
+        self.__store = DeviceStateStore() if columnar else None
+        self.__devices = DispositivoRegistry()
+        self.__lights_on: dict[str, Luz] = {}
+        self.__light_on: State | None = None
+        self.__dispatcher: Dispatcher | None = None
+        self.__event_log: EventLog | None = None
+        self.__subscriptions = SubscriptionIndex()
+        self.__bus = EventBus()
+        self.__batch: BatchDispatcher | None = None
+        self.__delivery_errors: deque[tuple[Observer, Exception]] = deque(
+            maxlen=self.__MAX_DELIVERY_ERRORS,
+        )
+        self.__rules: RuleEngine | None = None
+        self.__version = 0
+        self.__changes: dict[str, int] = {}
 
     def add_device(
             self,
@@ -117,8 +182,7 @@ class CasaInteligente:
         """Adds a device to the list of devices synced to the
         `CasaInteligente`. The type of device chosen is
         delegated to the `DispositivoFactory` to create a device.
-        This method used the `setattr` method
-        to add a `name` attribute to the newly added device.
+        The `name` of the device is unique within the house.
 
         Args:
             device_type (DispositivosEnum): The type of the device to be added.
@@ -127,30 +191,666 @@ class CasaInteligente:
         if self.total_devices >= self.max_devices:
             print('Please, remove a device before you add another.')
             return
+        if name in self.__devices:
+            print(f'There is already a device named {name}.')
+            return
         new_device = DispositivoFactory.parear_dispositivo(device_type)
-        if not hasattr(new_device, 'name'):
-            setattr(new_device, 'name', name)
-        else:
-            new_device.name = name
-        self.__devices.append(new_device)
+        self.__pair_many([(name, device_type, new_device)])
+        self.__publish(new_device, ('house', 'paired'))
         print('Dispositivo pareado com sucesso.')
 
+    def __pair_many(
+        self,
+        entries: list[tuple[str, DispositivosEnum, ObservableDevice]],
+    ) -> None:
+        """
+        Registers new devices in the house, and hooks them
+        to the indexes, the store and the event log. The observers
+        registered with the devices before are subscribed on the bus.
+
+        Args:
+            entries (list[tuple[str, DispositivosEnum, ObservableDevice]]):
+            The name, type and instance of each device.
+        """
+        listener = self.__on_transition
+        for name, _, device in entries:
+            device.name = name
+            device._listener = listener
+            device._hub = self
+        self.__devices.add_many(entries)
+        for name, _, device in entries:
+            if device._observers:
+                for observer in device._observers:
+                    self.__subscribe_device(observer, name)
+                device._observers = ()
+        if self.__store is not None:
+            self.__store.attach_many(
+                [(device, device_type) for _, device_type, device in entries]
+            )
+        if self.__event_log is not None:
+            for _, device_type, device in entries:
+                self.__event_log.pair(device, device_type)
+        lights = [(name, device) for name, device_type, device in entries
+                  if device_type is DispositivosEnum.LUZ]
+        if lights:
+            light_on = self.__light_on_state()
+            self.__lights_on.update([
+                (name, device) for name, device in lights
+                if device.state is light_on
+            ])
+        for name, _, _ in entries:
+            self.__mark_changed(name)
+
+    def __pair_new(
+        self,
+        devices: list[tuple[str, DispositivosEnum, State | None]],
+    ) -> list[ObservableDevice]:
+        """
+        Creates and pairs many devices, with the batched path of the
+        `DispositivoFactory`. The cyclic garbage collector is paused
+        meanwhile: none of these objects is garbage, and its passes
+        would rescan all of them again and again as they are allocated.
+
+        Args:
+            devices (list[tuple[str, DispositivosEnum, State | None]]):
+            The name, type and state of each device. A state of None
+            stands for the initial state.
+
+        Returns:
+            list[ObservableDevice]: The new devices.
+        """
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            counts = Counter(device_type for _, device_type, _ in devices)
+            created = {
+                device_type: iter(
+                    DispositivoFactory.parear_dispositivos(device_type, count)
+                )
+                for device_type, count in counts.items()
+            }
+            entries = []
+            for name, device_type, state in devices:
+                device = next(created[device_type])
+                if state is not None:
+                    device._state = state
+                entries.append((name, device_type, device))
+            self.__pair_many(entries)
+        finally:
+            if collecting:
+                gc.enable()
+        return [device for _, _, device in entries]
+
+    def add_devices(
+        self,
+        devices: Iterable[tuple[DispositivosEnum, str, State | None]],
+    ) -> list[tuple[str, str]]:
+        """Adds many devices to the house at once, e.g. from a manifest.
+        Unlike `add_device`, nothing is printed: the devices that can't
+        be paired are returned with the reason instead.
+
+        Args:
+            devices (Iterable[tuple[DispositivosEnum, str, State | None]]):
+            The type, name and initial state of each device. A state of
+            None stands for the initial state of the type.
+
+        Returns:
+            list[tuple[str, str]]: The name of each device that was
+            not paired, with the reason.
+        """
+        rejected = []
+        accepted = []
+        names = set()
+        room = self.max_devices - self.total_devices
+        for device_type, name, state in devices:
+            if name in self.__devices or name in names:
+                rejected.append((name, 'The name is already taken.'))
+            elif len(accepted) >= room:
+                rejected.append((name, 'The device limit was reached.'))
+            else:
+                names.add(name)
+                accepted.append((name, device_type, state))
+        for device in self.__pair_new(accepted):
+            self.__publish(device, ('house', 'paired'))
+        return rejected
+
+    def snapshot(self) -> Snapshot:
+        """Captures the devices of the house, their states, and the
+        subscriptions of the observers. It doesn't lock the house,
+        so it can be taken by a background thread while commands run:
+        a device paired or removed meanwhile may be missed. The
+        observers that can't be saved are left out, see
+        `Snapshot.savable`.
+
+        Returns:
+            Snapshot: The snapshot, e.g. to `save` it.
+        """
+        names = []
+        codes = bytearray()
+        code_of: dict[tuple[DispositivosEnum, State], int] = {}
+        for name in self.__devices.names():
+            device = self.__devices.get(name)
+            device_type = self.__devices.type_of(name)
+            if device is None or device_type is None:
+                continue
+            key = (device_type, device.state)
+            code = code_of.get(key)
+            if code is None:
+                code = code_of[key] = Snapshot.code(*key)
+            names.append(name)
+            codes.append(code)
+        device_index = {name: index for index, name in enumerate(names)}
+        observer_index: dict[Observer, int] = {}
+        skipped: set[Observer] = set()
+        subscriptions = []
+        for observer, name in self.__subscriptions.pairs():
+            if not Snapshot.savable(observer):
+                skipped.add(observer)
+            elif name in device_index:
+                subscriptions.append((
+                    observer_index.setdefault(observer, len(observer_index)),
+                    device_index[name],
+                ))
+        device_subscriptions = self.__subscriptions.subscription_ids()
+        patterns = []
+        for subscription_id, observer, pattern in self.__bus.subscriptions():
+            if subscription_id in device_subscriptions:
+                continue
+            if not Snapshot.savable(observer):
+                skipped.add(observer)
+            else:
+                patterns.append((
+                    observer_index.setdefault(observer, len(observer_index)),
+                    pattern,
+                ))
+        return Snapshot(
+            names,
+            bytes(codes),
+            list(observer_index),
+            subscriptions,
+            patterns,
+            len(skipped),
+        )
+
+    def load_snapshot(self, snapshot: Snapshot) -> None:
+        """Replaces the devices and the subscriptions of the house with
+        the ones of a snapshot. The devices are rebuilt in bulk, without
+        notifying the observers. The subscriptions of the observers that
+        can't be saved, see `Snapshot.savable`, are kept, as well as
+        their subscriptions to the devices named in the snapshot.
+
+        Args:
+            snapshot (Snapshot): The snapshot.
+
+        Raises:
+            ValueError: If the snapshot has more than `max_devices`
+            devices.
+        """
+        devices = snapshot.devices()
+        if len(devices) > self.max_devices:
+            raise ValueError(
+                f'The snapshot has {len(devices)} devices, '
+                f'more than the limit of {self.max_devices}.'
+            )
+        savable = Snapshot.savable
+        kept = [(observer, name)
+                for observer, name in self.__subscriptions.pairs()
+                if not savable(observer)]
+        for name in self.__devices.names():
+            self.__unpair(name)
+        for subscription_id, observer, _ in self.__bus.subscriptions():
+            if savable(observer):
+                self.__bus.unsubscribe(subscription_id)
+        self.__pair_new(devices)
+        observers, names = snapshot.observers, snapshot.names
+        for observer, device in snapshot.subscriptions:
+            self.__subscribe_device(observers[observer], names[device])
+        for observer, pattern in snapshot.patterns:
+            self.__bus.subscribe(observers[observer], pattern)
+        for observer, name in kept:
+            if name in self.__devices:
+                self.__subscribe_device(observer, name)
+
+    def set_dispatcher(self, dispatcher: Dispatcher | None) -> None:
+        """Sets how the house and its paired devices deliver their
+        notifications, e.g. through an `AsyncDispatcher`, so slow
+        observers don't stall the state changes. The batches of the bulk
+        operations go through its `dispatch_batch`.
+
+        Args:
+            dispatcher (Dispatcher | None): The dispatcher of the
+            notifications, or None to notify the observers synchronously.
+        """
+        self.__dispatcher = dispatcher
+
+    def set_rule_engine(self, rules: RuleEngine | None) -> None:
+        """Sets the `RuleEngine` whose rules run after the transitions
+        of the paired devices.
+
+        Args:
+            rules (RuleEngine | None): The rules, or None to stop
+            running them.
+        """
+        self.__rules = rules
+
+    def set_event_log(self, event_log: EventLog | None) -> None:
+        """Sets the `EventLog` that records the transitions of the
+        paired devices. The devices already paired are recorded with
+        their current state.
+
+        Args:
+            event_log (EventLog | None): The log, or None to stop
+            recording.
+        """
+        for device in self.__devices:
+            if device._log is not None:
+                device._log.remove(device)
+            if event_log is not None:
+                event_log.pair(device, self.__devices.type_of(device.name))
+        self.__event_log = event_log
+
+    def restore(
+        self,
+        reader: EventLogReader,
+        timestamp: float | None = None,
+    ) -> None:
+        """Rebuilds the devices of the house, and their states, as
+        they were at a point in time according to an `EventLog`.
+        Devices missing from the house are paired in bulk, and devices
+        that were not paired at that time are removed. Nothing is
+        published to the observers, and nothing is printed.
+
+        Args:
+            reader (EventLogReader): The log.
+            timestamp (float | None, optional): The point in time.
+            Defaults to None, for the end of the log.
+
+        Raises:
+            ValueError: If the log had more than `max_devices` devices
+            at that time. The house is left unchanged.
+        """
+        states = reader.states_at(timestamp)
+        if len(states) > self.max_devices:
+            raise ValueError(
+                f'The log has {len(states)} devices at that time, '
+                f'more than the limit of {self.max_devices}.'
+            )
+        for name in self.__devices.names():
+            if (
+                name not in states
+                or states[name][0] is not self.__devices.type_of(name)
+            ):
+                self.__unpair(name)
+        missing = []
+        for name, (device_type, state) in states.items():
+            device = self.__devices.get(name)
+            if device is None:
+                missing.append((name, device_type, state))
+                continue
+            if device.state is state:
+                continue
+            source = device.state
+            device.state = state
+            if device._log is not None:
+                device._log.append(device, source, None)
+            self.__track_light(device, device_type)
+            self.__mark_changed(name)
+        self.__pair_new(missing)
+
+    def __mark_changed(self, name: str) -> None:
+        """
+        Records that a device changed, with a new `version`. The entry
+        of the device is moved to the end of `__changes`, so the dict
+        stays sorted by version.
+
+        Args:
+            name (str): The name of the device.
+        """
+        self.__version += 1
+        self.__changes.pop(name, None)
+        self.__changes[name] = self.__version
+
+    def report_changes(
+        self,
+        since: int = 0,
+    ) -> tuple[int, list[tuple[str, State]]]:
+        """Returns the devices paired or changing their state after a
+        cursor, e.g. to poll a large house cheaply. Only the changed
+        devices are visited, newest first, so the cost doesn't depend
+        on the size of the house.
+
+        A device that changed many times is listed once, with its
+        current state. The removed devices are not listed: their
+        changes are dropped with them, so the changes tracked never
+        outnumber the devices. Subscribe to the `house.removed` topic
+        to learn of the removals.
+
+        Args:
+            since (int, optional): The cursor returned by the previous
+            call. Defaults to 0, for all the changes ever.
+
+        Returns:
+            tuple[int, list[tuple[str, State]]]: The cursor for the
+            next call, and the name and current state of each changed
+            device, oldest change first.
+        """
+        changed = []
+        for name, version in reversed(self.__changes.items()):
+            if version <= since:
+                break
+            changed.append(name)
+        changed.reverse()
+        get_device = self.__devices.get
+        return self.__version, [
+            (name, get_device(name).get_state()) for name in changed
+        ]
+
+    def __light_on_state(self) -> State:
+        """
+        The state of a light turned on, `LIGADA`, read from the class
+        registered for `DispositivosEnum.LUZ` the first time a light is
+        paired, so the module of the lights is only imported if used.
+        """
+        light_on = self.__light_on
+        if light_on is None:
+            cls = DispositivoFactory.classe_dispositivo(DispositivosEnum.LUZ)
+            light_on = self.__light_on = cls._table.states['LIGADA']
+        return light_on
+
+    def __track_light(
+        self,
+        device: ObservableDevice,
+        device_type: DispositivosEnum,
+    ) -> None:
+        """
+        Keeps the set of lights currently turned on updated.
+
+        Args:
+            device (ObservableDevice): A device whose state changed.
+            device_type (DispositivosEnum): The type of the device.
+        """
+        if device_type is DispositivosEnum.LUZ:
+            if device.state is self.__light_on_state():
+                self.__lights_on[device.name] = device
+            else:
+                self.__lights_on.pop(device.name, None)
+
+    def __on_transition(self, device: ObservableDevice) -> None:
+        """
+        Listener called by the paired devices after every state transition.
+        Keeps the set of lights currently turned on and the changes of
+        `report_changes` updated, publishes the new state to
+        `device.<name>.state` and `type.<TYPE>.<STATE>`, and queues the
+        rules it fires, which run at once outside of a bulk operation.
+
+        Args:
+            device (ObservableDevice): The device that changed its state.
+        """
+        device_type = self.__devices.type_of(device.name)
+        self.__track_light(device, device_type)
+        self.__mark_changed(device.name)
+        self.__publish(
+            device,
+            ('device', device.name, 'state'),
+            ('type', device_type.name, device.state.name),
+        )
+        rules = self.__rules
+        if rules is not None:
+            rules.match(device.name, device.state)
+            if self.__batch is None:
+                rules.run(self)
+
+    def __publish(
+        self,
+        device: ObservableDevice,
+        *topics: Topic,
+        payload: dict | None = None,
+    ) -> None:
+        """
+        Notifies the observers subscribed to any of the topics,
+        with the name and state of the device. Inside a bulk operation
+        the notifications are collected in its batch; otherwise they go
+        through the dispatcher of the house, if any.
+
+        Args:
+            device (ObservableDevice): The device the event is about.
+            *topics (Topic): The topics of the event.
+            payload (dict | None, optional): More fields of the event.
+            Defaults to None.
+        """
+        observers = self.__bus.subscribers(*topics)
+        if not observers:
+            return
+        event = {'device': device.name, 'state': device.state}
+        if payload:
+            event.update(payload)
+        if self.__batch is not None:
+            self.__batch.dispatch(device, observers, event)
+        elif self.__dispatcher is not None:
+            self.__dispatcher.dispatch(device, observers, event)
+        else:
+            for observer in observers:
+                observer.notify(**event)
+
+    def publish_many(
+        self,
+        events: Iterable[tuple[str, str | Topic, dict]],
+    ) -> int:
+        """Publishes custom events about paired devices, e.g. the alarms
+        of a security system. Each event carries the `device` name and
+        its `state`, besides its own fields, and the observers get all
+        the events as a single `notify_batch`.
+
+        Args:
+            events (Iterable[tuple[str, str | Topic, dict]]): The device
+            name, the topic and the fields of each event, e.g.
+            `('alarme', 'alarm.alarme.sala', {'sensor': 'porta1'})`.
+
+        Returns:
+            int: The number of events published about paired devices.
+        """
+        get_device = self.__devices.get
+        topic = EventBus.topic
+        published = 0
+        with self.__batched_notifications():
+            for device_name, event_topic, payload in events:
+                device = get_device(device_name)
+                if device is None:
+                    continue
+                self.__publish(device, topic(event_topic), payload=payload)
+                published += 1
+        return published
+
+    def subscribe(self, observer: Observer, pattern: str | Topic) -> int:
+        """
+        Subscribes an observer to the topics of the house matching
+        a pattern, where `*` matches one segment and `#` any number of
+        trailing segments. The house publishes:
+
+        - `device.<name>.state` when a device changes its state;
+        - `type.<TYPE>.<STATE>` for the same change, e.g. `type.LUZ.LIGADA`;
+        - `house.paired` and `house.removed` when devices come and go;
+        - the custom events of `publish_many`, e.g. `alarm.<name>.<zone>`.
+
+        Args:
+            observer (Observer): The observer.
+            pattern (str | Topic): The pattern, e.g. `'type.LUZ.*'`. Use
+            a tuple if a device name contains a dot.
+
+        Raises:
+            ValueError: If `#` is not the last segment of the pattern.
+
+        Returns:
+            int: The id of the subscription, for `unsubscribe`.
+        """
+        return self.__bus.subscribe(observer, pattern)
+
+    def unsubscribe(self, subscription_id: int) -> bool:
+        """
+        Cancels a subscription made with `subscribe`.
+
+        Args:
+            subscription_id (int): The id of the subscription.
+
+        Returns:
+            bool: False if there is no such subscription.
+        """
+        return self.__bus.unsubscribe(subscription_id)
+
+    def __subscribe_device(self, observer: Observer, device_name: str) -> bool:
+        """
+        Subscribes an observer to the state of a device,
+        unless it already is.
+
+        Returns:
+            bool: True if a new subscription was made.
+        """
+        if (observer, device_name) in self.__subscriptions:
+            return False
+        subscription_id = self.__bus.subscribe(
+            observer, ('device', device_name, 'state'),
+        )
+        return self.__subscriptions.attach(
+            observer, device_name, subscription_id,
+        )
+
     def report_status(self) -> None:
         """
         Shows the `name` and `state` of all devices paired with the house.
         """
-        states = [(dev.name, dev.get_state()) for dev in self.__devices]
-        for name, devstate in states:
+        for name, devstate in self.get_device_states():
             print(f'{name}\t\t {devstate.name}')
 
-    def get_device_names(self) -> list[str]:
+    def get_device_states(
+        self,
+        device_type: DispositivosEnum | None = None,
+    ) -> list[tuple[str, State]]:
+        """Returns the name and state of the devices paired with
+        the house, in pairing order.
+
+        Args:
+            device_type (DispositivosEnum | None, optional): Only lists
+            the devices of this type. Defaults to None, for all types.
+
+        Returns:
+            list[tuple[str, State]]: The name and state of each device.
+        """
+        if device_type is None:
+            devices = self.__devices
+        else:
+            devices = self.__devices.of_type(device_type)
+        return [(dev.name, dev.get_state()) for dev in devices]
+
+    def get_device_names(
+        self,
+        device_type: DispositivosEnum | None = None,
+    ) -> list[str]:
         """Returns a list of device names for all the devices
         paired with the house.
 
+        Args:
+            device_type (DispositivosEnum | None, optional): Only lists
+            the devices of this type. Defaults to None, for all types.
+
         Returns:
             list[str]: a list of device names.
         """
-        return [dev.name for dev in self.__devices]
+        if device_type is None:
+            return self.__devices.names()
+        return [dev.name for dev in self.__devices.of_type(device_type)]
+
+    def get_device_type(self, device_name: str) -> DispositivosEnum | None:
+        """Returns the type of a device paired with the house.
+
+        Args:
+            device_name (str): The name of the device.
+
+        Returns:
+            DispositivosEnum | None: The type, or None if there is no
+            device with that name.
+        """
+        return self.__devices.type_of(device_name)
+
+    def get_device(self, device_name: str) -> ObservableDevice | None:
+        """Returns a device paired with the house.
+
+        Args:
+            device_name (str): The name of the device.
+
+        Returns:
+            ObservableDevice | None: The device, or None if there is no
+            device with that name.
+        """
+        return self.__devices.get(device_name)
+
+    def get_device_state(self, device_name: str) -> State | None:
+        """Returns the state of a device paired with the house.
+
+        Args:
+            device_name (str): The name of the device.
+
+        Returns:
+            State | None: The state, or None if there is no device
+            with that name.
+        """
+        device = self.__devices.get(device_name)
+        return None if device is None else device.get_state()
+
+    def has_device(self, device_name: str) -> bool:
+        """Checks whether a device is paired with the house.
+
+        Args:
+            device_name (str): The name of the device.
+
+        Returns:
+            bool: True if there is a device with that name.
+        """
+        return device_name in self.__devices
+
+    def get_devices_by_state(
+        self,
+        device_type: DispositivosEnum,
+        state: State,
+    ) -> list[ObservableDevice]:
+        """Retrieves the devices of a given type that are in a given state,
+        e.g. all the armed security systems.
+
+        Args:
+            device_type (DispositivosEnum): The type of the devices.
+            state (State): The state to look for.
+
+        Returns:
+            list[ObservableDevice]: The devices found.
+        """
+        if self.__store is not None:
+            return self.__store.devices(device_type, state)
+        return list(filter(
+            lambda dev: dev.state == state,
+            self.__devices.of_type(device_type),
+        ))
+
+    def count_devices(
+        self,
+        device_type: DispositivosEnum,
+        state: State,
+    ) -> int:
+        """Counts the devices of a given type that are in a given state,
+        e.g. how many thermostats are heating.
+
+        Args:
+            device_type (DispositivosEnum): The type of the devices.
+            state (State): The state to look for.
+
+        Returns:
+            int: The number of devices found.
+        """
+        if self.__store is not None:
+            return self.__store.count(device_type, state)
+        return reduce(
+            lambda t, dev: t + (dev.state == state),
+            self.__devices.of_type(device_type),
+            0
+        )
 
     def __control_light(self, light: Luz, option: int) -> None:
         """Parses the chosen menu option to the given `Luz` object.
@@ -197,28 +897,18 @@ class CasaInteligente:
     def __get_device_by_name(
         self,
         device_name: str,
-        idx: bool = False,
-    ) -> ObservableDevice | int | None:
+    ) -> ObservableDevice | None:
         """
-        Retrieves a device from the list of devices based on its name.
+        Retrieves a device from the registry based on its name.
 
         Args:
             device_name (str): The name of the device to retrieve.
-            idx (bool, optional): If True,
-            returns the index of the device instead of the device object.
-            Defaults to False.
 
         Returns:
-            ObservableDevice | int | None: The device object if found,
-            the index of the device if `idx` is True,
+            ObservableDevice | None: The device object if found,
             or None if the device is not found.
         """
-        for i, dev in enumerate(self.__devices):
-            if dev.name == device_name:
-                if idx is True:
-                    return i
-                return dev
-        return None
+        return self.__devices.get(device_name)
 
     def add_observer(
         self,
@@ -233,9 +923,86 @@ class CasaInteligente:
         - device_name (str): The name of the device
         to which the observer will be added.
         """
-        device: ObservableDevice = self.__get_device_by_name(device_name)
-        device.register(observer)
-        self.__observers.append(observer)
+        if device_name in self.__devices:
+            self.__subscribe_device(observer, device_name)
+
+    def remove_observer(
+        self,
+        observer: Observer,
+        device_name: str,
+    ) -> bool:
+        """
+        Removes an observer from a specific device.
+
+        Args:
+            observer (Observer): The observer to be removed.
+            device_name (str): The name of the device.
+
+        Returns:
+            bool: True if the observer was watching the device,
+            False otherwise.
+        """
+        subscription_id = self.__subscriptions.detach(observer, device_name)
+        if subscription_id is None:
+            return False
+        return self.__bus.unsubscribe(subscription_id)
+
+    def subscribe_many(
+        self,
+        observer: Observer,
+        device_type: DispositivosEnum | None = None,
+        pattern: str | None = None,
+    ) -> int:
+        """
+        Adds an observer to all the devices of a type, and/or whose
+        names match a shell-style pattern, such as `'Luz *'`.
+
+        Args:
+            observer (Observer): The observer to be added.
+            device_type (DispositivosEnum | None, optional): The type of
+            the devices. Defaults to None, for any type.
+            pattern (str | None, optional): A pattern for the device names,
+            as in `fnmatch`. Defaults to None, for any name.
+
+        Returns:
+            int: The number of new subscriptions.
+        """
+        if device_type is None:
+            devices = list(self.__devices)
+        else:
+            devices = self.__devices.of_type(device_type)
+        if pattern is not None:
+            devices = [dev for dev in devices
+                       if fnmatchcase(dev.name, pattern)]
+        attached = 0
+        for device in devices:
+            attached += self.__subscribe_device(observer, device.name)
+        return attached
+
+    def get_observed_devices(self, observer: Observer) -> list[str]:
+        """
+        Returns the names of the devices an observer watches.
+
+        Args:
+            observer (Observer): The observer.
+
+        Returns:
+            list[str]: The device names, in subscription order.
+        """
+        return self.__subscriptions.devices_of(observer)
+
+    def get_device_observers(self, device_name: str) -> tuple[Observer, ...]:
+        """
+        Returns the observers watching a device. The same tuple is
+        returned until an observer subscribes to or leaves the device.
+
+        Args:
+            device_name (str): The name of the device.
+
+        Returns:
+            tuple[Observer, ...]: The observers, in subscription order.
+        """
+        return self.__subscriptions.observers_of(device_name)
 
     def remove_device_by_name(
         self,
@@ -250,12 +1017,43 @@ class CasaInteligente:
         Returns:
             bool: True if the device was successfully removed, False otherwise.
         """
-        dev_idx = self.__get_device_by_name(device_name, idx=True)
-        if dev_idx is None:
+        device = self.__unpair(device_name)
+        if device is None:
             return False
-        self.__devices.pop(dev_idx)
+        self.__publish(device, ('house', 'removed'))
         return True
 
+    def __unpair(self, device_name: str) -> ObservableDevice | None:
+        """
+        Removes a device from the house and its indexes, and cancels
+        the subscriptions to it, without publishing the removal.
+
+        Args:
+            device_name (str): The name of the device.
+
+        Returns:
+            ObservableDevice | None: The device removed, or None if
+            there was no device with that name.
+        """
+        device = self.__devices.remove(device_name)
+        if device is None:
+            return None
+        device._listener = None
+        device._hub = None
+        device._dispatcher = None
+        if device._log is not None:
+            device._log.remove(device)
+        for subscription_id in self.__subscriptions.detach_device(device_name):
+            self.__bus.unsubscribe(subscription_id)
+        if self.__store is not None:
+            self.__store.detach(device)
+        self.__lights_on.pop(device_name, None)
+        # The removal has a version too, so the caches keyed on it see
+        # the device go, but there is no change left to report.
+        self.__version += 1
+        self.__changes.pop(device_name, None)
+        return device
+
     def control_single_device(
         self,
         device_name: str,
@@ -275,51 +1073,163 @@ class CasaInteligente:
         device = self.__get_device_by_name(device_name)
         if device is None:
             return
-        if isinstance(device, Luz):
+        device_type = self.__devices.type_of(device_name)
+        if device_type is DispositivosEnum.LUZ:
             if _display_func is not None:
                 option = _display_func(self.light_control_options)
             self.__control_light(device, option)
-        if isinstance(device, Termostato):
+        if device_type is DispositivosEnum.TERMOSTATO:
             if _display_func is not None:
                 option = _display_func(self.termostate_control_options)
             self.__control_termostate(device, option)
-        if isinstance(device, SistemaSeguranca):
+        if device_type is DispositivosEnum.SISTEMA_SEGURANCA:
             if _display_func is not None:
                 option = _display_func(self.sis_sec_control_options)
             self.__control_sissec(device, option)
 
-    def __get_lights(self) -> list[Luz]:
+    def control_many(
+        self,
+        commands: Iterable[tuple[str, str]],
+    ) -> list[bool]:
+        """
+        Applies many commands to the devices of the smart house,
+        in a single pass.
+
+        Each command is a `(device_name, trigger)` pair, such as
+        `('Luz da Sala', 'ligar')`. The edges of each trigger are looked
+        up in the `StateTable` of the device type once, and reused for
+        every command of that type. Commands that name an unknown device
+        or trigger, or that can't be fired from the current state of the
+        device, are skipped instead of raising. The observers get the
+        notifications of all the commands as a single `notify_batch`.
+
+        Args:
+            commands (Iterable[tuple[str, str]]): The commands to apply.
+
+        Returns:
+            list[bool]: For each command, whether it was applied.
+        """
+        get_device = self.__devices.get
+        edges_cache: dict[tuple[type, str], dict] = {}
+        results = []
+        with self.__batched_notifications():
+            for device_name, trigger in commands:
+                device = get_device(device_name)
+                if device is None:
+                    results.append(False)
+                    continue
+                key = (type(device), trigger)
+                edges = edges_cache.get(key)
+                if edges is None:
+                    try:
+                        edges = device._table.edges(trigger)
+                    except AttributeError:
+                        edges = {}
+                    edges_cache[key] = edges
+                dest = edges.get(device.state)
+                if dest is None:
+                    results.append(False)
+                    continue
+                device._move_to(dest, trigger)
+                results.append(True)
+        return results
+
+    @contextmanager
+    def __batched_notifications(self) -> Iterator[None]:
+        """
+        Collects the notifications published while the context is
+        active, and then delivers them as a single `notify_batch` per
+        observer, through the dispatcher of the house, if any. Without
+        one, the errors of the observers are kept in `delivery_errors`.
+        Nested bulk operations share the outermost batch. Then, the
+        rules fired meanwhile are run.
+        """
+        if self.__batch is not None:
+            yield
+            return
+        batch = self.__batch = BatchDispatcher()
+        try:
+            yield
+        finally:
+            self.__batch = None
+            self.__delivery_errors.extend(batch.flush(self.__dispatcher))
+            if self.__rules is not None:
+                self.__rules.run(self)
+
+    def broadcast(
+        self,
+        device_type: DispositivosEnum,
+        trigger: str,
+        predicate: Callable[[ObservableDevice], bool] | None = None,
+    ) -> dict[str, bool]:
         """
-        Retrieves a list of all the lights in the smart house.
+        Fires a trigger on all the devices of a type, e.g.
+        `broadcast(DispositivosEnum.TERMOSTATO, 'desligar')`.
+
+        Devices that can't take the trigger from their current state
+        are skipped. Without a `predicate`, a columnar house applies the
+        transition with a single pass over its `DeviceStateStore`.
+        The observers get the notifications of all the devices as a
+        single `notify_batch`.
+
+        Args:
+            device_type (DispositivosEnum): The type of the devices.
+            trigger (str): The name of the trigger.
+            predicate (Callable[[ObservableDevice], bool] | None, optional):
+            If given, only the devices for which it returns True are
+            considered. Defaults to None.
+
+        Raises:
+            AttributeError: If the device type has no such trigger.
 
         Returns:
-            list[Luz]: A list of `Luz` objects representing the lights.
+            dict[str, bool]: For each device of the type, in pairing order,
+            whether the trigger was applied.
         """
-        return list(filter(lambda dev: isinstance(dev, Luz), self.__devices))
+        devices = self.__devices.of_type(device_type)
+        if not devices:
+            return {}
+        edges = devices[0]._table.edges(trigger)
+        with self.__batched_notifications():
+            if predicate is None and self.__store is not None:
+                changed = self.__store.bulk_trigger(device_type, trigger)
+                results = dict.fromkeys([dev.name for dev in devices], False)
+                results.update(dict.fromkeys(
+                    [dev.name for dev in changed], True,
+                ))
+                return results
+            results = {}
+            for device in devices:
+                dest = None
+                if predicate is None or predicate(device):
+                    dest = edges.get(device.state)
+                if dest is not None:
+                    device._move_to(dest, trigger)
+                results[device.name] = dest is not None
+            return results
 
     def turn_lights_on(self) -> None:
         """
         Turns on all the lights in the smart house.
 
         This method retrieves the lights in the smart house
-        and calls the `ligar()` method on each light object
+        and fires the `ligar` trigger on each light that is off
         to turn them on.
         """
-        lights = self.__get_lights()
-        # Mesmo que o resultado do map não seja diretamente consumido,
-        # o list() é necessário para que o map execute realmente a lambda func
-        list(map(lambda x: x.ligar(), lights))
+        self.broadcast(DispositivosEnum.LUZ, 'ligar')
 
     def turn_lights_off(self) -> None:
         """
         Turns off all the lights in the smart house.
         """
-        lights = self.__get_lights()
-        list(map(lambda d: d.desligar(), lights))
+        self.broadcast(DispositivosEnum.LUZ, 'desligar')
 
     def get_lights_on(self, print_result: bool = False) -> list[Luz]:
         """
         Retrieves a list of lights that are currently turned on.
+        The lights are read from the set of lights turned on, kept
+        updated by the device transitions, so the cost is proportional
+        to the number of lights on rather than to the number of devices.
 
         Args:
             print_result (bool, optional): If True,
@@ -329,11 +1239,7 @@ class CasaInteligente:
             list[Luz]: A list of Luz objects representing the lights
             that are turned on.
         """
-        lights = self.__get_lights()
-        lights_on = list(filter(
-            lambda lgt: lgt.state == LuzState.LIGADA,
-            lights,
-        ))
+        lights_on = list(self.__lights_on.values())
         if print_result:
             for light in lights_on:
                 print(f'{light.name}\t\t {light.state.name}')
@@ -0,0 +1,294 @@
+from __future__ import annotations
+from array import array
+from typing import TYPE_CHECKING
+from dispositivos.dispositivo import ObservableDevice
+from dispositivos.dispositivo_factory import DispositivosEnum
+from dispositivos.termostato import TermostatoState
+if TYPE_CHECKING:
+    from casa_inteligente import CasaInteligente
+
+
+class ClimateModel:
+    """
+    A simulated room temperature and a setpoint for the thermostats of
+    a `CasaInteligente`, which the model controls by itself.
+
+    Each `step` advances the temperature of every room: a heating
+    thermostat warms it, a cooling one chills it, and it always drifts
+    towards the `outside` temperature. Then the thermostats are switched
+    with a hysteresis band around their setpoints:
+
+    - an idle thermostat starts heating below `setpoint - band`, and
+      cooling above `setpoint + band`;
+    - a heating or cooling thermostat turns off once the room reaches
+      its setpoint.
+
+    So a thermostat is only switched when a band is crossed, and all the
+    switches of a step are fired with a single
+    `CasaInteligente.control_many` call. The temperatures and setpoints
+    are kept in flat `array`s, as in the `DeviceStateStore`, and a step
+    is a single pass over them. In a `columnar` house, the states of the
+    thermostats are read straight from the codes of the store, by slot.
+
+    Attributes:
+        __house (CasaInteligente): The house.
+        __names (list[str]): The names of the controlled thermostats.
+        __devices (list[ObservableDevice]): The controlled thermostats.
+        __slots (array): The slot of each thermostat in the store of a
+        `columnar` house.
+        __released (int): The `released` count of the store when the
+        slots were last checked.
+        __index (dict[str, int]): The position of each thermostat in the
+        arrays, by name.
+        __temperatures (array): The room temperature of each thermostat,
+        in °C.
+        __setpoints (array): The setpoint of each thermostat, in °C.
+        outside (float): The outside temperature, in °C.
+        heat_rate (float): How fast a heating thermostat warms its room,
+        in °C per second.
+        cool_rate (float): How fast a cooling thermostat chills its room,
+        in °C per second.
+        leak (float): The fraction of the difference to the outside
+        temperature a room loses per second.
+        band (float): The half-width of the hysteresis band, in °C.
+    """
+
+    def __init__(
+        self,
+        house: CasaInteligente,
+        outside: float = 15.0,
+        heat_rate: float = 0.01,
+        cool_rate: float = 0.01,
+        leak: float = 0.0005,
+        band: float = 0.5,
+    ) -> None:
+        """
+        Constructor method for the `ClimateModel` class.
+
+        Args:
+            house (CasaInteligente): The house.
+            outside (float, optional): The outside temperature, in °C.
+            Defaults to 15.
+            heat_rate (float, optional): How fast a heating thermostat
+            warms its room, in °C per second. Defaults to 0.01.
+            cool_rate (float, optional): How fast a cooling thermostat
+            chills its room, in °C per second. Defaults to 0.01.
+            leak (float, optional): The fraction of the difference to the
+            outside temperature a room loses per second.
+            Defaults to 0.0005.
+            band (float, optional): The half-width of the hysteresis
+            band, in °C. Defaults to 0.5.
+        """
+        self.__house = house
+        self.__names: list[str] = []
+        self.__devices: list[ObservableDevice] = []
+        self.__slots = array('q')
+        self.__released = 0
+        self.__index: dict[str, int] = {}
+        self.__temperatures = array('d')
+        self.__setpoints = array('d')
+        self.outside = outside
+        self.heat_rate = heat_rate
+        self.cool_rate = cool_rate
+        self.leak = leak
+        self.band = band
+
+    def __len__(self) -> int:
+        return len(self.__names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__index
+
+    def attach(
+        self,
+        name: str,
+        setpoint: float,
+        temperature: float | None = None,
+    ) -> None:
+        """Puts a thermostat of the house under the control of the model.
+
+        Args:
+            name (str): The name of the thermostat.
+            setpoint (float): Its setpoint, in °C.
+            temperature (float | None, optional): The temperature of its
+            room, in °C. Defaults to None, for the outside temperature.
+
+        Raises:
+            ValueError: If there is no thermostat with that name.
+        """
+        device_type = self.__house.get_device_type(name)
+        if device_type is not DispositivosEnum.TERMOSTATO:
+            raise ValueError(f'There is no thermostat named {name}.')
+        if temperature is None:
+            temperature = self.outside
+        device = self.__house.get_device(name)
+        index = self.__index.get(name)
+        if index is None:
+            self.__index[name] = len(self.__names)
+            self.__names.append(name)
+            self.__devices.append(device)
+            self.__slots.append(device._slot)
+            self.__temperatures.append(temperature)
+            self.__setpoints.append(setpoint)
+        else:
+            self.__devices[index] = device
+            self.__slots[index] = device._slot
+            self.__temperatures[index] = temperature
+            self.__setpoints[index] = setpoint
+
+    def detach(self, name: str) -> bool:
+        """Releases a thermostat from the control of the model.
+        Its current state is kept.
+
+        Args:
+            name (str): The name of the thermostat.
+
+        Returns:
+            bool: False if the thermostat was not controlled.
+        """
+        index = self.__index.pop(name, None)
+        if index is None:
+            return False
+        # The last thermostat takes the place of the one removed,
+        # so the arrays stay dense.
+        last = len(self.__names) - 1
+        if index != last:
+            moved = self.__names[last]
+            self.__names[index] = moved
+            self.__devices[index] = self.__devices[last]
+            self.__slots[index] = self.__slots[last]
+            self.__temperatures[index] = self.__temperatures[last]
+            self.__setpoints[index] = self.__setpoints[last]
+            self.__index[moved] = index
+        self.__names.pop()
+        self.__devices.pop()
+        self.__slots.pop()
+        self.__temperatures.pop()
+        self.__setpoints.pop()
+        return True
+
+    def __position(self, name: str) -> int:
+        """
+        The position of a controlled thermostat in the arrays.
+        """
+        index = self.__index.get(name)
+        if index is None:
+            raise KeyError(f'The thermostat {name} is not controlled.')
+        return index
+
+    def temperature(self, name: str) -> float:
+        """Returns the room temperature of a controlled thermostat.
+
+        Args:
+            name (str): The name of the thermostat.
+
+        Raises:
+            KeyError: If the thermostat is not controlled.
+
+        Returns:
+            float: The temperature, in °C.
+        """
+        return self.__temperatures[self.__position(name)]
+
+    def setpoint(self, name: str) -> float:
+        """Returns the setpoint of a controlled thermostat.
+
+        Args:
+            name (str): The name of the thermostat.
+
+        Raises:
+            KeyError: If the thermostat is not controlled.
+
+        Returns:
+            float: The setpoint, in °C.
+        """
+        return self.__setpoints[self.__position(name)]
+
+    def set_setpoint(self, name: str, setpoint: float) -> None:
+        """Changes the setpoint of a controlled thermostat. It is
+        switched on the next `step`, if needed.
+
+        Args:
+            name (str): The name of the thermostat.
+            setpoint (float): The setpoint, in °C.
+
+        Raises:
+            KeyError: If the thermostat is not controlled.
+        """
+        self.__setpoints[self.__position(name)] = setpoint
+
+    def __release_removed(self) -> None:
+        """
+        Releases the thermostats removed from the house. In a
+        `columnar` house, they are only looked for when the store
+        released a slot since the last time.
+        """
+        house = self.__house
+        store = house.state_store
+        if store is not None:
+            if store.released == self.__released:
+                return
+            self.__released = store.released
+        get_device = house.get_device
+        removed = [
+            name for name, device in zip(self.__names, self.__devices)
+            if get_device(name) is not device
+        ]
+        for name in removed:
+            self.detach(name)
+
+    def step(self, dt: float = 1.0) -> int:
+        """Advances the simulation, and switches the thermostats whose
+        room crossed a band. Thermostats removed from the house are
+        released.
+
+        Args:
+            dt (float, optional): The time elapsed, in seconds.
+            Defaults to 1.
+
+        Returns:
+            int: The number of triggers fired.
+        """
+        self.__release_removed()
+        heating = TermostatoState.AQUECENDO
+        cooling = TermostatoState.ESFRIANDO
+        store = self.__house.state_store
+        if store is None:
+            states = [device.get_state() for device in self.__devices]
+        elif self.__names:
+            # One copy of the codes, read by slot: no lookup by name,
+            # and no call per thermostat.
+            codes = store.codes()
+            states = [codes[slot] for slot in self.__slots]
+            heating = store.code(DispositivosEnum.TERMOSTATO, heating)
+            cooling = store.code(DispositivosEnum.TERMOSTATO, cooling)
+        else:
+            return 0
+        temperatures, setpoints = self.__temperatures, self.__setpoints
+        heat, cool = self.heat_rate * dt, self.cool_rate * dt
+        leak, outside = min(1.0, self.leak * dt), self.outside
+        band = self.band
+        commands = []
+        for index, name in enumerate(self.__names):
+            state = states[index]
+            temperature = temperatures[index]
+            if state == heating:
+                temperature += heat
+            elif state == cooling:
+                temperature -= cool
+            temperature += (outside - temperature) * leak
+            temperatures[index] = temperature
+            setpoint = setpoints[index]
+            if state == heating:
+                if temperature >= setpoint:
+                    commands.append((name, 'desligar'))
+            elif state == cooling:
+                if temperature <= setpoint:
+                    commands.append((name, 'desligar'))
+            elif temperature < setpoint - band:
+                commands.append((name, 'aquecer'))
+            elif temperature > setpoint + band:
+                commands.append((name, 'esfriar'))
+        if commands:
+            self.__house.control_many(commands)
+        return len(commands)
@@ -1,6 +1,18 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Callable
 from observers.observer import Observer
 from abc import ABC, abstractmethod
 from enum import Enum
+from itertools import count
+if TYPE_CHECKING:
+    from casa_inteligente import CasaInteligente
+    from observers.dispatcher import Dispatcher
+    from dispositivos.event_log import EventLog
+    from dispositivos.state_store import DeviceStateStore
+    from dispositivos.state_table import StateTable
+
+# The IDs given to the observers, the first time they are registered.
+_observer_ids = count(1)
 
 
 class State(Enum):
@@ -8,7 +20,10 @@ class State(Enum):
     Represents the state of a device.
     """
 
-    pass
+    # States are singletons compared by identity, so the identity hash
+    # is valid, and much cheaper than `Enum.__hash__` for the lookups
+    # in the `StateTable`.
+    __hash__ = object.__hash__
 
 
 class Dispositivo(ABC):
@@ -16,6 +31,8 @@ class Dispositivo(ABC):
     Abstract base class for devices in the smart house system.
     """
 
+    __slots__ = ()
+
     @abstractmethod
     def get_state(self) -> State:
         """
@@ -42,42 +59,121 @@ class ObservableDevice(Dispositivo):
     class and provides functionality for registering
     and unregistering observers,
     as well as notifying them of changes.
+    The state machine of each subclass is a `StateTable` shared by
+    all of its instances: a device holds only its current `state`,
+    and the triggers are dispatched through the table by `_trigger`.
 
     Attributes:
-        __observers (dict[int, dict]): A dictionary
-        containing information about registered observers.
-        __lastid (int): The ID of the last registered observer.
+        _table (StateTable): The transition table of the device class,
+        set by the subclasses.
+        state (State): The current state of the device. It is kept in
+        the device itself, or in the slot `_slot` of a `DeviceStateStore`
+        while the device is attached to the store `_store`.
+        _observers (tuple[Observer, ...]): The observers registered while
+        the device is not paired. Pairing moves them to the bus of the
+        house, the single record of the subscriptions of paired devices.
+        An unregistered observer is dropped from the tuple, or from the
+        bus, so no per-observer flag is kept.
+        _hub (CasaInteligente | None): The house the device is paired
+        with. `register` and `unregister` forward to it.
+        _listener (Callable | None): Called with the device after every
+        state transition, instead of notifying the observers. Used by
+        the `CasaInteligente` that owns the device to keep its indexes
+        updated and to publish the change on its bus.
+        _dispatcher (Dispatcher | None): Delivers the notifications of a
+        device that is not paired to its observers. If None, `notify`
+        delivers them synchronously.
+        _log (EventLog | None): Records the transitions of the device.
+        _log_id (int): The id of the device in `_log`.
+        name (str | None): The name given to the device by its house.
 
     Methods:
-        observers() -> list[Observer]: Returns a list of registered observers.
+        observers() -> tuple[Observer, ...]: Returns the registered observers.
         register(observer: Observer) -> None: Registers a new observer.
         unregister(observerid: int) -> None: Unregisters an observer.
+        unregister_observer(observer: Observer) -> None: Unregisters
+        an observer by identity.
         _get_observer_by_id(observerid) -> Observer | None: Returns the
         observer with the specified ID.
         notify() -> None: Notifies all registered observers of a change.
+        _trigger(trigger: str) -> bool: Fires a trigger of the state machine.
+        _move_to(dest: State, trigger: str) -> None: Completes
+        a validated transition.
+        _after_transition() -> None: Callback for the state machine
+        transitions.
     """
 
+    __slots__ = (
+        '_observers',
+        '_hub',
+        '_listener',
+        '_dispatcher',
+        '_log',
+        '_log_id',
+        '_state',
+        '_store',
+        '_slot',
+        'name',
+    )
+
     @property
-    def observers(self) -> list[Observer]:
+    def observers(self) -> tuple[Observer, ...]:
         """
-        Get the list of registered observers.
+        Get the registered observers: the ones subscribed to the state
+        of the device on the bus of its house, or the ones registered
+        with the device while it is not paired.
 
         Returns:
-            list[Observer]: A list of registered observers.
+            tuple[Observer, ...]: The registered observers.
         """
-        if len(self.__observers) > 0:
-            return [obs['observer'] for obs in self.__observers.values()
-                    if obs['registered'] is True]
-        return []
+        if self._hub is not None:
+            return self._hub.get_device_observers(self.name)
+        return self._observers
+
+    @property
+    def state(self) -> State:
+        """
+        Get the current state of the device.
+
+        Returns:
+            State: The current state of the device.
+        """
+        if self._store is None:
+            return self._state
+        return self._store.get(self._slot)
+
+    @state.setter
+    def state(self, value: State) -> None:
+        """
+        Set the current state of the device.
+
+        Args:
+            value (State): The new state of the device.
+        """
+        if self._store is None:
+            self._state = value
+        else:
+            self._store.set(self._slot, value)
+
+    _table: StateTable
 
     def __init__(self) -> None:
         super().__init__()
-        self.__observers: dict[int, dict] = {}
-        self.__lastid = 0
+        self._observers: tuple[Observer, ...] = ()
+        self._hub: CasaInteligente | None = None
+        self._listener: Callable[[ObservableDevice], None] | None = None
+        self._dispatcher: Dispatcher | None = None
+        self._log: EventLog | None = None
+        self._log_id = -1
+        self._store: DeviceStateStore | None = None
+        self._slot = -1
+        self._state: State = self._table.initial
+        self.name: str | None = None
 
     def register(self, observer: Observer) -> None:
         """
-        Register a new observer.
+        Register a new observer. The observer of a paired device is
+        subscribed to its state on the bus of the house.
 
         Args:
             observer (Observer): The observer to register.
@@ -88,15 +184,11 @@ class ObservableDevice(Dispositivo):
         if not isinstance(observer, Observer):
             raise TypeError('This is not a valid observer.')
         if observer.observer_id is None:
-            nextid = self.__lastid + 1
-            self.__observers[nextid] = {
-                'observer': observer,
-                'registered': True,
-            }
-            observer.register(nextid)
-            self.__lastid = nextid
-        else:
-            self.__observers[observer.observer_id]['registered'] = True
+            observer.register(next(_observer_ids))
+        if self._hub is not None:
+            self._hub.add_observer(observer, self.name)
+        elif observer not in self._observers:
+            self._observers += (observer,)
 
     def unregister(self, observerid: int) -> None:
         """
@@ -105,8 +197,24 @@ class ObservableDevice(Dispositivo):
         Args:
             observerid (int): The ID of the observer to unregister.
         """
-        if observerid in self.__observers:
-            self.__observers[observerid]['registered'] = False
+        observer = self._get_observer_by_id(observerid)
+        if observer is not None:
+            self.unregister_observer(observer)
+
+    def unregister_observer(self, observer: Observer) -> None:
+        """
+        Unregister an observer, identified by the object itself
+        rather than by its ID.
+
+        Args:
+            observer (Observer): The observer to unregister.
+        """
+        if self._hub is not None:
+            self._hub.remove_observer(observer, self.name)
+        elif observer in self._observers:
+            self._observers = tuple(
+                obs for obs in self._observers if obs is not observer
+            )
 
     def _get_observer_by_id(self, observerid) -> Observer | None:
         """
@@ -119,12 +227,89 @@ class ObservableDevice(Dispositivo):
             Observer | None: The observer with the specified ID,
             or None if not found or not registered.
         """
-        obs = self.__observers.get(observerid)
-        if obs is not None:
-            if obs['registered'] is True:
-                return obs['observer']
-            else:
-                return None
+        for observer in self.observers:
+            if observer.observer_id == observerid:
+                return observer
+        return None
+
+    def _attach_store(self, store: DeviceStateStore, slot: int) -> None:
+        """
+        Turns the device into a view over a slot of a `DeviceStateStore`.
+        Called by `DeviceStateStore.attach`, after the current state
+        was written to the slot.
+
+        Args:
+            store (DeviceStateStore): The store.
+            slot (int): The slot of the device in the store.
+        """
+        self._store = store
+        self._slot = slot
+
+    def _detach_store(self) -> int:
+        """
+        Moves the state back from the `DeviceStateStore` into the device.
+        Called by `DeviceStateStore.detach`.
+
+        Returns:
+            int: The slot the device had in the store.
+        """
+        slot = self._slot
+        self._state = self._store.get(slot)
+        self._store = None
+        self._slot = -1
+        return slot
+
+    def _trigger(self, trigger: str) -> bool:
+        """
+        Fires a trigger of the state machine, moving the device to
+        the destination state resolved by the class `StateTable`.
+
+        Args:
+            trigger (str): The name of the trigger.
+
+        Raises:
+            MachineError: If the trigger can't be fired
+            from the current state.
+
+        Returns:
+            bool: True, once the transition is complete.
+        """
+        self._move_to(self._table.next_state(trigger, self.state), trigger)
+        return True
+
+    def _move_to(self, dest: State, trigger: str) -> None:
+        """
+        Completes a transition already validated against the `StateTable`:
+        sets the destination state, records it in the `_log`, if any,
+        and runs the transition callbacks.
+
+        Args:
+            dest (State): The destination state.
+            trigger (str): The trigger that was fired.
+        """
+        source = self.state
+        self.state = dest
+        if self._log is not None:
+            self._log.append(self, source, trigger)
+        self._after_transition()
+
+    def _after_transition(self) -> None:
+        """
+        Callback executed after every state transition.
+        A paired device informs the `_listener`, which publishes the
+        change to the observers. Otherwise, the observers are notified
+        through the `_dispatcher` if the device has one.
+        """
+        if self._listener is not None:
+            self._listener(self)
+        elif self._dispatcher is None:
+            self.notify()
+        elif self._observers:
+            self._dispatcher.dispatch(
+                self,
+                self._observers,
+                {'state': self.state},
+            )
 
     @abstractmethod
     def notify(self) -> None:
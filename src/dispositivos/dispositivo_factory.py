@@ -1,23 +1,128 @@
-from dispositivos.dispositivo import Dispositivo
-from dispositivos.luz import Luz
-from dispositivos.termostato import Termostato
-from dispositivos.sistema_seguranca import SistemaSeguranca
+from __future__ import annotations
 from enum import Enum, auto
+from importlib import import_module
+from typing import Union
+from dispositivos.dispositivo import Dispositivo
+
+# The group of the package entry points that provide device classes,
+# e.g. `LUZ = "meu_pacote.luz:LuzDimmer"` in the `pyproject.toml` of a
+# plugin.
+ENTRY_POINT_GROUP = 'casa_inteligente.dispositivos'
 
 
 class DispositivosEnum(Enum):
     """Enumeration class for different types of devices in a smart house."""
 
+    # Compared by identity, like `State`: the identity hash is much
+    # cheaper than `Enum.__hash__` for the per-type indexes.
+    __hash__ = object.__hash__
+
     LUZ = auto()
     TERMOSTATO = auto()
     SISTEMA_SEGURANCA = auto()
 
 
+# A device class, or the `module:Class` path of one not imported yet.
+Implementacao = Union[type[Dispositivo], str]
+
+
 class DispositivoFactory:
     """
     A factory class for creating different types of devices.
+
+    Each device type is implemented by a class registered with
+    `registrar`, or with a package entry point found by
+    `registrar_entry_points`. The classes are registered by the path of
+    their module, which is only imported when a device of that type is
+    created for the first time, so a house doesn't pay for the types
+    it never uses. The classes already imported are kept in a
+    `type -> class` table.
+
+    Attributes:
+        __registry (dict[DispositivosEnum, Implementacao]): The class,
+        or the path to the class, of each device type.
+        __classes (dict[DispositivosEnum, type[Dispositivo]]): The
+        classes already imported, by device type.
     """
 
+    __registry: dict[DispositivosEnum, Implementacao] = {
+        DispositivosEnum.LUZ: 'dispositivos.luz:Luz',
+        DispositivosEnum.TERMOSTATO: 'dispositivos.termostato:Termostato',
+        DispositivosEnum.SISTEMA_SEGURANCA:
+            'dispositivos.sistema_seguranca:SistemaSeguranca',
+    }
+    __classes: dict[DispositivosEnum, type[Dispositivo]] = {}
+
+    @staticmethod
+    def registrar(
+        tipo_dispositivo: DispositivosEnum,
+        implementacao: Implementacao,
+    ) -> None:
+        """
+        Registers the class of a device type, replacing the previous
+        one. Register it before pairing any device of the type: the
+        devices already paired keep their class.
+
+        Args:
+            tipo_dispositivo (DispositivosEnum): The type of device.
+            implementacao (Implementacao): The class, or its path as
+            `module:Class`, imported on first use.
+
+        Raises:
+            ValueError: If the path is not of the form `module:Class`.
+        """
+        if isinstance(implementacao, str):
+            module, _, name = implementacao.partition(':')
+            if not module or not name:
+                raise ValueError(
+                    f'Expected a path as module:Class, got {implementacao}.'
+                )
+        DispositivoFactory.__registry[tipo_dispositivo] = implementacao
+        DispositivoFactory.__classes.pop(tipo_dispositivo, None)
+
+    @staticmethod
+    def registrar_entry_points(group: str = ENTRY_POINT_GROUP) -> int:
+        """
+        Registers the device classes provided by the entry points of
+        the installed packages. Each entry point is named after a
+        member of `DispositivosEnum`, and its module is only imported
+        on first use. Entry points with other names are ignored.
+
+        Args:
+            group (str, optional): The group of the entry points.
+            Defaults to `ENTRY_POINT_GROUP`.
+
+        Returns:
+            int: The number of device classes registered.
+        """
+        from importlib.metadata import entry_points
+        count = 0
+        for entry_point in entry_points(group=group):
+            tipo = DispositivosEnum.__members__.get(entry_point.name.upper())
+            if tipo is None:
+                continue
+            DispositivoFactory.registrar(tipo, entry_point.value)
+            count += 1
+        return count
+
+    @staticmethod
+    def __load(tipo_dispositivo: DispositivosEnum) -> type[Dispositivo]:
+        """
+        Imports the class of a device type, and caches it.
+        """
+        implementacao = DispositivoFactory.__registry.get(tipo_dispositivo)
+        if implementacao is None:
+            raise ValueError(f'No device class for {tipo_dispositivo}.')
+        if isinstance(implementacao, str):
+            module, _, name = implementacao.partition(':')
+            cls = getattr(import_module(module), name)
+        else:
+            cls = implementacao
+        if not (isinstance(cls, type) and issubclass(cls, Dispositivo)):
+            raise TypeError(f'{implementacao} is not a Dispositivo class.')
+        DispositivoFactory.__classes[tipo_dispositivo] = cls
+        return cls
+
     @staticmethod
     def parear_dispositivo(
         tipo_dispositivo: DispositivosEnum,
@@ -32,12 +137,56 @@ class DispositivoFactory:
             *args: Variable length argument list.
             **kwargs: Arbitrary keyword arguments.
 
+        Raises:
+            ValueError: If no class is registered for the type.
+            TypeError: If the registered class is not a `Dispositivo`.
+
         Returns:
             Dispositivo: An instance of the specified device type.
         """
-        if tipo_dispositivo == DispositivosEnum.LUZ:
-            return Luz(*args, **kwargs)
-        if tipo_dispositivo == DispositivosEnum.TERMOSTATO:
-            return Termostato(*args, **kwargs)
-        if tipo_dispositivo == DispositivosEnum.SISTEMA_SEGURANCA:
-            return SistemaSeguranca(*args, **kwargs)
+        cls = DispositivoFactory.__classes.get(tipo_dispositivo)
+        if cls is None:
+            cls = DispositivoFactory.__load(tipo_dispositivo)
+        return cls(*args, **kwargs)
+
+    @staticmethod
+    def classe_dispositivo(
+        tipo_dispositivo: DispositivosEnum,
+    ) -> type[Dispositivo]:
+        """
+        Returns the class of the specified device type, e.g. to read
+        its `StateTable` without creating a device.
+
+        Args:
+            tipo_dispositivo (DispositivosEnum): The type of device.
+
+        Raises:
+            ValueError: If no class is registered for the type.
+            TypeError: If the registered class is not a `Dispositivo`.
+
+        Returns:
+            type[Dispositivo]: The class of the devices of that type.
+        """
+        cls = DispositivoFactory.__classes.get(tipo_dispositivo)
+        if cls is None:
+            cls = DispositivoFactory.__load(tipo_dispositivo)
+        return cls
+
+    @staticmethod
+    def parear_dispositivos(
+        tipo_dispositivo: DispositivosEnum,
+        quantidade: int,
+    ) -> list[Dispositivo]:
+        """
+        Creates many instances of the specified device type, resolving
+        the device class once instead of once per device.
+
+        Args:
+            tipo_dispositivo (DispositivosEnum): The type of device to create.
+            quantidade (int): How many devices to create.
+
+        Returns:
+            list[Dispositivo]: The new devices.
+        """
+        cls = DispositivoFactory.classe_dispositivo(tipo_dispositivo)
+        return [cls() for _ in range(quantidade)]
@@ -0,0 +1,151 @@
+from __future__ import annotations
+from typing import Iterator
+from dispositivos.dispositivo import ObservableDevice
+from dispositivos.dispositivo_factory import DispositivosEnum
+
+
+class DispositivoRegistry:
+    """
+    An indexed collection of the devices paired with a house.
+
+    The registry keeps a `name -> device` hash index, whose
+    insertion order is the pairing order of the devices, and a
+    per-type index. Lookups, insertions and removals by name are O(1).
+
+    Attributes:
+        __by_name (dict[str, ObservableDevice]): The name index.
+        __types (dict[str, DispositivosEnum]): The type of each device,
+        by device name.
+        __by_type (dict[DispositivosEnum, dict[str, ObservableDevice]]):
+        The per-type index.
+    """
+
+    def __init__(self) -> None:
+        self.__by_name: dict[str, ObservableDevice] = {}
+        self.__types: dict[str, DispositivosEnum] = {}
+        self.__by_type: dict[DispositivosEnum, dict[str, ObservableDevice]] = {
+            device_type: {} for device_type in DispositivosEnum
+        }
+
+    def __len__(self) -> int:
+        return len(self.__by_name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__by_name
+
+    def __iter__(self) -> Iterator[ObservableDevice]:
+        """
+        Iterates over the devices in pairing order.
+        """
+        return iter(self.__by_name.values())
+
+    def add(
+        self,
+        name: str,
+        device_type: DispositivosEnum,
+        device: ObservableDevice,
+    ) -> None:
+        """Adds a device to the registry.
+
+        Args:
+            name (str): The unique name of the device.
+            device_type (DispositivosEnum): The type of the device.
+            device (ObservableDevice): The device instance.
+
+        Raises:
+            ValueError: If a device with the same name is already registered.
+        """
+        if name in self.__by_name:
+            raise ValueError(f'There is already a device named {name}.')
+        self.__by_name[name] = device
+        self.__types[name] = device_type
+        self.__by_type[device_type][name] = device
+
+    def add_many(
+        self,
+        entries: list[tuple[str, DispositivosEnum, ObservableDevice]],
+    ) -> None:
+        """Adds many devices to the registry, updating each index
+        with a single bulk `dict.update`.
+
+        Args:
+            entries (list[tuple[str, DispositivosEnum, ObservableDevice]]):
+            The name, type and instance of each device.
+
+        Raises:
+            ValueError: If a name is already registered, or repeated
+            in `entries`. No device is added then.
+        """
+        names = {name for name, _, _ in entries}
+        if len(names) < len(entries) or any(
+            name in self.__by_name for name in names
+        ):
+            raise ValueError('There are repeated device names.')
+        self.__by_name.update(
+            [(name, device) for name, _, device in entries]
+        )
+        self.__types.update(
+            [(name, device_type) for name, device_type, _ in entries]
+        )
+        for name, device_type, device in entries:
+            self.__by_type[device_type][name] = device
+
+    def get(self, name: str) -> ObservableDevice | None:
+        """Retrieves a device by its name.
+
+        Args:
+            name (str): The name of the device.
+
+        Returns:
+            ObservableDevice | None: The device, or None if not found.
+        """
+        return self.__by_name.get(name)
+
+    def type_of(self, name: str) -> DispositivosEnum | None:
+        """Retrieves the type of a device by its name.
+
+        Args:
+            name (str): The name of the device.
+
+        Returns:
+            DispositivosEnum | None: The device type, or None if not found.
+        """
+        return self.__types.get(name)
+
+    def remove(self, name: str) -> ObservableDevice | None:
+        """Removes a device from the registry.
+
+        Args:
+            name (str): The name of the device to be removed.
+
+        Returns:
+            ObservableDevice | None: The removed device,
+            or None if not found.
+        """
+        device = self.__by_name.pop(name, None)
+        if device is None:
+            return None
+        device_type = self.__types.pop(name)
+        del self.__by_type[device_type][name]
+        return device
+
+    def names(self) -> list[str]:
+        """Returns the names of all the registered devices,
+        in pairing order.
+
+        Returns:
+            list[str]: a list of device names.
+        """
+        return list(self.__by_name)
+
+    def of_type(self, device_type: DispositivosEnum) -> list[ObservableDevice]:
+        """Returns all the registered devices of a given type,
+        in pairing order.
+
+        Args:
+            device_type (DispositivosEnum): The type of the devices.
+
+        Returns:
+            list[ObservableDevice]: a list of devices.
+        """
+        return list(self.__by_type[device_type].values())
@@ -0,0 +1,541 @@
+from __future__ import annotations
+import json
+import mmap
+import os
+import sys
+from bisect import bisect_right
+from struct import Struct
+from time import time
+from typing import TYPE_CHECKING, Callable, Iterator, NamedTuple
+from dispositivos.dispositivo import ObservableDevice, State
+from dispositivos.dispositivo_factory import (
+    DispositivoFactory,
+    DispositivosEnum,
+)
+if TYPE_CHECKING:
+    from dispositivos.state_table import StateTable
+
+# timestamp, device id, type code, source, dest, trigger
+_RECORD = Struct('<dIBBBB')
+_TYPE_SHIFT = 4
+_CODE_MASK = 0x0F
+# Trigger codes of the records that are not transitions.
+_RESTORED = 0x0D
+_PAIRED = 0x0E
+_REMOVED = 0x0F
+
+
+def _devices_path(path: str) -> str:
+    """
+    The path of the file with the names of the devices of a log.
+    """
+    return path + '.devices'
+
+
+def _read_devices(path: str) -> tuple[list[list], int]:
+    """
+    Reads the id, type name and name of each device of a log, and
+    the size of the complete lines of its devices file. A last line
+    torn by a crash, without its newline, is left out.
+    """
+    entries = []
+    size = 0
+    if not os.path.exists(_devices_path(path)):
+        return entries, size
+    with open(_devices_path(path), 'rb') as devices:
+        for line in devices:
+            if not line.endswith(b'\n'):
+                break
+            entries.append(json.loads(line))
+            size += len(line)
+    return entries, size
+
+
+class LogEvent(NamedTuple):
+    """
+    An event read from an `EventLog`.
+
+    A transition has a `trigger`, a `source` and a `dest`. The pairing
+    of a device has no `source`, its removal has no `dest`, and
+    a state set by `CasaInteligente.restore` has no `trigger`.
+    """
+
+    timestamp: float
+    device: str
+    device_type: DispositivosEnum
+    source: State | None
+    dest: State | None
+    trigger: str | None
+
+
+class EventLog:
+    """
+    An append-only log of the transitions of the devices, for audit
+    trails such as the arming and disarming of a `SistemaSeguranca`.
+
+    Each event is a fixed-width binary record of 16 bytes: the
+    timestamp, the device id, and one byte each for the device type,
+    the source state, the destination state and the trigger. As in the
+    `DeviceStateStore`, the last three bytes carry the type code in
+    their high nibble, so each column can be searched on its own. The
+    records are buffered in memory and written in large chunks. The
+    names of the devices, which don't fit in a record, are kept next
+    to the log, in a `<path>.devices` file with one JSON line per id.
+
+    The records are little-endian, whatever the machine. Their
+    timestamps never go backwards: if the clock is set back, the
+    records are stamped with the last timestamp until it catches up,
+    so the log stays sorted for the searches of the reader.
+
+    The log is read with an `EventLogReader`.
+
+    Attributes:
+        __file (BinaryIO): The log, opened for appending.
+        __devices_file (TextIO): The names of the devices.
+        __buffer (bytearray): The records not written yet.
+        __last (float): The timestamp of the last record.
+        __ids (dict[tuple[str, int], int]): The id of each device,
+        by name and type code.
+        __type_codes (list[int]): The type code of each device id.
+        __codes (dict[StateTable, tuple[dict, dict]]): The state and
+        trigger codes of each state table.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        buffer_size: int = 1 << 16,
+        clock: Callable[[], float] = time,
+    ) -> None:
+        """
+        Constructor method for the `EventLog` class. An existing
+        log is continued; a record, or a line of the devices file,
+        torn by a crash is dropped.
+
+        Args:
+            path (str): The path of the log.
+            buffer_size (int, optional): How many bytes of records are
+            buffered before they are written. Defaults to 64 KiB.
+            clock (Callable[[], float], optional): The time source.
+            Defaults to `time.time`.
+        """
+        self.__path = path
+        self.__buffer_size = buffer_size
+        self.__clock = clock
+        self.__buffer = bytearray()
+        self.__ids: dict[tuple[str, int], int] = {}
+        self.__type_codes: list[int] = []
+        self.__codes: dict[StateTable, tuple[dict, dict]] = {}
+        entries, devices_size = _read_devices(path)
+        for device_id, type_name, name in entries:
+            type_code = DispositivosEnum[type_name].value
+            self.__ids[(name, type_code)] = device_id
+            self.__type_codes.append(type_code)
+        if os.path.exists(_devices_path(path)):
+            if os.path.getsize(_devices_path(path)) > devices_size:
+                os.truncate(_devices_path(path), devices_size)
+        self.__file = open(path, 'ab')
+        size = self.__file.tell()
+        torn = size % _RECORD.size
+        if torn:
+            size -= torn
+            self.__file.truncate(size)
+        self.__last = float('-inf')
+        if size:
+            with open(path, 'rb') as file:
+                file.seek(size - _RECORD.size)
+                self.__last = _RECORD.unpack(file.read(_RECORD.size))[0]
+        self.__devices_file = open(
+            _devices_path(path), 'a', encoding='utf-8',
+        )
+
+    @property
+    def path(self) -> str:
+        """
+        The path of the log.
+        """
+        return self.__path
+
+    def __enter__(self) -> EventLog:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __codes_of(self, table: StateTable) -> tuple[dict, dict]:
+        """
+        The codes of the states and triggers of a state table.
+        """
+        codes = self.__codes.get(table)
+        if codes is None:
+            codes = self.__codes[table] = (
+                {state: code for code, state in enumerate(table.states)},
+                {trigger: code
+                 for code, trigger in enumerate(table.triggers)},
+            )
+        return codes
+
+    def pair(
+        self,
+        device: ObservableDevice,
+        device_type: DispositivosEnum,
+    ) -> None:
+        """Starts logging the transitions of a device, recording
+        its current state. A device paired again under the same
+        name and type keeps its id.
+
+        Args:
+            device (ObservableDevice): The device, with its `name`.
+            device_type (DispositivosEnum): The type of the device.
+        """
+        key = (device.name, device_type.value)
+        device_id = self.__ids.get(key)
+        if device_id is None:
+            device_id = self.__ids[key] = len(self.__type_codes)
+            self.__type_codes.append(device_type.value)
+            self.__devices_file.write(json.dumps(
+                [device_id, device_type.name, device.name],
+            ) + '\n')
+            self.__devices_file.flush()
+        device._log = self
+        device._log_id = device_id
+        self.__write(device, device.state, device.state, _PAIRED)
+
+    def remove(self, device: ObservableDevice) -> None:
+        """Records the removal of a device, and stops logging it.
+
+        Args:
+            device (ObservableDevice): The device.
+        """
+        self.__write(device, device.state, device.state, _REMOVED)
+        device._log = None
+
+    def append(
+        self,
+        device: ObservableDevice,
+        source: State,
+        trigger: str | None,
+    ) -> None:
+        """Records a transition of a device to its current state.
+        Called by the device, after the state changes.
+
+        Args:
+            device (ObservableDevice): The device.
+            source (State): The state before the transition.
+            trigger (str | None): The trigger, or None for a state set
+            by `CasaInteligente.restore`.
+        """
+        code = _RESTORED
+        if trigger is not None:
+            code = self.__codes_of(device._table)[1][trigger]
+        self.__write(device, source, device.state, code)
+
+    def __write(
+        self,
+        device: ObservableDevice,
+        source: State,
+        dest: State,
+        trigger_code: int,
+    ) -> None:
+        """
+        Buffers a record, and writes the buffer once it is full.
+        """
+        states = self.__codes_of(device._table)[0]
+        type_code = self.__type_codes[device._log_id]
+        high = type_code << _TYPE_SHIFT
+        timestamp = self.__clock()
+        if timestamp < self.__last:
+            timestamp = self.__last
+        self.__last = timestamp
+        self.__buffer += _RECORD.pack(
+            timestamp,
+            device._log_id,
+            type_code,
+            high | states[source],
+            high | states[dest],
+            high | trigger_code,
+        )
+        if len(self.__buffer) >= self.__buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes the buffered records to the log.
+        """
+        if self.__buffer:
+            self.__file.write(self.__buffer)
+            self.__buffer.clear()
+        self.__file.flush()
+
+    def close(self) -> None:
+        """
+        Writes the buffered records, and closes the log.
+        """
+        if self.__file.closed:
+            return
+        self.flush()
+        self.__file.close()
+        self.__devices_file.close()
+
+
+class EventLogReader:
+    """
+    Reads an `EventLog` through a memory map.
+
+    The records are never loaded as a whole: each field is exposed as
+    a strided `memoryview` over the map, so scans and counts run over
+    the bytes of a single column, and only the events that are
+    actually returned become Python objects. The timestamps are
+    ascending, as the `EventLog` never lets them go backwards.
+
+    The columns are read in the byte order of the machine, so the
+    reader only runs on little-endian machines, as the records are.
+
+    Attributes:
+        __map (mmap | None): The map of the log, or None if it is empty.
+        __timestamps (memoryview): The timestamp of each record.
+        __devices (memoryview): The device id of each record.
+        __names (list[tuple[str, DispositivosEnum]]): The name and type
+        of each device id.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Constructor method for the `EventLogReader` class. Only the
+        records written when it is created are read: flush the
+        `EventLog` first. A record, or a line of the devices file,
+        torn by a crash is ignored.
+
+        Args:
+            path (str): The path of the log.
+
+        Raises:
+            OSError: If the machine is big-endian.
+        """
+        if sys.byteorder != 'little':
+            raise OSError(
+                'The event log is little-endian, and can only be read '
+                'on a little-endian machine.'
+            )
+        self.__names: list[tuple[str, DispositivosEnum]] = []
+        for _, type_name, name in _read_devices(path)[0]:
+            self.__names.append((name, DispositivosEnum[type_name]))
+        self.__states: dict[int, tuple[State, ...]] = {}
+        self.__triggers: dict[int, list[str]] = {}
+        with open(path, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            size -= size % _RECORD.size
+            self.__map = None
+            raw = memoryview(b'')
+            if size:
+                self.__map = mmap.mmap(
+                    file.fileno(), size, access=mmap.ACCESS_READ,
+                )
+                raw = memoryview(self.__map)
+        self.__raw = raw
+        self.__timestamps = raw.cast('d')[::2]
+        self.__devices = raw.cast('I')[2::4]
+        self.__types = raw[12::16]
+        self.__sources = raw[13::16]
+        self.__dests = raw[14::16]
+        self.__trigger_codes = raw[15::16]
+
+    def __len__(self) -> int:
+        return len(self.__timestamps)
+
+    def __enter__(self) -> EventLogReader:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Releases the memory map.
+        """
+        views = (self.__timestamps, self.__devices, self.__types,
+                 self.__sources, self.__dests, self.__trigger_codes)
+        for view in views:
+            view.release()
+        self.__raw.release()
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
+
+    def __learn(self, device_type: DispositivosEnum) -> None:
+        """
+        Registers the states and triggers of a device type,
+        from the state table of its class.
+        """
+        if device_type.value in self.__states:
+            return
+        table = DispositivoFactory.classe_dispositivo(device_type)._table
+        self.__states[device_type.value] = tuple(table.states)
+        self.__triggers[device_type.value] = table.triggers
+
+    def __event(self, index: int) -> LogEvent:
+        """
+        Decodes the record at an index.
+        """
+        name, device_type = self.__names[self.__devices[index]]
+        self.__learn(device_type)
+        states = self.__states[device_type.value]
+        source = states[self.__sources[index] & _CODE_MASK]
+        dest = states[self.__dests[index] & _CODE_MASK]
+        trigger = None
+        code = self.__trigger_codes[index] & _CODE_MASK
+        if code == _PAIRED:
+            source = None
+        elif code == _REMOVED:
+            dest = None
+        elif code != _RESTORED:
+            trigger = self.__triggers[device_type.value][code]
+        return LogEvent(
+            self.__timestamps[index], name, device_type,
+            source, dest, trigger,
+        )
+
+    def index_at(self, timestamp: float | None) -> int:
+        """Finds how many events happened up to a point in time.
+
+        Args:
+            timestamp (float | None): The point in time,
+            or None for the end of the log.
+
+        Returns:
+            int: The index of the first event after `timestamp`.
+        """
+        if timestamp is None:
+            return len(self)
+        return bisect_right(self.__timestamps, timestamp)
+
+    def replay(
+        self,
+        since: float | None = None,
+        until: float | None = None,
+    ) -> Iterator[LogEvent]:
+        """Reads the events of a period, in the order they happened.
+
+        Args:
+            since (float | None, optional): Skips the events up to this
+            point in time. Defaults to None, from the start of the log.
+            until (float | None, optional): Stops after this point in time.
+            Defaults to None, to the end of the log.
+
+        Yields:
+            LogEvent: The events.
+        """
+        start = 0 if since is None else self.index_at(since)
+        for index in range(start, self.index_at(until)):
+            yield self.__event(index)
+
+    def __codes(
+        self,
+        device_type: DispositivosEnum,
+        trigger: str | None,
+    ) -> tuple[memoryview, int]:
+        """
+        The column and the code to search for a type or a trigger.
+        """
+        if trigger is None:
+            return self.__types, device_type.value
+        self.__learn(device_type)
+        code = self.__triggers[device_type.value].index(trigger)
+        return self.__trigger_codes, device_type.value << _TYPE_SHIFT | code
+
+    def count(
+        self,
+        device_type: DispositivosEnum,
+        trigger: str | None = None,
+    ) -> int:
+        """Counts the events of a device type, e.g. how many times the
+        security systems were disarmed, with a single pass over one
+        column of the log.
+
+        Args:
+            device_type (DispositivosEnum): The type of the devices.
+            trigger (str | None, optional): Only counts the transitions
+            fired by this trigger. Defaults to None, for all the events.
+
+        Raises:
+            ValueError: If the device type has no such trigger.
+
+        Returns:
+            int: The number of events.
+        """
+        column, code = self.__codes(device_type, trigger)
+        return column.tobytes().count(bytes((code,)))
+
+    def scan(
+        self,
+        device_type: DispositivosEnum,
+        trigger: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+    ) -> Iterator[LogEvent]:
+        """Reads the events of a device type in a period, e.g. the
+        arming and disarming of the security systems last night.
+        The matching records are found with `bytes.find` over one
+        column, and only those are decoded.
+
+        Args:
+            device_type (DispositivosEnum): The type of the devices.
+            trigger (str | None, optional): Only reads the transitions
+            fired by this trigger. Defaults to None, for all the events.
+            since (float | None, optional): Skips the events up to this
+            point in time. Defaults to None.
+            until (float | None, optional): Stops after this point in time.
+            Defaults to None.
+
+        Raises:
+            ValueError: If the device type has no such trigger.
+
+        Yields:
+            LogEvent: The events, in the order they happened.
+        """
+        column, code = self.__codes(device_type, trigger)
+        start = 0 if since is None else self.index_at(since)
+        stop = self.index_at(until)
+        raw = column[start:stop].tobytes()
+        needle = bytes((code,))
+        index = raw.find(needle)
+        while index != -1:
+            yield self.__event(start + index)
+            index = raw.find(needle, index + 1)
+
+    def states_at(
+        self,
+        timestamp: float | None = None,
+    ) -> dict[str, tuple[DispositivosEnum, State]]:
+        """Rebuilds the devices of the house at a point in time,
+        reading the log backwards up to the last event of each device.
+
+        Args:
+            timestamp (float | None, optional): The point in time.
+            Defaults to None, for the end of the log.
+
+        Returns:
+            dict[str, tuple[DispositivosEnum, State]]: The type and
+            state of each device paired at that time, in pairing order.
+        """
+        latest: dict[int, int] = {}
+        devices = self.__devices
+        total = len(self.__names)
+        for index in range(self.index_at(timestamp) - 1, -1, -1):
+            device_id = devices[index]
+            if device_id not in latest:
+                latest[device_id] = index
+                if len(latest) == total:
+                    break
+        # A name reused for another type belongs to the latest device.
+        by_name: dict[str, int] = {}
+        for device_id, index in latest.items():
+            name = self.__names[device_id][0]
+            if by_name.get(name, -1) < index:
+                by_name[name] = index
+        states = {}
+        for index in sorted(by_name.values(), key=devices.__getitem__):
+            event = self.__event(index)
+            if event.dest is not None:
+                states[event.device] = (event.device_type, event.dest)
+        return states
@@ -1,5 +1,5 @@
 from dispositivos.dispositivo import ObservableDevice, State
-from transitions import Machine
+from dispositivos.state_table import StateTable
 
 
 class LuzState(State):
@@ -21,32 +21,40 @@ class Luz(ObservableDevice):
     Inherits from the ObservableDevice class.
 
     Attributes:
-        _machine (Machine): The state machine
+        _table (StateTable): The state table, shared by all the lights,
         that manages the transitions of the light device.
     """
 
-    def __init__(self) -> None:
-        super().__init__()
-        transitions = [
+    __slots__ = ()
+
+    _table = StateTable(
+        states=LuzState,
+        initial=LuzState.DESLIGADA,
+        transitions=[
             {
                 'trigger': 'ligar',
                 'source': LuzState.DESLIGADA,
                 'dest': LuzState.LIGADA,
-                'after': self.notify,
             },
             {
                 'trigger': 'desligar',
                 'source': LuzState.LIGADA,
                 'dest': LuzState.DESLIGADA,
-                'after': self.notify,
             },
-        ]
-        self._machine = Machine(
-            model=self,
-            states=LuzState,
-            initial=LuzState.DESLIGADA,
-            transitions=transitions,
-        )
+        ],
+    )
+
+    def ligar(self) -> bool:
+        """
+        Turns the light on.
+        """
+        return self._trigger('ligar')
+
+    def desligar(self) -> bool:
+        """
+        Turns the light off.
+        """
+        return self._trigger('desligar')
 
     def get_state(self) -> State:
         """
@@ -65,6 +73,5 @@ class Luz(ObservableDevice):
         It notifies each observer by calling their `notify` method with
         the current state as an argument.
         """
-        if len(self.observers) > 0:
-            for observer in self.observers:
-                observer.notify(state=self.state)
+        for observer in self.observers:
+            observer.notify(state=self.state)
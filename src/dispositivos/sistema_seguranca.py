@@ -1,5 +1,5 @@
 from dispositivos.dispositivo import ObservableDevice, State
-from transitions import Machine
+from dispositivos.state_table import StateTable
 
 
 class SisSegState(State):
@@ -27,38 +27,52 @@ class SistemaSeguranca(ObservableDevice):
     of the security system.
 
     Attributes:
-        _machine (Machine): The state machine that manages the transitions
-            and states of the security system.
+        _table (StateTable): The state table, shared by all the security
+            systems, that manages the transitions and states
+            of the security system.
     """
 
-    def __init__(self) -> None:
-        super().__init__()
-        transitions = [
+    __slots__ = ()
+
+    _table = StateTable(
+        states=SisSegState,
+        initial=SisSegState.DESARMADO,
+        transitions=[
             {
                 'trigger': 'armar_com_gente',
                 'source': SisSegState.DESARMADO,
                 'dest': SisSegState.ARMADO_COM_GENTE,
-                'after': self.notify,
             },
             {
                 'trigger': 'armar_sem_ninguem',
                 'source': SisSegState.DESARMADO,
                 'dest': SisSegState.ARMADO_SEM_NINGUEM,
-                'after': self.notify,
             },
             {
                 'trigger': 'desarmar',
                 'source': '*',
                 'dest': SisSegState.DESARMADO,
-                'after': self.notify,
             },
-        ]
-        self._machine = Machine(
-            model=self,
-            states=SisSegState,
-            initial=SisSegState.DESARMADO,
-            transitions=transitions,
-        )
+        ],
+    )
+
+    def armar_com_gente(self) -> bool:
+        """
+        Arms the security system with people inside the house.
+        """
+        return self._trigger('armar_com_gente')
+
+    def armar_sem_ninguem(self) -> bool:
+        """
+        Arms the security system with nobody inside the house.
+        """
+        return self._trigger('armar_sem_ninguem')
+
+    def desarmar(self) -> bool:
+        """
+        Disarms the security system.
+        """
+        return self._trigger('desarmar')
 
     def get_state(self) -> State:
         """
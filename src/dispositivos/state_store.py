@@ -0,0 +1,338 @@
+from __future__ import annotations
+from array import array
+from dispositivos.dispositivo import ObservableDevice, State
+from dispositivos.dispositivo_factory import DispositivosEnum
+from dispositivos.state_table import StateTable
+
+
+class DeviceStateStore:
+    """
+    A columnar store for the states of a fleet of devices.
+
+    Every attached device gets a slot in a compact `array('B')`,
+    holding one byte per device: the type code (the `DispositivosEnum`
+    value) in the high nibble and the state code (the index of the
+    state in its enumeration) in the low nibble. A free slot holds 0.
+    Attached devices become thin views over their slot, and fleet-wide
+    queries and bulk transitions run as single C-level passes over the
+    array (`bytes.count`, `bytes.find`, `bytes.translate`) instead of
+    per-object Python calls.
+
+    Attributes:
+        __codes (array): The `type << 4 | state` code of each slot.
+        __devices (list[ObservableDevice | None]): The device of each slot.
+        __free (list[int]): The slots released by detached devices.
+        __released (int): How many slots were released so far.
+        __tables (dict[int, StateTable]): The state table of each
+        device type, by type code.
+        __states (dict[int, tuple[State, ...]]): The states of each
+        device type, indexed by state code.
+        __state_codes (dict[int, dict[State, int]]): The state code of
+        each state, by type code. A state of another type has no code
+        under a type.
+    """
+
+    __TYPE_SHIFT = 4
+    __STATE_MASK = 0x0F
+
+    def __init__(self) -> None:
+        self.__codes = array('B')
+        self.__devices: list[ObservableDevice | None] = []
+        self.__free: list[int] = []
+        self.__released = 0
+        self.__tables: dict[int, StateTable] = {}
+        self.__states: dict[int, tuple[State, ...]] = {}
+        self.__state_codes: dict[int, dict[State, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.__codes) - len(self.__free)
+
+    @property
+    def released(self) -> int:
+        """
+        How many slots were released so far. Since the released slots
+        are reused, the slots looked up before may be stale once it
+        changes.
+        """
+        return self.__released
+
+    def __code(self, device_type: DispositivosEnum, state: State) -> int:
+        """
+        Encodes a device type and a state into a slot code.
+        """
+        return (
+            device_type.value << self.__TYPE_SHIFT
+            | self.__state_codes[device_type.value][state]
+        )
+
+    def __code_of(
+        self,
+        device_type: DispositivosEnum,
+        state: State,
+    ) -> int | None:
+        """
+        Encodes a device type and a state into a slot code, or returns
+        None if no device of the type was attached yet, or if the state
+        is not a state of the type.
+        """
+        codes = self.__state_codes.get(device_type.value)
+        if codes is None or state not in codes:
+            return None
+        return device_type.value << self.__TYPE_SHIFT | codes[state]
+
+    def __learn_states(
+        self,
+        device_type: DispositivosEnum,
+        device: ObservableDevice,
+    ) -> None:
+        """
+        Registers the state table of a device type, the first time
+        a device of that type is attached.
+        """
+        if device_type.value in self.__states:
+            return
+        if device_type.value > 0xFF >> self.__TYPE_SHIFT:
+            raise ValueError(f'No type code left for {device_type.name}.')
+        states = tuple(device._table.states)
+        if len(states) > self.__STATE_MASK + 1:
+            raise ValueError(f'Too many states for {device_type.name}.')
+        self.__tables[device_type.value] = device._table
+        self.__states[device_type.value] = states
+        self.__state_codes[device_type.value] = {
+            state: code for code, state in enumerate(states)
+        }
+
+    def attach(
+        self,
+        device: ObservableDevice,
+        device_type: DispositivosEnum,
+    ) -> int:
+        """Moves the state of a device into the store.
+
+        Args:
+            device (ObservableDevice): The device to attach.
+            device_type (DispositivosEnum): The type of the device.
+
+        Returns:
+            int: The slot of the device.
+        """
+        self.__learn_states(device_type, device)
+        code = self.__code(device_type, device.state)
+        if self.__free:
+            slot = self.__free.pop()
+            self.__codes[slot] = code
+            self.__devices[slot] = device
+        else:
+            slot = len(self.__codes)
+            self.__codes.append(code)
+            self.__devices.append(device)
+        device._attach_store(self, slot)
+        return slot
+
+    def attach_many(
+        self,
+        entries: list[tuple[ObservableDevice, DispositivosEnum]],
+    ) -> None:
+        """Moves the states of many devices into the store,
+        appending their codes to the array in bulk.
+
+        Args:
+            entries (list[tuple[ObservableDevice, DispositivosEnum]]):
+            Each device, with its type.
+        """
+        reused = min(len(self.__free), len(entries))
+        for device, device_type in entries[:reused]:
+            self.attach(device, device_type)
+        entries = entries[reused:]
+        codes = array('B')
+        code_of: dict[tuple[DispositivosEnum, State], int] = {}
+        slot = len(self.__codes)
+        for device, device_type in entries:
+            key = (device_type, device.state)
+            code = code_of.get(key)
+            if code is None:
+                self.__learn_states(device_type, device)
+                code = code_of[key] = self.__code(*key)
+            codes.append(code)
+            device._attach_store(self, slot)
+            slot += 1
+        self.__codes.extend(codes)
+        self.__devices.extend([device for device, _ in entries])
+
+    def detach(self, device: ObservableDevice) -> None:
+        """Moves the state of a device back into the device object,
+        releasing its slot.
+
+        Args:
+            device (ObservableDevice): The device to detach.
+        """
+        slot = device._detach_store()
+        self.__codes[slot] = 0
+        self.__devices[slot] = None
+        self.__free.append(slot)
+        self.__released += 1
+
+    def get(self, slot: int) -> State:
+        """Reads the state of a slot.
+
+        Args:
+            slot (int): The slot of the device.
+
+        Returns:
+            State: The state of the device.
+        """
+        code = self.__codes[slot]
+        return self.__states[code >> self.__TYPE_SHIFT][
+            code & self.__STATE_MASK
+        ]
+
+    def code(self, device_type: DispositivosEnum, state: State) -> int:
+        """Returns the slot code of a device type and a state, as held
+        by `codes`.
+
+        Args:
+            device_type (DispositivosEnum): The type of the device.
+            state (State): The state of the device.
+
+        Raises:
+            KeyError: If no device of the type was attached yet, or if
+            the state is not a state of the type.
+
+        Returns:
+            int: The code.
+        """
+        return self.__code(device_type, state)
+
+    def codes(self) -> bytes:
+        """Returns the code of every slot, e.g. to read the states of
+        many devices with a single copy. A free slot holds 0.
+
+        Returns:
+            bytes: The codes, indexed by slot.
+        """
+        return self.__codes.tobytes()
+
+    def set(self, slot: int, state: State) -> None:
+        """Writes the state of a slot.
+
+        Args:
+            slot (int): The slot of the device.
+            state (State): The new state of the device.
+        """
+        code = self.__codes[slot]
+        self.__codes[slot] = (
+            code & ~self.__STATE_MASK
+            | self.__state_codes[code >> self.__TYPE_SHIFT][state]
+        )
+
+    def count(self, device_type: DispositivosEnum, state: State) -> int:
+        """Counts the devices of a type that are in a given state.
+
+        Args:
+            device_type (DispositivosEnum): The type of the devices.
+            state (State): The state to look for.
+
+        Returns:
+            int: The number of devices. 0 if the state is not a state
+            of the type.
+        """
+        code = self.__code_of(device_type, state)
+        if code is None:
+            return 0
+        return self.__codes.tobytes().count(bytes((code,)))
+
+    def __find(self, raw: bytes, codes: list[int]) -> list[int]:
+        """
+        Finds the slots holding any of the given codes.
+        """
+        slots = []
+        for code in codes:
+            needle = bytes((code,))
+            slot = raw.find(needle)
+            while slot != -1:
+                slots.append(slot)
+                slot = raw.find(needle, slot + 1)
+        if len(codes) > 1:
+            slots.sort()
+        return slots
+
+    def slots(self, device_type: DispositivosEnum, state: State) -> list[int]:
+        """Finds the slots of the devices of a type in a given state.
+
+        Args:
+            device_type (DispositivosEnum): The type of the devices.
+            state (State): The state to look for.
+
+        Returns:
+            list[int]: The slots, in ascending order. Empty if the state
+            is not a state of the type.
+        """
+        code = self.__code_of(device_type, state)
+        if code is None:
+            return []
+        return self.__find(self.__codes.tobytes(), [code])
+
+    def devices(
+        self,
+        device_type: DispositivosEnum,
+        state: State,
+    ) -> list[ObservableDevice]:
+        """Finds the devices of a type in a given state.
+
+        Args:
+            device_type (DispositivosEnum): The type of the devices.
+            state (State): The state to look for.
+
+        Returns:
+            list[ObservableDevice]: The devices, in slot order.
+        """
+        devices = self.__devices
+        return [devices[slot] for slot in self.slots(device_type, state)]
+
+    def bulk_trigger(
+        self,
+        device_type: DispositivosEnum,
+        trigger: str,
+    ) -> list[ObservableDevice]:
+        """Fires a trigger on every device of a type that can take it.
+
+        The new states are written with a single `bytes.translate`
+        pass over the store, and only then the transitions of the
+        devices that changed are logged and their callbacks executed.
+
+        Args:
+            device_type (DispositivosEnum): The type of the devices.
+            trigger (str): The name of the trigger.
+
+        Raises:
+            AttributeError: If the device type has no such trigger.
+
+        Returns:
+            list[ObservableDevice]: The devices that took the transition,
+            in slot order.
+        """
+        table = self.__tables.get(device_type.value)
+        if table is None:
+            return []
+        edges = table.edges(trigger)
+        translation = bytearray(range(256))
+        for source, dest in edges.items():
+            translation[self.__code(device_type, source)] = (
+                self.__code(device_type, dest)
+            )
+        raw = self.__codes.tobytes()
+        changed = self.__find(
+            raw,
+            [self.__code(device_type, source) for source in edges],
+        )
+        if not changed:
+            return []
+        self.__codes = array('B', raw.translate(translation))
+        devices = [self.__devices[slot] for slot in changed]
+        states = self.__states[device_type.value]
+        for slot, device in zip(changed, devices):
+            if device._log is not None:
+                source = states[raw[slot] & self.__STATE_MASK]
+                device._log.append(device, source, trigger)
+            device._after_transition()
+        return devices
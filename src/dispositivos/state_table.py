@@ -0,0 +1,108 @@
+from __future__ import annotations
+from dispositivos.dispositivo import State
+
+
+class StateTable:
+    """
+    A compiled state transition table, built once per device class
+    and shared by all of its instances.
+
+    The transitions are described with the same `trigger`, `source`
+    and `dest` keys used by the `transitions` library, and compiled
+    into a `trigger -> {source -> dest}` lookup table. A `source`
+    of `'*'` expands to every state.
+
+    Attributes:
+        __states (type[State]): The enumeration of the possible states.
+        __initial (State): The initial state of the devices.
+        __table (dict[str, dict[State, State]]): The compiled transitions.
+    """
+
+    @property
+    def states(self) -> type[State]:
+        """
+        The enumeration of the possible states.
+        """
+        return self.__states
+
+    @property
+    def initial(self) -> State:
+        """
+        The initial state of the devices.
+        """
+        return self.__initial
+
+    @property
+    def triggers(self) -> list[str]:
+        """
+        The names of the triggers, in declaration order.
+        """
+        return list(self.__table)
+
+    def __init__(
+        self,
+        states: type[State],
+        initial: State,
+        transitions: list[dict],
+    ) -> None:
+        """
+        Constructor method for the `StateTable` class.
+
+        Args:
+            states (type[State]): The enumeration of the possible states.
+            initial (State): The initial state of the devices.
+            transitions (list[dict]): The transitions, as dicts with the
+            `trigger`, `source` and `dest` keys.
+        """
+        self.__states = states
+        self.__initial = initial
+        self.__table: dict[str, dict[State, State]] = {}
+        for transition in transitions:
+            if transition['source'] == '*':
+                sources = list(states)
+            else:
+                sources = [transition['source']]
+            edges = self.__table.setdefault(transition['trigger'], {})
+            for source in sources:
+                edges[source] = transition['dest']
+
+    def edges(self, trigger: str) -> dict[State, State]:
+        """Returns the `source -> dest` edges of a trigger.
+
+        Args:
+            trigger (str): The name of the trigger.
+
+        Raises:
+            AttributeError: If the trigger does not exist.
+
+        Returns:
+            dict[State, State]: The states the trigger
+            can be fired from, and where each one leads to.
+        """
+        try:
+            return self.__table[trigger]
+        except KeyError:
+            raise AttributeError(f'Do not know event named \'{trigger}\'.')
+
+    def next_state(self, trigger: str, source: State) -> State:
+        """Resolves the destination of a trigger fired from a state.
+
+        Args:
+            trigger (str): The name of the trigger.
+            source (State): The current state.
+
+        Raises:
+            MachineError: If the trigger can't be fired from `source`.
+
+        Returns:
+            State: The destination state.
+        """
+        dest = self.edges(trigger).get(source)
+        if dest is None:
+            # Imported here: `transitions` is slow to import, and only
+            # needed for its exception.
+            from transitions import MachineError
+            raise MachineError(
+                f'Can\'t trigger event {trigger} from state {source.name}!'
+            )
+        return dest
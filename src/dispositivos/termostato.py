@@ -1,5 +1,5 @@
 from dispositivos.dispositivo import ObservableDevice, State
-from transitions import Machine
+from dispositivos.state_table import StateTable
 
 
 class TermostatoState(State):
@@ -24,43 +24,58 @@ class Termostato(ObservableDevice):
     functionality to control the temperature of a smart house.
 
     Attributes:
-        _machine (Machine): The state machine used to manage the transitions
-            between different thermostat states.
+        _table (StateTable): The state table, shared by all the thermostats,
+            used to manage the transitions between different
+            thermostat states.
 
     Methods:
+        aquecer, esfriar, desligar: The state machine triggers.
         get_state: Returns the current state of the thermostat.
         notify: Notifies all observers about
             the current state of the thermostat.
     """
 
-    def __init__(self) -> None:
-        super().__init__()
-        transitions = [
+    __slots__ = ()
+
+    _table = StateTable(
+        states=TermostatoState,
+        initial=TermostatoState.DESLIGADO,
+        transitions=[
             {
                 'trigger': 'aquecer',
                 'source': TermostatoState.DESLIGADO,
                 'dest': TermostatoState.AQUECENDO,
-                'after': self.notify,
             },
             {
                 'trigger': 'esfriar',
                 'source': TermostatoState.DESLIGADO,
                 'dest': TermostatoState.ESFRIANDO,
-                'after': self.notify,
             },
             {
                 'trigger': 'desligar',
                 'source': '*',
                 'dest': TermostatoState.DESLIGADO,
-                'after': self.notify,
             },
-        ]
-        self._machine = Machine(
-            model=self,
-            states=TermostatoState,
-            initial=TermostatoState.DESLIGADO,
-            transitions=transitions,
-        )
+        ],
+    )
+
+    def aquecer(self) -> bool:
+        """
+        Starts heating the house.
+        """
+        return self._trigger('aquecer')
+
+    def esfriar(self) -> bool:
+        """
+        Starts cooling the house.
+        """
+        return self._trigger('esfriar')
+
+    def desligar(self) -> bool:
+        """
+        Turns the thermostat off.
+        """
+        return self._trigger('desligar')
 
     def get_state(self) -> State:
         """
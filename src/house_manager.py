@@ -0,0 +1,383 @@
+from __future__ import annotations
+import multiprocessing
+import os
+import pickle
+import zlib
+from collections import Counter
+from multiprocessing.connection import Connection
+from typing import Any, Iterable
+from casa_inteligente import CasaInteligente
+from dispositivos.dispositivo_factory import DispositivoFactory
+
+# The methods of `CasaInteligente` that can be called through a
+# `HouseManager`. Their arguments and results cross process boundaries,
+# so they must be picklable, e.g. names, states and enum members, but
+# not devices or observers, which are bound to their house.
+# `add_device` runs as `add_devices`, which prints nothing to the
+# console of the worker, and raises a `ValueError` if the device
+# can't be paired.
+COMMANDS = frozenset({
+    'add_device',
+    'add_devices',
+    'remove_device_by_name',
+    'control_many',
+    'broadcast',
+    'turn_lights_on',
+    'turn_lights_off',
+    'get_device_names',
+    'get_device_states',
+    'get_device_type',
+    'get_device_state',
+    'has_device',
+    'count_devices',
+})
+
+
+def _status(houses: dict[str, CasaInteligente]) -> Counter[str]:
+    """
+    The totals of some houses of a shard.
+    """
+    status: Counter[str] = Counter(houses=len(houses))
+    for house in houses.values():
+        status['devices'] += house.total_devices
+        status['observers'] += house.total_observers
+        status['lights_on'] += len(house.get_lights_on())
+    return status
+
+
+def _run(
+    houses: dict[str, CasaInteligente],
+    house_id: str,
+    command: str,
+    args: tuple,
+    max_devices: int,
+    columnar: bool,
+) -> Any:
+    """
+    Runs a command of the protocol between a `HouseManager` and its
+    workers on the houses of a worker.
+    """
+    if command == 'create':
+        if house_id in houses:
+            raise ValueError(f'There is already a house {house_id}.')
+        houses[house_id] = CasaInteligente(
+            max_devices, columnar=columnar, singleton=False,
+        )
+        return None
+    if command == 'drop':
+        return houses.pop(house_id, None) is not None
+    if command == 'status':
+        if house_id is None:
+            return _status(houses)
+        house = houses.get(house_id)
+        return _status({} if house is None else {house_id: house})
+    house = houses.get(house_id)
+    if house is None:
+        raise KeyError(f'Unknown house {house_id}.')
+    if command == 'add_device':
+        device_type, name = args
+        rejected = house.add_devices([(device_type, name, None)])
+        if rejected:
+            raise ValueError(f"Can't pair {name}: {rejected[0][1]}")
+        return None
+    return getattr(house, command)(*args)
+
+
+def _worker(conn: Connection, max_devices: int, columnar: bool) -> None:
+    """
+    The loop of a worker process. It owns the houses of its shard,
+    and answers each batch of commands from the `HouseManager` with
+    the batch of their outcomes, until it gets None. The device
+    classes of the installed plugins are registered first, as a
+    spawned worker doesn't inherit the registrations of its parent.
+    """
+    DispositivoFactory.registrar_entry_points()
+    houses: dict[str, CasaInteligente] = {}
+    while True:
+        batch = conn.recv()
+        if batch is None:
+            break
+        outcomes = []
+        for house_id, command, args in batch:
+            try:
+                result = _run(
+                    houses, house_id, command, args, max_devices, columnar,
+                )
+            except Exception as err:
+                outcomes.append((False, err))
+            else:
+                outcomes.append((True, result))
+        try:
+            conn.send(outcomes)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            # An error or a result that can't be pickled is reported
+            # by its representation instead.
+            conn.send([
+                (ok, result) if ok and _picklable(result)
+                else (False, RuntimeError(repr(result)))
+                for ok, result in outcomes
+            ])
+    conn.close()
+
+
+def _picklable(value: Any) -> bool:
+    """
+    Whether a value can be sent to another process.
+    """
+    try:
+        pickle.dumps(value)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return False
+    return True
+
+
+class HouseManager:
+    """
+    Hosts many independent houses, sharded across a pool of worker
+    processes by house id, so the throughput scales with the cores.
+
+    Each worker owns the houses of its shard, and runs their commands
+    in order. The commands of a batch are grouped by shard and sent
+    with a single message per worker, and the workers run their groups
+    in parallel. Status queries are answered by every worker, and
+    aggregated.
+
+    A `HouseManager` is not thread-safe; use it from a single thread,
+    or share it behind a lock.
+
+    Attributes:
+        __workers (list[multiprocessing.Process]): The worker processes.
+        __conns (list[Connection]): The pipes to the workers, in the
+        order of their shards.
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        max_devices: int = 5,
+        columnar: bool = False,
+        start_method: str | None = None,
+    ) -> None:
+        """
+        Constructor method for the `HouseManager` class.
+
+        Args:
+            workers (int | None, optional): The number of worker
+            processes. Defaults to None, for one per core.
+            max_devices (int, optional): The default maximum amount of
+            devices of each house. Defaults to 5.
+            columnar (bool, optional): Whether the houses keep the states
+            of their devices in a `DeviceStateStore`. Defaults to False.
+            start_method (str | None, optional): The `multiprocessing`
+            start method, e.g. 'spawn'. Defaults to None, for the
+            default of the platform.
+        """
+        context = multiprocessing.get_context(start_method)
+        self.__workers: list[multiprocessing.Process] = []
+        self.__conns: list[Connection] = []
+        for shard in range(workers or os.cpu_count() or 1):
+            conn, child = context.Pipe()
+            worker = context.Process(
+                target=_worker,
+                args=(child, max_devices, columnar),
+                name=f'HouseManager-{shard}',
+                daemon=True,
+            )
+            worker.start()
+            child.close()
+            self.__workers.append(worker)
+            self.__conns.append(conn)
+
+    def __enter__(self) -> HouseManager:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def workers(self) -> int:
+        """
+        The number of worker processes.
+        """
+        return len(self.__conns)
+
+    def shard_of(self, house_id: str) -> int:
+        """Finds the worker that owns a house. The shard is derived from
+        a CRC of the id, which, unlike `hash`, is stable across processes
+        and runs.
+
+        Args:
+            house_id (str): The id of the house.
+
+        Returns:
+            int: The index of the worker.
+        """
+        return zlib.crc32(house_id.encode('utf-8')) % len(self.__conns)
+
+    def __round_trip(
+        self,
+        calls: list[tuple[str | None, str, tuple]],
+        shards: list[int],
+    ) -> list[tuple[bool, Any]]:
+        """
+        Sends each call to the worker of its shard, one message per
+        worker, and collects the outcomes in the order of the calls.
+        """
+        batches: dict[int, list[tuple[str | None, str, tuple]]] = {}
+        positions: dict[int, list[int]] = {}
+        for position, (call, shard) in enumerate(zip(calls, shards)):
+            batches.setdefault(shard, []).append(call)
+            positions.setdefault(shard, []).append(position)
+        # Every batch is sent before any answer is read, so the workers
+        # run their batches at the same time.
+        for shard, batch in batches.items():
+            self.__conns[shard].send(batch)
+        outcomes: list[tuple[bool, Any]] = [(True, None)] * len(calls)
+        for shard in batches:
+            for position, outcome in zip(
+                positions[shard], self.__conns[shard].recv(),
+            ):
+                outcomes[position] = outcome
+        return outcomes
+
+    def create_houses(self, house_ids: Iterable[str]) -> None:
+        """Creates empty houses.
+
+        Args:
+            house_ids (Iterable[str]): The ids of the new houses.
+
+        Raises:
+            ValueError: If one of the ids is already taken.
+        """
+        self.__call_batch(
+            [(house_id, 'create', ()) for house_id in house_ids], False,
+        )
+
+    def create_house(self, house_id: str) -> None:
+        """Creates an empty house.
+
+        Args:
+            house_id (str): The id of the new house.
+
+        Raises:
+            ValueError: If the id is already taken.
+        """
+        self.create_houses([house_id])
+
+    def remove_house(self, house_id: str) -> bool:
+        """Removes a house, with its devices.
+
+        Args:
+            house_id (str): The id of the house.
+
+        Returns:
+            bool: False if there was no house with that id.
+        """
+        return self.__call_batch([(house_id, 'drop', ())], False)[0]
+
+    def call(self, house_id: str, command: str, *args) -> Any:
+        """Calls a method of a house in its worker, e.g.
+        `call('casa-7', 'control_many', [('luz1', 'ligar')])`.
+
+        Args:
+            house_id (str): The id of the house.
+            command (str): The name of the method, one of `COMMANDS`.
+            *args: The arguments of the method.
+
+        Raises:
+            KeyError: If there is no house with that id.
+            ValueError: If the method is not one of `COMMANDS`.
+
+        Returns:
+            Any: The result of the method.
+        """
+        return self.call_many([(house_id, command, *args)])[0]
+
+    def call_many(
+        self,
+        calls: Iterable[tuple],
+        return_exceptions: bool = False,
+    ) -> list[Any]:
+        """Calls methods of many houses, with a single message to each
+        worker. The calls of a house run in order.
+
+        Args:
+            calls (Iterable[tuple]): The house id, the method name and
+            the arguments of each call, e.g. `('casa-7', 'has_device',
+            'luz1')`.
+            return_exceptions (bool, optional): If True, the errors are
+            returned in place of the results of the failed calls.
+            Otherwise, the first error is raised, after all the calls
+            have run. Defaults to False.
+
+        Raises:
+            KeyError: If there is no house with one of the ids.
+            ValueError: If a method is not one of `COMMANDS`.
+
+        Returns:
+            list[Any]: The results of the calls, in order.
+        """
+        batch = []
+        for house_id, command, *args in calls:
+            if command not in COMMANDS:
+                raise ValueError(f'Unknown house command {command}.')
+            batch.append((house_id, command, tuple(args)))
+        return self.__call_batch(batch, return_exceptions)
+
+    def __call_batch(
+        self,
+        batch: list[tuple[str, str, tuple]],
+        return_exceptions: bool,
+    ) -> list[Any]:
+        """
+        Runs a batch of calls, and unwraps their outcomes.
+        """
+        outcomes = self.__round_trip(
+            batch, [self.shard_of(house_id) for house_id, _, _ in batch],
+        )
+        results = []
+        for ok, result in outcomes:
+            if not ok and not return_exceptions:
+                raise result
+            results.append(result)
+        return results
+
+    def status(self, house_id: str | None = None) -> dict[str, int]:
+        """Aggregates the totals of all the houses, or of one.
+
+        Args:
+            house_id (str | None, optional): The id of a house.
+            Defaults to None, for all the houses.
+
+        Returns:
+            dict[str, int]: The number of `houses`, `devices`,
+            `observers` and `lights_on`.
+        """
+        if house_id is None:
+            shards = list(range(len(self.__conns)))
+        else:
+            shards = [self.shard_of(house_id)]
+        outcomes = self.__round_trip(
+            [(house_id, 'status', ())] * len(shards), shards,
+        )
+        status = Counter(houses=0, devices=0, observers=0, lights_on=0)
+        for ok, result in outcomes:
+            if not ok:
+                raise result
+            status.update(result)
+        return dict(status)
+
+    def close(self) -> None:
+        """
+        Stops the workers. Their houses are discarded.
+        """
+        for conn in self.__conns:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for worker, conn in zip(self.__workers, self.__conns):
+            worker.join()
+            conn.close()
+        self.__workers = []
+        self.__conns = []
@@ -0,0 +1,531 @@
+from __future__ import annotations
+import asyncio
+import json
+import threading
+from collections import deque
+from http import HTTPStatus
+from typing import TYPE_CHECKING
+from urllib.parse import parse_qs, unquote, urlsplit
+from dispositivos.dispositivo_factory import DispositivosEnum
+from manifest import OBSERVER_TYPES
+from observers.observer import Observer
+if TYPE_CHECKING:
+    from casa_inteligente import CasaInteligente
+
+
+class HttpError(Exception):
+    """
+    An error answered to the client with an HTTP status.
+    """
+
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class _StreamObserver(Observer):
+    """
+    An observer that queues the notifications of the house for a
+    client of the `/events` stream. When the client falls behind,
+    the oldest notifications are dropped.
+
+    The house may notify it from other threads, e.g. those of a
+    `ThreadPoolDispatcher`, so the stream is woken up through the
+    event loop it was created in.
+    """
+
+    __slots__ = ('events', 'ready', 'dropped', '_loop', '_thread')
+
+    def __init__(self, size: int) -> None:
+        super().__init__()
+        self.events: deque[dict] = deque(maxlen=size)
+        self.ready = asyncio.Event()
+        self.dropped = 0
+        self._loop = asyncio.get_running_loop()
+        self._thread = threading.get_ident()
+
+    def notify(self, *args, **kwargs) -> None:
+        if len(self.events) == self.events.maxlen:
+            self.dropped += 1
+        self.events.append({
+            'device': kwargs.get('device'),
+            'state': kwargs['state'].name,
+        })
+        if threading.get_ident() == self._thread:
+            self.ready.set()
+            return
+        try:
+            self._loop.call_soon_threadsafe(self.ready.set)
+        except RuntimeError:
+            # The loop is closed, and the stream with it.
+            pass
+
+    def notify_batch(self, events: list[dict]) -> None:
+        for event in events:
+            self.notify(**event)
+
+
+class HouseServer:
+    """
+    A local HTTP/1.1 server with a JSON API to control a
+    `CasaInteligente`, built on `asyncio` streams.
+
+    The connections are kept alive, and pipelined requests are
+    answered in order. All the requests run in the thread of the
+    event loop, so the house is never used concurrently. A request
+    that fails unexpectedly is answered with a 500 status, and its
+    error is kept in `errors`; the connection stays open.
+
+    Endpoints:
+        GET /status: The number of devices, observers and lights on.
+        GET /devices[?type=LUZ]: The name, type and state of the devices.
+        GET /devices/<name>: The name, type and state of a device.
+        GET /changes?since=<cursor>: The devices changed after a cursor,
+        and the cursor for the next poll, see `report_changes`.
+        POST /devices/<name>/<trigger>: Fires a trigger on a device.
+        POST /commands: Fires many triggers at once. The body is a list
+        of `{"device": ..., "trigger": ...}` objects.
+        POST /subscriptions: Subscribes an observer. The body has the
+        `observer` kind, the `address`, and a `device` or a `pattern`.
+        GET /events[?pattern=type.LUZ.*]: A stream of Server-Sent Events
+        with the state changes. Defaults to all of them.
+
+    Attributes:
+        __house (CasaInteligente): The house.
+        __host (str): The address to listen on.
+        __port (int): The port to listen on, or 0 for any free port.
+        __event_queue (int): How many events are queued for a slow
+        `/events` client before the oldest are dropped.
+        __server (asyncio.Server | None): The server, once started.
+        __connections (set[asyncio.Task]): The tasks serving the open
+        connections, cancelled by `close`.
+        errors (deque[Exception]): The last unexpected errors of the
+        requests.
+    """
+
+    __MAX_BODY = 1 << 20
+    __MAX_ERRORS = 100
+
+    def __init__(
+        self,
+        house: CasaInteligente,
+        host: str = '127.0.0.1',
+        port: int = 8080,
+        event_queue: int = 1024,
+    ) -> None:
+        """
+        Constructor method for the `HouseServer` class.
+
+        Args:
+            house (CasaInteligente): The house.
+            host (str, optional): The address to listen on.
+            Defaults to '127.0.0.1'.
+            port (int, optional): The port to listen on, or 0 for any
+            free port. Defaults to 8080.
+            event_queue (int, optional): How many events are queued for
+            a slow `/events` client. Defaults to 1024.
+        """
+        self.__house = house
+        self.__host = host
+        self.__port = port
+        self.__event_queue = event_queue
+        self.__server: asyncio.Server | None = None
+        self.__connections: set[asyncio.Task] = set()
+        self.__observers: dict[tuple[str, str], Observer] = {}
+        self.errors: deque[Exception] = deque(maxlen=self.__MAX_ERRORS)
+
+    @property
+    def port(self) -> int:
+        """
+        The port the server listens on, once started.
+        """
+        if self.__server is None:
+            return self.__port
+        return self.__server.sockets[0].getsockname()[1]
+
+    async def start(self) -> None:
+        """
+        Starts listening.
+        """
+        self.__server = await asyncio.start_server(
+            self.__serve, self.__host, self.__port,
+        )
+
+    async def close(self) -> None:
+        """
+        Stops listening, and closes the connections.
+        """
+        if self.__server is not None:
+            self.__server.close()
+            self.__server = None
+        # Since Python 3.12, `wait_closed` waits for the connections,
+        # so they are cancelled first, e.g. the `/events` streams.
+        for task in self.__connections:
+            task.cancel()
+        await asyncio.gather(*self.__connections, return_exceptions=True)
+
+    async def serve_forever(self) -> None:
+        """
+        Starts listening, and serves until cancelled.
+        """
+        await self.start()
+        try:
+            await self.__server.serve_forever()
+        finally:
+            await self.close()
+
+    def run(self) -> None:
+        """
+        Serves until interrupted, e.g. with Ctrl+C.
+        """
+        try:
+            asyncio.run(self.serve_forever())
+        except KeyboardInterrupt:
+            pass
+
+    async def __serve(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """
+        Answers the requests of a connection, in order,
+        until the client or a response closes it.
+        """
+        task = asyncio.current_task()
+        self.__connections.add(task)
+        try:
+            while True:
+                try:
+                    request = await self.__read_request(reader)
+                except HttpError as err:
+                    writer.write(self.__response(
+                        err.status, {'error': str(err)}, keep_alive=False,
+                    ))
+                    break
+                if request is None:
+                    break
+                method, target, keep_alive, body = request
+                path, query = self.__split(target)
+                if method == 'GET' and path == ['events']:
+                    await self.__stream(reader, writer, query)
+                    break
+                try:
+                    status, payload = self.__route(method, path, query, body)
+                except HttpError as err:
+                    status, payload = err.status, {'error': str(err)}
+                except Exception as err:
+                    self.errors.append(err)
+                    status = HTTPStatus.INTERNAL_SERVER_ERROR
+                    payload = {'error': 'Internal server error.'}
+                writer.write(self.__response(status, payload, keep_alive))
+                if not keep_alive:
+                    break
+                # `drain` only waits when the client stops reading, so
+                # pipelined requests are answered without a round trip.
+                await writer.drain()
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # Cancelled by `close`. The connection ends here anyway, and
+            # before Python 3.12 `asyncio` reports cancelled handlers as
+            # unhandled errors.
+            pass
+        finally:
+            self.__connections.discard(task)
+            writer.close()
+
+    async def __read_request(
+        self,
+        reader: asyncio.StreamReader,
+    ) -> tuple[str, str, bool, bytes] | None:
+        """
+        Reads a request: its method, target, whether the connection
+        is kept alive, and its body. Returns None at the end of the
+        connection.
+        """
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError as err:
+            if err.partial.strip():
+                raise HttpError(HTTPStatus.BAD_REQUEST, 'Incomplete request.')
+            return None
+        except asyncio.LimitOverrunError:
+            raise HttpError(
+                HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE,
+                'The headers are too large.',
+            )
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = lines[0].split(' ')
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, 'Invalid request line.')
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+        connection = headers.get('connection', '').lower()
+        if version == 'HTTP/1.1':
+            keep_alive = connection != 'close'
+        else:
+            keep_alive = connection == 'keep-alive'
+        if 'transfer-encoding' in headers:
+            raise HttpError(
+                HTTPStatus.NOT_IMPLEMENTED,
+                'Chunked request bodies are not supported.',
+            )
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, 'Invalid Content-Length.')
+        if length > self.__MAX_BODY:
+            raise HttpError(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE, 'The body is too large.',
+            )
+        body = await reader.readexactly(length) if length else b''
+        return method, target, keep_alive, body
+
+    @staticmethod
+    def __split(target: str) -> tuple[list[str], dict[str, str]]:
+        """
+        Splits a request target into its path segments and its query.
+        """
+        url = urlsplit(target)
+        path = [unquote(part) for part in url.path.split('/') if part]
+        query = {key: values[-1]
+                 for key, values in parse_qs(url.query).items()}
+        return path, query
+
+    @staticmethod
+    def __response(
+        status: HTTPStatus,
+        payload: object,
+        keep_alive: bool,
+    ) -> bytes:
+        """
+        Encodes a JSON response.
+        """
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = (
+            f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+            'Content-Type: application/json; charset=utf-8\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}\r\n'
+            '\r\n'
+        )
+        return head.encode('latin-1') + body
+
+    @staticmethod
+    def __json(body: bytes) -> object:
+        """
+        Decodes a JSON request body.
+        """
+        try:
+            return json.loads(body)
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, 'Invalid JSON body.')
+
+    def __device(self, name: str) -> dict:
+        """
+        The JSON representation of a device.
+        """
+        device_type = self.__house.get_device_type(name)
+        if device_type is None:
+            raise HttpError(HTTPStatus.NOT_FOUND, f'Unknown device {name}.')
+        return {
+            'name': name,
+            'type': device_type.name,
+            'state': self.__house.get_device_state(name).name,
+        }
+
+    def __route(
+        self,
+        method: str,
+        path: list[str],
+        query: dict[str, str],
+        body: bytes,
+    ) -> tuple[HTTPStatus, object]:
+        """
+        Answers a request, with its status and its JSON payload.
+        """
+        house = self.__house
+        if path == ['status'] and method == 'GET':
+            return HTTPStatus.OK, {
+                'devices': house.total_devices,
+                'observers': house.total_observers,
+                'lights_on': len(house.get_lights_on()),
+            }
+        if path[:1] == ['devices'] and len(path) == 1 and method == 'GET':
+            return HTTPStatus.OK, self.__devices(query.get('type'))
+        if path[:1] == ['devices'] and len(path) == 2 and method == 'GET':
+            return HTTPStatus.OK, self.__device(path[1])
+        if path[:1] == ['devices'] and len(path) == 3 and method == 'POST':
+            name, trigger = path[1], path[2]
+            if not house.has_device(name):
+                raise HttpError(
+                    HTTPStatus.NOT_FOUND, f'Unknown device {name}.',
+                )
+            if not house.control_many([(name, trigger)])[0]:
+                raise HttpError(
+                    HTTPStatus.CONFLICT, f"Can't {trigger} {name} now.",
+                )
+            return HTTPStatus.OK, self.__device(name)
+        if path == ['changes'] and method == 'GET':
+            try:
+                since = int(query.get('since', 0))
+            except ValueError:
+                raise HttpError(HTTPStatus.BAD_REQUEST, 'Invalid cursor.')
+            cursor, changes = house.report_changes(since)
+            return HTTPStatus.OK, {
+                'cursor': cursor,
+                'changes': [
+                    {'name': name, 'state': state.name}
+                    for name, state in changes
+                ],
+            }
+        if path == ['commands'] and method == 'POST':
+            return HTTPStatus.OK, self.__commands(self.__json(body))
+        if path == ['subscriptions'] and method == 'POST':
+            return HTTPStatus.CREATED, self.__subscribe(self.__json(body))
+        raise HttpError(HTTPStatus.NOT_FOUND, 'No such endpoint.')
+
+    def __devices(self, type_name: str | None) -> list[dict]:
+        """
+        The JSON representation of the devices, optionally of a type.
+        """
+        if type_name is None:
+            device_types = list(DispositivosEnum)
+        else:
+            try:
+                device_types = [DispositivosEnum[type_name.upper()]]
+            except KeyError:
+                raise HttpError(
+                    HTTPStatus.BAD_REQUEST,
+                    f'Unknown device type {type_name}.',
+                )
+        return [
+            {'name': name, 'type': device_type.name, 'state': state.name}
+            for device_type in device_types
+            for name, state in self.__house.get_device_states(device_type)
+        ]
+
+    def __commands(self, commands: object) -> dict:
+        """
+        Fires a list of `{"device": ..., "trigger": ...}` commands.
+        """
+        if not isinstance(commands, list) or not all(
+            isinstance(command, dict)
+            and isinstance(command.get('device'), str)
+            and isinstance(command.get('trigger'), str)
+            for command in commands
+        ):
+            raise HttpError(
+                HTTPStatus.BAD_REQUEST,
+                'Expected a list of {"device": ..., "trigger": ...} objects.',
+            )
+        results = self.__house.control_many(
+            [(command['device'], command['trigger']) for command in commands]
+        )
+        return {'applied': results}
+
+    def __subscribe(self, request: object) -> dict:
+        """
+        Subscribes an observer to a device or to a topic pattern.
+        """
+        if not isinstance(request, dict):
+            raise HttpError(HTTPStatus.BAD_REQUEST, 'Expected an object.')
+        kind = str(request.get('observer')).lower()
+        address = request.get('address')
+        cls = OBSERVER_TYPES.get(kind)
+        if cls is None or not isinstance(address, str) or not address:
+            raise HttpError(
+                HTTPStatus.BAD_REQUEST,
+                'Expected an observer kind (celular or email) '
+                'and an address.',
+            )
+        observer = self.__observers.get((kind, address))
+        if observer is None:
+            observer = self.__observers[(kind, address)] = cls(address)
+        device = request.get('device')
+        pattern = request.get('pattern')
+        if isinstance(device, str):
+            if not self.__house.has_device(device):
+                raise HttpError(
+                    HTTPStatus.NOT_FOUND, f'Unknown device {device}.',
+                )
+            self.__house.add_observer(observer, device)
+            return {'observer': kind, 'address': address, 'device': device}
+        if isinstance(pattern, str):
+            try:
+                subscription_id = self.__house.subscribe(observer, pattern)
+            except ValueError as err:
+                raise HttpError(HTTPStatus.BAD_REQUEST, str(err))
+            return {
+                'observer': kind,
+                'address': address,
+                'pattern': pattern,
+                'id': subscription_id,
+            }
+        raise HttpError(
+            HTTPStatus.BAD_REQUEST, 'Expected a device or a pattern.',
+        )
+
+    async def __stream(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        query: dict[str, str],
+    ) -> None:
+        """
+        Streams the state changes matching a topic pattern to a client,
+        as Server-Sent Events, until it disconnects.
+        """
+        observer = _StreamObserver(self.__event_queue)
+        try:
+            subscription_id = self.__house.subscribe(
+                observer, query.get('pattern', '#'),
+            )
+        except ValueError as err:
+            writer.write(self.__response(
+                HTTPStatus.BAD_REQUEST, {'error': str(err)}, keep_alive=False,
+            ))
+            return
+        writer.write(
+            b'HTTP/1.1 200 OK\r\n'
+            b'Content-Type: text/event-stream\r\n'
+            b'Cache-Control: no-cache\r\n'
+            b'Connection: close\r\n'
+            b'\r\n'
+        )
+        # The client sends nothing else, so a read only returns
+        # when it disconnects.
+        disconnected = asyncio.ensure_future(reader.read())
+        ready = disconnected
+        try:
+            await writer.drain()
+            while True:
+                ready = asyncio.ensure_future(observer.ready.wait())
+                await asyncio.wait(
+                    (ready, disconnected),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if disconnected.done():
+                    break
+                observer.ready.clear()
+                # Popped one by one: the house may be appending more
+                # from another thread meanwhile.
+                events = [
+                    observer.events.popleft()
+                    for _ in range(len(observer.events))
+                ]
+                writer.write(b''.join(
+                    b'data: %s\n\n' % json.dumps(event).encode('utf-8')
+                    for event in events
+                ))
+                await writer.drain()
+        finally:
+            ready.cancel()
+            disconnected.cancel()
+            self.__house.unsubscribe(subscription_id)
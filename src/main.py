@@ -1,8 +1,16 @@
 from __future__ import annotations
 from getopt import getopt
-from sys import argv
+from sys import argv, exit, stdin
+import os
 from casa_inteligente import CasaInteligente
-from dispositivos.dispositivo_factory import DispositivosEnum
+from dispositivos.event_log import EventLog, EventLogReader
+from manifest import provision
+from script import ScriptRunner
+from snapshot import PeriodicSnapshot, Snapshot
+from dispositivos.dispositivo_factory import (
+    DispositivoFactory,
+    DispositivosEnum,
+)
 from observers.celular import Celular
 from observers.email import EMail
 
@@ -45,17 +53,50 @@ class Main:
             cls.__instance = super(Main, cls).__new__(cls)
         return cls.__instance
 
-    def __init__(self, max_devices: int = 5) -> None:
+    def __init__(
+        self,
+        max_devices: int = 5,
+        event_log: str | None = None,
+        snapshot: str | None = None,
+        manifest: str | None = None,
+    ) -> None:
         """
         Constructor method for the Main class.
 
         Args:
             max_devices (int, optional): The maximum amount of devices
             the `SmartHouse` should support. Defaults to 5.
+            event_log (str | None, optional): The path of an `EventLog`
+            recording the transitions of the devices. If it exists, the
+            house is restored from it first. Defaults to None.
+            snapshot (str | None, optional): The path of the snapshots
+            of the house, saved every minute and on exit. If it exists,
+            the house is loaded from it first. Defaults to None.
+            manifest (str | None, optional): The path of a JSON Lines or
+            CSV manifest of devices and observers to provision the house
+            with. Defaults to None.
         """
+        # The device classes of the installed plugins are registered
+        # before any device is paired, e.g. from the snapshot.
+        DispositivoFactory.registrar_entry_points()
         self.__house = CasaInteligente(max_devices)
         self.__phone = None
         self.__mail = None
+        self.__event_log = None
+        self.__snapshots = None
+        if snapshot is not None:
+            if os.path.exists(snapshot):
+                self.__house.load_snapshot(Snapshot.load(snapshot))
+            self.__snapshots = PeriodicSnapshot(self.__house, snapshot)
+            self.__snapshots.start()
+        if event_log is not None:
+            if os.path.exists(event_log):
+                with EventLogReader(event_log) as reader:
+                    self.__house.restore(reader)
+            self.__event_log = EventLog(event_log)
+            self.__house.set_event_log(self.__event_log)
+        if manifest is not None:
+            print(provision(self.__house, manifest).summary())
 
     def __menu_display(self, options_dict: dict[int, str]) -> None:
         """
@@ -192,6 +233,54 @@ class Main:
             device_name=dev_name,
         )
 
+    def run_script(self, path: str) -> int:
+        """
+        Runs a script of commands, without menus or prompts,
+        and then closes the application.
+
+        Args:
+            path (str): The path of the script, or `-` to read it
+            from the standard input.
+
+        Returns:
+            int: The number of commands that failed.
+        """
+        try:
+            if path == '-':
+                return ScriptRunner(self.__house).run(stdin)
+            with open(path, encoding='utf-8') as script:
+                return ScriptRunner(self.__house).run(script)
+        finally:
+            self.close()
+
+    def serve(self, address: str) -> None:
+        """
+        Serves the JSON API of the house over HTTP until interrupted,
+        and then closes the application.
+
+        Args:
+            address (str): The `[host:]port` to listen on. The host
+            defaults to 127.0.0.1.
+        """
+        # Imported here, so the CLI doesn't pay for `asyncio` at startup.
+        from http_server import HouseServer
+        host, _, port = address.rpartition(':')
+        server = HouseServer(self.__house, host or '127.0.0.1', int(port))
+        print(f'Servindo em http://{host or "127.0.0.1"}:{port}')
+        try:
+            server.run()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """
+        Saves the last snapshot, and closes the event log.
+        """
+        if self.__snapshots is not None:
+            self.__snapshots.close()
+        if self.__event_log is not None:
+            self.__event_log.close()
+
     def start(self) -> None:
         """
         Runs the CLI Application.
@@ -203,6 +292,7 @@ class Main:
             option = self._get_option(self.__menu_options)
             if option == 0:
                 stopcond = True
+                self.close()
             elif option == 1:
                 device = self.__choose_device()
                 name = input('Dê um nome ao dispositivo: ')
@@ -233,14 +323,47 @@ class Main:
 
 if __name__ == '__main__':
     max_devices = 5
+    event_log = None
+    snapshot = None
+    manifest = None
+    script = None
+    serve = None
     args_list = argv[1:]
     try:
-        # Adds the `-m` or `--max-devices` as cli args for the program
-        options, args = getopt(args_list, 'm:', ['max-devices='])
+        # Adds the `-m` or `--max-devices`, `-l` or `--event-log`,
+        # `-s` or `--snapshot`, `--manifest`, `--script` and `--serve`
+        # as cli args for the program
+        options, args = getopt(
+            args_list,
+            'm:l:s:',
+            [
+                'max-devices=',
+                'event-log=',
+                'snapshot=',
+                'manifest=',
+                'script=',
+                'serve=',
+            ],
+        )
     except Exception as err:
         print('Invalid Program Execution', err)
     for name, value in options:
         if name in ['-m', '--max-devices']:
             max_devices = int(value)
-    m = Main(max_devices)
+        if name in ['-l', '--event-log']:
+            event_log = value
+        if name in ['-s', '--snapshot']:
+            snapshot = value
+        if name == '--manifest':
+            manifest = value
+        if name == '--script':
+            script = value
+        if name == '--serve':
+            serve = value
+    m = Main(max_devices, event_log, snapshot, manifest)
+    if script is not None:
+        exit(1 if m.run_script(script) else 0)
+    if serve is not None:
+        m.serve(serve)
+        exit(0)
     m.start()
@@ -0,0 +1,266 @@
+from __future__ import annotations
+import csv
+import json
+from collections import Counter
+from typing import TYPE_CHECKING, Iterator
+from dispositivos.dispositivo import State
+from dispositivos.dispositivo_factory import (
+    DispositivoFactory,
+    DispositivosEnum,
+)
+from observers.celular import Celular
+from observers.email import EMail
+from observers.observer import Observer
+if TYPE_CHECKING:
+    from casa_inteligente import CasaInteligente
+
+OBSERVER_TYPES: dict[str, type[Observer]] = {
+    'celular': Celular,
+    'email': EMail,
+}
+
+
+class ManifestReport:
+    """
+    The outcome of provisioning a house from a manifest.
+
+    The errors are aggregated by reason, and only the first few are
+    kept with their line numbers, so a manifest with millions of bad
+    lines doesn't fill the memory with error messages.
+
+    Attributes:
+        devices (int): The number of devices paired.
+        subscriptions (int): The number of observer subscriptions made.
+        errors (Counter[str]): The number of errors of each reason.
+        samples (list[tuple[int, str]]): The line and the message of
+        the first errors.
+    """
+
+    MAX_SAMPLES = 10
+
+    def __init__(self) -> None:
+        self.devices = 0
+        self.subscriptions = 0
+        self.errors: Counter[str] = Counter()
+        self.samples: list[tuple[int, str]] = []
+
+    @property
+    def total_errors(self) -> int:
+        """
+        The number of lines that could not be provisioned.
+        """
+        return sum(self.errors.values())
+
+    def error(self, line: int, reason: str, detail: str = '') -> None:
+        """Records an error.
+
+        Args:
+            line (int): The line of the manifest.
+            reason (str): The reason, used to aggregate the errors.
+            detail (str, optional): What the line was about, e.g. the
+            device name. Defaults to ''.
+        """
+        self.errors[reason] += 1
+        if len(self.samples) < self.MAX_SAMPLES:
+            message = f'{detail}: {reason}' if detail else reason
+            self.samples.append((line, message))
+
+    def summary(self) -> str:
+        """Describes the outcome, with the errors by reason.
+
+        Returns:
+            str: The summary, one item per line.
+        """
+        lines = [
+            f'{self.devices} devices paired, '
+            f'{self.subscriptions} subscriptions, '
+            f'{self.total_errors} errors.'
+        ]
+        for reason, count in self.errors.most_common():
+            lines.append(f'  {count}x {reason}')
+        for line, message in self.samples:
+            lines.append(f'  line {line}: {message}')
+        return '\n'.join(lines)
+
+
+def read_manifest(path: str) -> Iterator[tuple[int, dict | None]]:
+    """Streams the records of a manifest, one line at a time.
+
+    A `.csv` manifest has a header row; any other file is read as JSON
+    Lines, with one object per line. Both use the same fields:
+
+    - a device has a `type`, a `device` name and, optionally, a `state`;
+    - an observer subscription has an `observer` kind (`celular` or
+      `email`), an `address`, and a `device` name or a topic `pattern`.
+
+    Blank lines are skipped, and empty CSV cells are left out.
+
+    Args:
+        path (str): The path of the manifest.
+
+    Yields:
+        tuple[int, dict | None]: The line number and the record,
+        or None if the line is not valid JSON.
+    """
+    with open(path, newline='', encoding='utf-8') as file:
+        if path.lower().endswith('.csv'):
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, {
+                    key: value for key, value in row.items()
+                    if key is not None and value
+                }
+            return
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield number, None
+                continue
+            yield number, record if isinstance(record, dict) else None
+
+
+class _Provisioner:
+    """
+    Applies the records of a manifest to a house, pairing the devices
+    in chunks through `CasaInteligente.add_devices`.
+    """
+
+    def __init__(
+        self,
+        house: CasaInteligente,
+        report: ManifestReport,
+        chunk_size: int,
+    ) -> None:
+        self.house = house
+        self.report = report
+        self.chunk_size = chunk_size
+        self.pending: list[tuple[DispositivosEnum, str, State | None]] = []
+        self.lines: dict[str, int] = {}
+        self.observers: dict[tuple[str, str], Observer] = {}
+        self.states: dict[DispositivosEnum, dict[str, State]] = {}
+
+    def states_of(self, device_type: DispositivosEnum) -> dict[str, State]:
+        """
+        The states of a device type, by name.
+        """
+        states = self.states.get(device_type)
+        if states is None:
+            cls = DispositivoFactory.classe_dispositivo(device_type)
+            states = self.states[device_type] = {
+                state.name: state for state in cls._table.states
+            }
+        return states
+
+    def device(self, line: int, record: dict) -> None:
+        """
+        Validates a device, and adds it to the pending chunk.
+        """
+        name = record.get('device')
+        if not isinstance(name, str) or not name:
+            self.report.error(line, 'A device needs a name.')
+            return
+        try:
+            device_type = DispositivosEnum[str(record.get('type')).upper()]
+        except KeyError:
+            self.report.error(line, 'Unknown device type.', name)
+            return
+        state = record.get('state')
+        if state is not None:
+            state = self.states_of(device_type).get(str(state).upper())
+            if state is None:
+                self.report.error(line, 'Unknown state for the type.', name)
+                return
+        self.pending.append((device_type, name, state))
+        self.lines[name] = line
+        if len(self.pending) >= self.chunk_size:
+            self.flush()
+
+    def observer(self, line: int, record: dict) -> None:
+        """
+        Validates an observer, and subscribes it.
+        """
+        kind = str(record.get('observer')).lower()
+        address = record.get('address')
+        cls = OBSERVER_TYPES.get(kind)
+        if cls is None:
+            self.report.error(line, 'Unknown observer kind.', kind)
+            return
+        if not isinstance(address, str) or not address:
+            self.report.error(line, 'An observer needs an address.', kind)
+            return
+        # The devices listed so far must be paired before subscribing.
+        self.flush()
+        observer = self.observers.get((kind, address))
+        if observer is None:
+            observer = self.observers[(kind, address)] = cls(address)
+        device = record.get('device')
+        pattern = record.get('pattern')
+        if device is not None:
+            device = str(device)
+            if not self.house.has_device(device):
+                self.report.error(line, 'Unknown device.', device)
+                return
+            self.house.add_observer(observer, device)
+        elif pattern is not None:
+            try:
+                self.house.subscribe(observer, str(pattern))
+            except ValueError as err:
+                self.report.error(line, str(err), str(pattern))
+                return
+        else:
+            self.report.error(
+                line, 'An observer needs a device or a pattern.', address,
+            )
+            return
+        self.report.subscriptions += 1
+
+    def flush(self) -> None:
+        """
+        Pairs the pending chunk of devices.
+        """
+        if not self.pending:
+            return
+        rejected = self.house.add_devices(self.pending)
+        self.report.devices += len(self.pending) - len(rejected)
+        for name, reason in rejected:
+            self.report.error(self.lines.get(name, 0), reason, name)
+        self.pending = []
+        self.lines = {}
+
+
+def provision(
+    house: CasaInteligente,
+    path: str,
+    chunk_size: int = 10_000,
+) -> ManifestReport:
+    """Pairs the devices and subscribes the observers of a manifest,
+    reading it as a stream: only a chunk of devices is held at a time,
+    and each chunk is paired with a single `add_devices` call. Invalid
+    lines are skipped, and reported in aggregate.
+
+    Args:
+        house (CasaInteligente): The house.
+        path (str): The path of the manifest, see `read_manifest`.
+        chunk_size (int, optional): How many devices are paired at
+        once. Defaults to 10000.
+
+    Raises:
+        OSError: If the manifest can't be read.
+
+    Returns:
+        ManifestReport: The outcome.
+    """
+    report = ManifestReport()
+    provisioner = _Provisioner(house, report, chunk_size)
+    for line, record in read_manifest(path):
+        if record is None:
+            report.error(line, 'Invalid JSON object.')
+        elif 'observer' in record:
+            provisioner.observer(line, record)
+        else:
+            provisioner.device(line, record)
+    provisioner.flush()
+    return report
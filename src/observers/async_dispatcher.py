@@ -0,0 +1,286 @@
+from __future__ import annotations
+import asyncio
+import threading
+from collections import deque
+from enum import Enum
+from functools import partial
+from typing import TYPE_CHECKING, Sequence
+from observers.dispatcher import Dispatcher
+from observers.observer import Observer
+if TYPE_CHECKING:
+    from dispositivos.dispositivo import ObservableDevice
+
+
+class OverflowPolicy(Enum):
+    """
+    What an `AsyncDispatcher` does when the queue of an observer is full.
+
+    Attributes:
+        DROP_OLDEST (str): Discards the oldest queued event.
+        BLOCK (str): Blocks the device until the queue has room.
+        COALESCE (str): Replaces the newest queued event with a new
+        single event, so the observer gets the latest state. A batch
+        is never replaced, nor replaces an event: if either is one,
+        the oldest queued entry is discarded instead.
+    """
+    DROP_OLDEST = 'drop_oldest'
+    BLOCK = 'block'
+    COALESCE = 'coalesce'
+
+
+class _Channel:
+    """
+    The bounded queue of events of one observer: a dict for a single
+    event, or a list for the batch of a bulk operation.
+    Only touched from the event loop thread, except for `slots`.
+    """
+
+    __slots__ = ('observer', 'events', 'ready', 'slots')
+
+    def __init__(self, observer: Observer, slots: int | None) -> None:
+        self.observer = observer
+        self.events: deque[dict | list[dict]] = deque()
+        self.ready = asyncio.Event()
+        self.slots = None if slots is None else threading.Semaphore(slots)
+
+
+class AsyncDispatcher(Dispatcher):
+    """
+    Delivers the notifications through an `asyncio` event loop,
+    running in a background thread, so the transitions return
+    immediately, however slow the observers are.
+
+    Every observer has a bounded queue, consumed in order by its own
+    task. The batch of a bulk operation takes a single place in the
+    queue, and is delivered with `notify_batch`. When a queue is full,
+    the `OverflowPolicy` applies. At most
+    `concurrency` deliveries run at the same time. An observer whose
+    `notify` is a coroutine function is awaited; any other is run in
+    the default executor of the loop. Devices must not be triggered
+    from the loop thread itself when the policy is `BLOCK`.
+
+    Attributes:
+        __max_queue (int): The size of the queue of each observer.
+        __overflow (OverflowPolicy): The policy for full queues.
+        __loop (asyncio.AbstractEventLoop): The event loop.
+        __channels (dict[Observer, _Channel]): The queue of each observer.
+        __unfinished (int): Events queued but not yet delivered.
+    """
+
+    @property
+    def dropped(self) -> int:
+        """
+        The number of events discarded or replaced because of full queues.
+        """
+        return self.__dropped
+
+    @property
+    def errors(self) -> int:
+        """
+        The number of deliveries that raised an exception.
+        """
+        return self.__errors
+
+    def __init__(
+        self,
+        max_queue: int = 64,
+        concurrency: int = 8,
+        overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+    ) -> None:
+        """
+        Constructor method for the `AsyncDispatcher` class.
+        Starts the event loop thread.
+
+        Args:
+            max_queue (int, optional): The size of the queue of each
+            observer. Defaults to 64.
+            concurrency (int, optional): The maximum number of concurrent
+            deliveries. Defaults to 8.
+            overflow (OverflowPolicy, optional): The policy for full
+            queues. Defaults to OverflowPolicy.DROP_OLDEST.
+        """
+        self.__max_queue = max_queue
+        self.__overflow = overflow
+        self.__channels: dict[Observer, _Channel] = {}
+        self.__lock = threading.Lock()
+        self.__dropped = 0
+        self.__errors = 0
+        self.__unfinished = 0
+        self.__loop = asyncio.new_event_loop()
+        self.__idle = asyncio.Event()
+        self.__idle.set()
+        self.__semaphore = asyncio.Semaphore(concurrency)
+        self.__thread = threading.Thread(
+            target=self.__loop.run_forever,
+            name='AsyncDispatcher',
+            daemon=True,
+        )
+        self.__thread.start()
+
+    def __channel(self, observer: Observer) -> _Channel:
+        """
+        Gets the channel of an observer, starting its task
+        the first time the observer is seen.
+        """
+        channel = self.__channels.get(observer)
+        if channel is not None:
+            return channel
+        with self.__lock:
+            channel = self.__channels.get(observer)
+            if channel is None:
+                slots = None
+                if self.__overflow is OverflowPolicy.BLOCK:
+                    slots = self.__max_queue
+                channel = _Channel(observer, slots)
+                self.__channels[observer] = channel
+                self.__loop.call_soon_threadsafe(
+                    self.__loop.create_task,
+                    self.__consume(channel),
+                )
+        return channel
+
+    def dispatch(
+        self,
+        device: ObservableDevice,
+        observers: Sequence[Observer],
+        event: dict,
+    ) -> None:
+        """
+        Queues an event for each observer and returns immediately,
+        unless the policy is `BLOCK` and a queue is full.
+
+        Args:
+            device (ObservableDevice): The device that changed its state.
+            observers (Sequence[Observer]): The registered observers.
+            event (dict): The notification, e.g. `{'state': ...}`.
+        """
+        for observer in observers:
+            self.__enqueue(observer, event)
+
+    def dispatch_batch(self, observer: Observer, events: list[dict]) -> None:
+        """
+        Queues the events of a bulk operation for an observer, as a
+        single entry delivered with `notify_batch`, and returns
+        immediately, unless the policy is `BLOCK` and the queue is full.
+
+        Args:
+            observer (Observer): The observer.
+            events (list[dict]): The events, in the order they happened.
+        """
+        self.__enqueue(observer, events)
+
+    def __enqueue(self, observer: Observer, event: dict | list[dict]) -> None:
+        """
+        Hands an event, or a batch, to the event loop thread.
+        """
+        channel = self.__channel(observer)
+        if channel.slots is not None:
+            channel.slots.acquire()
+        self.__loop.call_soon_threadsafe(self.__offer, channel, event)
+
+    def __offer(self, channel: _Channel, event: dict | list[dict]) -> None:
+        """
+        Adds an event to a channel, applying the overflow policy.
+        Runs in the event loop thread.
+        """
+        events = channel.events
+        if len(events) >= self.__max_queue:
+            self.__dropped += 1
+            if self.__overflow is OverflowPolicy.COALESCE:
+                if type(event) is dict and type(events[-1]) is dict:
+                    events[-1] = event
+                    return
+                events.popleft()
+                self.__unfinished -= 1
+            elif self.__overflow is OverflowPolicy.DROP_OLDEST:
+                events.popleft()
+                self.__unfinished -= 1
+        events.append(event)
+        self.__unfinished += 1
+        self.__idle.clear()
+        channel.ready.set()
+
+    async def __consume(self, channel: _Channel) -> None:
+        """
+        Delivers the events of a channel, in order.
+        """
+        events = channel.events
+        while True:
+            if not events:
+                channel.ready.clear()
+                await channel.ready.wait()
+                continue
+            event = events.popleft()
+            if channel.slots is not None:
+                channel.slots.release()
+            async with self.__semaphore:
+                await self.__deliver(channel.observer, event)
+            self.__unfinished -= 1
+            if self.__unfinished == 0:
+                self.__idle.set()
+
+    async def __deliver(
+        self,
+        observer: Observer,
+        event: dict | list[dict],
+    ) -> None:
+        """
+        Calls the `notify` method of an observer, or `notify_batch`
+        for a batch, keeping its exceptions from stopping the channel.
+        """
+        if type(event) is list:
+            notify, args, kwargs = observer.notify_batch, (event,), {}
+        else:
+            notify, args, kwargs = observer.notify, (), event
+        try:
+            if asyncio.iscoroutinefunction(notify):
+                await notify(*args, **kwargs)
+            else:
+                await self.__loop.run_in_executor(
+                    None,
+                    partial(notify, *args, **kwargs),
+                )
+        except Exception:
+            self.__errors += 1
+
+    def join(self, timeout: float | None = None) -> None:
+        """
+        Waits until every queued event has been delivered.
+
+        Args:
+            timeout (float | None, optional): The maximum time to wait,
+            in seconds. Defaults to None.
+
+        Raises:
+            TimeoutError: If the events were not delivered in time.
+        """
+        asyncio.run_coroutine_threadsafe(
+            self.__idle.wait(),
+            self.__loop,
+        ).result(timeout)
+
+    async def __shutdown(self) -> None:
+        """
+        Cancels the tasks of the channels, and waits for
+        the deliveries running in the executor.
+        """
+        tasks = [task for task in asyncio.all_tasks()
+                 if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.__loop.shutdown_default_executor()
+
+    def close(self) -> None:
+        """
+        Stops the event loop, discarding the events not yet delivered.
+        """
+        if self.__loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(
+            self.__shutdown(),
+            self.__loop,
+        ).result()
+        self.__loop.call_soon_threadsafe(self.__loop.stop)
+        self.__thread.join()
+        self.__loop.close()
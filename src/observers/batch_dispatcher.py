@@ -0,0 +1,76 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Sequence
+from observers.dispatcher import Dispatcher
+from observers.observer import Observer
+if TYPE_CHECKING:
+    from dispositivos.dispositivo import ObservableDevice
+
+
+class BatchDispatcher(Dispatcher):
+    """
+    Collects the notifications of a bulk operation, and delivers them
+    as one `notify_batch` call per observer when flushed, through the
+    `dispatch_batch` of another dispatcher, if given. Since the events
+    of a batch come from many devices, each one also carries the
+    `device` name.
+
+    Attributes:
+        __batches (dict[Observer, list[dict]]): The events collected
+        for each observer, in the order they happened.
+    """
+
+    def __init__(self) -> None:
+        self.__batches: dict[Observer, list[dict]] = {}
+
+    def dispatch(
+        self,
+        device: ObservableDevice,
+        observers: Sequence[Observer],
+        event: dict,
+    ) -> None:
+        """
+        Adds the event to the batch of each observer.
+
+        Args:
+            device (ObservableDevice): The device that changed its state.
+            observers (Sequence[Observer]): The registered observers.
+            event (dict): The notification, e.g. `{'state': ...}`.
+        """
+        batches = self.__batches
+        event = {'device': device.name, **event}
+        for observer in observers:
+            batch = batches.get(observer)
+            if batch is None:
+                batches[observer] = [event]
+            else:
+                batch.append(event)
+
+    def flush(
+        self,
+        dispatcher: Dispatcher | None = None,
+    ) -> list[tuple[Observer, Exception]]:
+        """
+        Delivers the collected batches, and starts new ones. An error
+        delivering to an observer doesn't keep the others from getting
+        their batches.
+
+        Args:
+            dispatcher (Dispatcher | None, optional): Delivers each batch
+            with `dispatch_batch`. Defaults to None, to call the
+            `notify_batch` of the observers synchronously.
+
+        Returns:
+            list[tuple[Observer, Exception]]: The observers whose batch
+            could not be delivered, with the error.
+        """
+        batches, self.__batches = self.__batches, {}
+        errors = []
+        for observer, events in batches.items():
+            try:
+                if dispatcher is None:
+                    observer.notify_batch(events)
+                else:
+                    dispatcher.dispatch_batch(observer, events)
+            except Exception as err:
+                errors.append((observer, err))
+        return errors
@@ -6,6 +6,8 @@ class Celular(Observer):
     This class servers just to ilustrate
     the Observer pattern."""
 
+    __slots__ = ('__number',)
+
     @property
     def number(self) -> str:
         return self.__number
@@ -19,3 +21,6 @@ class Celular(Observer):
 
     def notify(self, *args, **kwargs) -> None:
         print(f'CELULAR {self.number}: Notificado {args} {kwargs}')
+
+    def notify_batch(self, events: list[dict]) -> None:
+        print(f'CELULAR {self.number}: Notificado {len(events)}x {events}')
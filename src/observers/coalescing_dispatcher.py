@@ -0,0 +1,279 @@
+from __future__ import annotations
+import heapq
+import threading
+from itertools import count
+from time import monotonic
+from typing import TYPE_CHECKING, Callable, Sequence
+from observers.dispatcher import Dispatcher
+from observers.observer import Observer
+if TYPE_CHECKING:
+    from dispositivos.dispositivo import ObservableDevice
+
+
+class _Burst:
+    """
+    The notifications of one device to one observer,
+    collected during a coalescing window.
+    """
+
+    __slots__ = ('device', 'observer', 'event', 'transitions')
+
+    def __init__(
+        self,
+        device: ObservableDevice | None,
+        observer: Observer,
+        event: dict,
+    ) -> None:
+        self.device = device
+        self.observer = observer
+        self.event = event
+        self.transitions = 1
+
+
+class CoalescingDispatcher(Dispatcher):
+    """
+    Collapses bursts of notifications from flapping devices.
+
+    The first notification of a device to an observer opens a window,
+    whose length depends on the type of the observer (e.g. a few
+    seconds for a `Celular`, a minute for an `EMail`). Every
+    notification in the window is folded into a single one, delivered
+    when the window closes, carrying the latest state of the device
+    and the number of transitions it stands for:
+    `observer.notify(state=..., transitions=n)`. Observers of a type
+    without a window are notified right away.
+
+    The batch of a bulk operation is folded event by event into the
+    windows of the devices named by the events, so a device flapping
+    through bulk operations is collapsed like any other. Observers
+    without a window get the batch right away, with `notify_batch`.
+
+    The windows are closed by `flush`, which runs on every `dispatch`,
+    and periodically in a background thread after `start`.
+
+    Attributes:
+        __windows (dict[type[Observer], float]): The window length,
+        in seconds, of each observer type.
+        __inner (Dispatcher | None): Delivers the coalesced
+        notifications. If None, they are delivered synchronously.
+        __clock (Callable[[], float]): The time source.
+        __bursts (dict[tuple[str | int, int], _Burst]): The open
+        windows, by device name (or id, for a device without a name)
+        and observer id.
+        __deadlines (list[tuple[float, int, tuple[str | int, int]]]):
+        A heap with the closing time of each open window.
+    """
+
+    @property
+    def pending(self) -> int:
+        """
+        The number of open coalescing windows.
+        """
+        return len(self.__bursts)
+
+    def __init__(
+        self,
+        windows: dict[type[Observer], float],
+        inner: Dispatcher | None = None,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        """
+        Constructor method for the `CoalescingDispatcher` class.
+
+        Args:
+            windows (dict[type[Observer], float]): The window length,
+            in seconds, of each observer type. Subclasses of a type
+            share its window.
+            inner (Dispatcher | None, optional): Delivers the coalesced
+            notifications, e.g. an `AsyncDispatcher`. Defaults to None.
+            clock (Callable[[], float], optional): The time source.
+            Defaults to `time.monotonic`.
+        """
+        self.__windows = dict(windows)
+        self.__window_cache: dict[type, float] = {}
+        self.__inner = inner
+        self.__clock = clock
+        self.__bursts: dict[tuple[str | int, int], _Burst] = {}
+        self.__deadlines: list[
+            tuple[float, int, tuple[str | int, int]]
+        ] = []
+        self.__sequence = count()
+        self.__lock = threading.Lock()
+        self.__stop = threading.Event()
+        self.__thread: threading.Thread | None = None
+
+    def __window_of(self, observer: Observer) -> float:
+        """
+        The window length for an observer, from its closest
+        type in `__windows`.
+        """
+        observer_type = type(observer)
+        window = self.__window_cache.get(observer_type)
+        if window is None:
+            window = 0.0
+            for cls in observer_type.__mro__:
+                if cls in self.__windows:
+                    window = self.__windows[cls]
+                    break
+            self.__window_cache[observer_type] = window
+        return window
+
+    def dispatch(
+        self,
+        device: ObservableDevice,
+        observers: Sequence[Observer],
+        event: dict,
+    ) -> None:
+        """
+        Closes the windows that are due, and then folds the event
+        into the open window of each observer, opening one if needed.
+
+        Args:
+            device (ObservableDevice): The device that changed its state.
+            observers (Sequence[Observer]): The registered observers.
+            event (dict): The notification, e.g. `{'state': ...}`.
+        """
+        self.flush()
+        now = self.__clock()
+        device_key = id(device) if device.name is None else device.name
+        immediate = []
+        with self.__lock:
+            for observer in observers:
+                window = self.__window_of(observer)
+                if window <= 0:
+                    immediate.append(observer)
+                    continue
+                self.__fold(device_key, device, observer, event, now + window)
+        if immediate:
+            self.__deliver(device, immediate, event)
+
+    def dispatch_batch(self, observer: Observer, events: list[dict]) -> None:
+        """
+        Closes the windows that are due, and then folds each event of
+        a bulk operation into the open window of its device. An
+        observer without a window gets the batch right away.
+
+        Args:
+            observer (Observer): The observer.
+            events (list[dict]): The events, in the order they happened,
+            each with the `device` name.
+        """
+        self.flush()
+        window = self.__window_of(observer)
+        if window <= 0:
+            if self.__inner is not None:
+                self.__inner.dispatch_batch(observer, events)
+            else:
+                observer.notify_batch(events)
+            return
+        deadline = self.__clock() + window
+        with self.__lock:
+            for event in events:
+                self.__fold(event['device'], None, observer, event, deadline)
+
+    def __fold(
+        self,
+        device_key: str | int,
+        device: ObservableDevice | None,
+        observer: Observer,
+        event: dict,
+        deadline: float,
+    ) -> None:
+        """
+        Folds an event into the open window of a device and an
+        observer, opening one that closes at `deadline` if needed.
+        Called with the lock held.
+        """
+        key = (device_key, id(observer))
+        burst = self.__bursts.get(key)
+        if burst is None:
+            self.__bursts[key] = _Burst(device, observer, event)
+            heapq.heappush(
+                self.__deadlines,
+                (deadline, next(self.__sequence), key),
+            )
+        else:
+            burst.event = event
+            burst.transitions += 1
+
+    def flush(self, force: bool = False) -> int:
+        """
+        Closes the windows that are due, delivering their notifications.
+
+        Args:
+            force (bool, optional): If True, closes all the open windows.
+            Defaults to False.
+
+        Returns:
+            int: The number of notifications delivered.
+        """
+        now = self.__clock()
+        due = []
+        with self.__lock:
+            deadlines = self.__deadlines
+            while deadlines and (force or deadlines[0][0] <= now):
+                _, _, key = heapq.heappop(deadlines)
+                due.append(self.__bursts.pop(key))
+        for burst in due:
+            self.__deliver(
+                burst.device,
+                (burst.observer,),
+                {**burst.event, 'transitions': burst.transitions},
+            )
+        return len(due)
+
+    def __deliver(
+        self,
+        device: ObservableDevice | None,
+        observers: Sequence[Observer],
+        event: dict,
+    ) -> None:
+        """
+        Hands a notification to the inner dispatcher,
+        or delivers it synchronously.
+        """
+        if self.__inner is not None:
+            self.__inner.dispatch(device, observers, event)
+            return
+        for observer in observers:
+            observer.notify(**event)
+
+    def start(self, interval: float = 0.1) -> None:
+        """
+        Starts a background thread that closes the due windows
+        every `interval` seconds.
+
+        Args:
+            interval (float, optional): The time between two flushes,
+            in seconds. Defaults to 0.1.
+        """
+        if self.__thread is not None:
+            return
+        self.__stop.clear()
+        self.__thread = threading.Thread(
+            target=self.__run,
+            args=(interval,),
+            name='CoalescingDispatcher',
+            daemon=True,
+        )
+        self.__thread.start()
+
+    def __run(self, interval: float) -> None:
+        """
+        The loop of the background thread.
+        """
+        while not self.__stop.wait(interval):
+            self.flush()
+
+    def close(self) -> None:
+        """
+        Stops the background thread, delivers all the open windows
+        and closes the inner dispatcher.
+        """
+        if self.__thread is not None:
+            self.__stop.set()
+            self.__thread.join()
+            self.__thread = None
+        self.flush(force=True)
+        if self.__inner is not None:
+            self.__inner.close()
@@ -0,0 +1,67 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Sequence
+from observers.observer import Observer
+if TYPE_CHECKING:
+    from dispositivos.dispositivo import ObservableDevice
+
+
+class Dispatcher(ABC):
+    """
+    The base class for the strategies that deliver the notifications
+    of a device to its observers.
+
+    A device without a dispatcher calls its own `notify` method,
+    which delivers the notifications synchronously, inside the
+    transition. A device with a dispatcher hands each notification to
+    `dispatch` instead. The bulk operations of a house hand the events
+    collected for each observer to `dispatch_batch`.
+
+    Methods:
+        dispatch(device, observers, event): Delivers an event
+        to the observers of a device.
+        dispatch_batch(observer, events): Delivers the events of a bulk
+        operation to an observer.
+        close(): Releases the resources of the dispatcher.
+    """
+
+    @abstractmethod
+    def dispatch(
+        self,
+        device: ObservableDevice,
+        observers: Sequence[Observer],
+        event: dict,
+    ) -> None:
+        """
+        Delivers an event to the observers of a device.
+        Each observer gets it as `observer.notify(**event)`.
+
+        Args:
+            device (ObservableDevice): The device that changed its state.
+            observers (Sequence[Observer]): The registered observers.
+            event (dict): The notification, e.g. `{'state': ...}`.
+
+        Raises:
+            NotImplementedError: This method should
+                be implemented by subclasses.
+        """
+        raise NotImplementedError
+
+    def dispatch_batch(self, observer: Observer, events: list[dict]) -> None:
+        """
+        Delivers the events of a bulk operation to an observer, as a
+        single `observer.notify_batch(events)`. By default, it is
+        delivered synchronously: the subclasses that deliver `dispatch`
+        in the background should deliver the batches the same way.
+
+        Args:
+            observer (Observer): The observer.
+            events (list[dict]): The events, in the order they happened.
+        """
+        observer.notify_batch(events)
+
+    def close(self) -> None:
+        """
+        Releases the resources of the dispatcher.
+        """
+        pass
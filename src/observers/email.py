@@ -6,6 +6,8 @@ class EMail(Observer):
     This class servers just to ilustrate
     the Observer pattern."""
 
+    __slots__ = ('__address',)
+
     @property
     def address(self) -> str:
         return self.__address
@@ -19,3 +21,6 @@ class EMail(Observer):
 
     def notify(self, *args, **kwargs) -> None:
         print(f'E-Mail {self.address}: Notificado {args} {kwargs}')
+
+    def notify_batch(self, events: list[dict]) -> None:
+        print(f'E-Mail {self.address}: Notificado {len(events)}x {events}')
@@ -0,0 +1,199 @@
+from __future__ import annotations
+from itertools import count
+from observers.observer import Observer
+
+Topic = tuple[str, ...]
+
+
+class _Node:
+    """
+    A node of the subscription trie, for one topic segment.
+    """
+
+    __slots__ = ('children', 'subscribers')
+
+    def __init__(self) -> None:
+        self.children: dict[str, _Node] = {}
+        self.subscribers: dict[int, Observer] = {}
+
+
+class EventBus:
+    """
+    A topic-based publish/subscribe bus.
+
+    Topics are sequences of segments, written as dotted strings such
+    as `'device.Luz da Sala.state'`, or as tuples when a segment may
+    contain a dot. Subscription patterns may use `*`, matching exactly
+    one segment, and `#`, matching any number of trailing segments:
+    `'type.LUZ.*'` or `'house.#'`.
+
+    The patterns are compiled into a trie, so matching a topic visits
+    only the branches that can match it, instead of scanning every
+    subscription. The observers matched by each set of topics are
+    cached until the subscriptions change.
+
+    Attributes:
+        __root (_Node): The root of the trie.
+        __patterns (dict[int, tuple[Observer, Topic]]): The observer and
+        pattern of each subscription id.
+        __refs (dict[Observer, int]): The number of subscriptions of
+        each observer.
+        __cache (dict[tuple[Topic, ...], tuple[Observer, ...]]): The
+        observers matched by each set of topics already published.
+    """
+
+    SINGLE = '*'
+    MULTI = '#'
+    __CACHE_SIZE = 1 << 16
+
+    def __init__(self) -> None:
+        self.__root = _Node()
+        self.__patterns: dict[int, tuple[Observer, Topic]] = {}
+        self.__refs: dict[Observer, int] = {}
+        self.__cache: dict[tuple[Topic, ...], tuple[Observer, ...]] = {}
+        self.__ids = count(1)
+
+    def __len__(self) -> int:
+        """
+        The number of distinct subscribers.
+        """
+        return len(self.__refs)
+
+    @property
+    def total_subscriptions(self) -> int:
+        """
+        The number of subscriptions.
+        """
+        return len(self.__patterns)
+
+    @staticmethod
+    def topic(topic: str | Topic) -> Topic:
+        """Normalizes a topic or pattern to a tuple of segments.
+
+        Args:
+            topic (str | Topic): A dotted string, or a tuple of segments.
+
+        Returns:
+            Topic: The segments.
+        """
+        if isinstance(topic, str):
+            return tuple(topic.split('.'))
+        return tuple(topic)
+
+    def subscribe(self, observer: Observer, pattern: str | Topic) -> int:
+        """Subscribes an observer to the topics matching a pattern.
+
+        Args:
+            observer (Observer): The observer.
+            pattern (str | Topic): The pattern.
+
+        Raises:
+            ValueError: If `#` is not the last segment of the pattern.
+
+        Returns:
+            int: The id of the subscription.
+        """
+        segments = self.topic(pattern)
+        if self.MULTI in segments[:-1]:
+            raise ValueError('# must be the last segment of a pattern.')
+        node = self.__root
+        for segment in segments:
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = _Node()
+            node = child
+        subscription_id = next(self.__ids)
+        node.subscribers[subscription_id] = observer
+        self.__patterns[subscription_id] = (observer, segments)
+        self.__refs[observer] = self.__refs.get(observer, 0) + 1
+        self.__cache.clear()
+        return subscription_id
+
+    def unsubscribe(self, subscription_id: int) -> bool:
+        """Cancels a subscription.
+
+        Args:
+            subscription_id (int): The id of the subscription.
+
+        Returns:
+            bool: False if there is no such subscription.
+        """
+        entry = self.__patterns.pop(subscription_id, None)
+        if entry is None:
+            return False
+        observer, segments = entry
+        path = [self.__root]
+        for segment in segments:
+            path.append(path[-1].children[segment])
+        del path[-1].subscribers[subscription_id]
+        # Prunes the branches left empty.
+        for depth in range(len(segments), 0, -1):
+            node = path[depth]
+            if node.subscribers or node.children:
+                break
+            del path[depth - 1].children[segments[depth - 1]]
+        refs = self.__refs[observer] - 1
+        if refs:
+            self.__refs[observer] = refs
+        else:
+            del self.__refs[observer]
+        self.__cache.clear()
+        return True
+
+    def subscriptions(self) -> list[tuple[int, Observer, Topic]]:
+        """Lists the subscriptions, in the order they were made.
+
+        Returns:
+            list[tuple[int, Observer, Topic]]: The id, the observer
+            and the pattern of each subscription.
+        """
+        return [(subscription_id, observer, pattern)
+                for subscription_id, (observer, pattern)
+                in list(self.__patterns.items())]
+
+    def __match(self, topic: Topic, found: dict[Observer, None]) -> None:
+        """
+        Collects the observers subscribed to patterns matching a topic.
+        """
+        nodes = [self.__root]
+        for segment in topic:
+            if not nodes:
+                return
+            next_nodes = []
+            for node in nodes:
+                children = node.children
+                multi = children.get(self.MULTI)
+                if multi is not None:
+                    found.update(dict.fromkeys(multi.subscribers.values()))
+                child = children.get(segment)
+                if child is not None:
+                    next_nodes.append(child)
+                child = children.get(self.SINGLE)
+                if child is not None:
+                    next_nodes.append(child)
+            nodes = next_nodes
+        for node in nodes:
+            found.update(dict.fromkeys(node.subscribers.values()))
+            multi = node.children.get(self.MULTI)
+            if multi is not None:
+                found.update(dict.fromkeys(multi.subscribers.values()))
+
+    def subscribers(self, *topics: Topic) -> tuple[Observer, ...]:
+        """Finds the observers subscribed to any of the topics.
+        An observer matching many of them is only listed once.
+
+        Args:
+            *topics (Topic): The topics of an event, as tuples.
+
+        Returns:
+            tuple[Observer, ...]: The observers, in no particular order.
+        """
+        observers = self.__cache.get(topics)
+        if observers is None:
+            if len(self.__cache) >= self.__CACHE_SIZE:
+                self.__cache.clear()
+            found: dict[Observer, None] = {}
+            for topic in topics:
+                self.__match(topic, found)
+            observers = self.__cache[topics] = tuple(found)
+        return observers
@@ -11,10 +11,14 @@ class Observer(ABC):
     Methods:
         notify(*args, **kwargs): Notifies the observer
             with the given arguments.
+        notify_batch(events: list[dict]): Notifies the observer
+            of many events at once.
         register(observer_id: int): Registers the observer
             with the given observer ID.
     """
 
+    __slots__ = ('__observerid',)
+
     @property
     def observer_id(self) -> int:
         """
@@ -57,6 +61,19 @@ class Observer(ABC):
         """
         raise NotImplementedError
 
+    def notify_batch(self, events: list[dict]) -> None:
+        """
+        Notify the observer about many events at once, such as the
+        transitions of a bulk operation of the house. By default,
+        each event is delivered with `notify(**event)`. Subclasses
+        may override it to deliver a single digest.
+
+        Args:
+            events (list[dict]): The events, in the order they happened.
+        """
+        for event in events:
+            self.notify(**event)
+
     def register(self, observer_id: int) -> None:
         """
         Register the observer with the given observer_id.
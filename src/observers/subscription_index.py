@@ -0,0 +1,147 @@
+from __future__ import annotations
+from observers.observer import Observer
+
+
+class SubscriptionIndex:
+    """
+    A bidirectional index of which observers watch which devices,
+    and of the `EventBus` subscription behind each pair.
+
+    Both directions are insertion-ordered dicts, so attaching and
+    detaching a subscription are O(1), and the number of distinct
+    subscribers is the size of the `observer -> devices` side.
+
+    Attributes:
+        __by_observer (dict[Observer, dict[str, int]]): The names of
+        the devices watched by each observer, with the subscription ids.
+        __by_device (dict[str, dict[Observer, None]]): The observers
+        watching each device, by device name.
+        __views (dict[str, tuple[Observer, ...]]): The tuples returned by
+        `observers_of`, by device name, until the device gains or loses
+        an observer.
+    """
+
+    def __init__(self) -> None:
+        self.__by_observer: dict[Observer, dict[str, int]] = {}
+        self.__by_device: dict[str, dict[Observer, None]] = {}
+        self.__views: dict[str, tuple[Observer, ...]] = {}
+
+    def __len__(self) -> int:
+        """
+        The number of distinct subscribers.
+        """
+        return len(self.__by_observer)
+
+    def __contains__(self, subscription: tuple[Observer, str]) -> bool:
+        observer, device_name = subscription
+        return device_name in self.__by_observer.get(observer, ())
+
+    def attach(
+        self,
+        observer: Observer,
+        device_name: str,
+        subscription_id: int,
+    ) -> bool:
+        """Subscribes an observer to a device.
+
+        Args:
+            observer (Observer): The observer.
+            device_name (str): The name of the device.
+            subscription_id (int): The id of the subscription.
+
+        Returns:
+            bool: False if the observer was already subscribed.
+        """
+        devices = self.__by_observer.setdefault(observer, {})
+        if device_name in devices:
+            return False
+        devices[device_name] = subscription_id
+        self.__by_device.setdefault(device_name, {})[observer] = None
+        self.__views.pop(device_name, None)
+        return True
+
+    def detach(self, observer: Observer, device_name: str) -> int | None:
+        """Unsubscribes an observer from a device.
+
+        Args:
+            observer (Observer): The observer.
+            device_name (str): The name of the device.
+
+        Returns:
+            int | None: The id of the subscription,
+            or None if the observer was not subscribed.
+        """
+        devices = self.__by_observer.get(observer)
+        if devices is None or device_name not in devices:
+            return None
+        subscription_id = devices.pop(device_name)
+        if not devices:
+            del self.__by_observer[observer]
+        observers = self.__by_device[device_name]
+        del observers[observer]
+        if not observers:
+            del self.__by_device[device_name]
+        self.__views.pop(device_name, None)
+        return subscription_id
+
+    def detach_device(self, device_name: str) -> list[int]:
+        """Removes all the subscriptions to a device.
+
+        Args:
+            device_name (str): The name of the device.
+
+        Returns:
+            list[int]: The ids of the removed subscriptions.
+        """
+        return [self.detach(observer, device_name)
+                for observer in list(self.__by_device.get(device_name, ()))]
+
+    def devices_of(self, observer: Observer) -> list[str]:
+        """Returns the names of the devices an observer watches.
+
+        Args:
+            observer (Observer): The observer.
+
+        Returns:
+            list[str]: The device names, in subscription order.
+        """
+        return list(self.__by_observer.get(observer, ()))
+
+    def observers_of(self, device_name: str) -> tuple[Observer, ...]:
+        """Returns the observers watching a device. The tuple is built
+        once and reused until the observers of the device change.
+
+        Args:
+            device_name (str): The name of the device.
+
+        Returns:
+            tuple[Observer, ...]: The observers, in subscription order.
+        """
+        view = self.__views.get(device_name)
+        if view is None:
+            observers = self.__by_device.get(device_name)
+            if not observers:
+                return ()
+            view = self.__views[device_name] = tuple(observers)
+        return view
+
+    def subscription_ids(self) -> set[int]:
+        """Returns the ids of the subscriptions in the index.
+
+        Returns:
+            set[int]: The subscription ids.
+        """
+        return {subscription_id
+                for devices in list(self.__by_observer.values())
+                for subscription_id in list(devices.values())}
+
+    def pairs(self) -> list[tuple[Observer, str]]:
+        """Lists the subscriptions of the observers to the devices.
+
+        Returns:
+            list[tuple[Observer, str]]: The observer and the device name
+            of each subscription, grouped by observer.
+        """
+        return [(observer, device_name)
+                for observer, devices in list(self.__by_observer.items())
+                for device_name in list(devices)]
@@ -0,0 +1,300 @@
+from __future__ import annotations
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from time import monotonic
+from typing import TYPE_CHECKING, Callable, Sequence, Union
+from observers.dispatcher import Dispatcher
+from observers.observer import Observer
+if TYPE_CHECKING:
+    from dispositivos.dispositivo import ObservableDevice
+
+# An event, or the batch of events of a bulk operation.
+Payload = Union[dict, list[dict]]
+ErrorHandler = Callable[[Observer, Payload, BaseException], None]
+
+
+class _Lane:
+    """
+    The pending deliveries of one observer, drained in order
+    by at most one worker at a time.
+    """
+
+    __slots__ = (
+        'observer', 'pending', 'running', 'current', 'deadline', 'stalled',
+    )
+
+    def __init__(self, observer: Observer) -> None:
+        self.observer = observer
+        self.pending: deque[tuple[Payload, Future]] = deque()
+        self.running = False
+        self.current: tuple[Payload, Future] | None = None
+        self.deadline = 0.0
+        self.stalled = False
+
+
+class ThreadPoolDispatcher(Dispatcher):
+    """
+    Delivers the notifications of a transition to all the observers
+    in parallel, on a `concurrent.futures.ThreadPoolExecutor`.
+
+    Each observer has a lane of pending deliveries, drained by one
+    worker at a time, so every observer still gets the events in
+    state-change order. The batch of a bulk operation is one delivery
+    of the lane, made with `notify_batch`. A failure of one observer
+    doesn't affect the others: it is set on the `Future` of that
+    delivery, counted in `failures`, and passed to `on_error`.
+
+    With a `timeout`, a watchdog thread fails a delivery that runs
+    longer than the limit with a `TimeoutError`, while it still runs,
+    and marks the lane of the observer as stalled: the deliveries
+    queued behind it, and the ones dispatched until the observer
+    returns, fail with a `TimeoutError` at once instead of piling up.
+    The lane resumes with the next event once the observer returns.
+
+    After `close`, new deliveries fail with a `RuntimeError`, reported
+    the same way, instead of raising from the transition.
+
+    Attributes:
+        __executor (ThreadPoolExecutor): The worker threads.
+        __timeout (float | None): The time limit of a delivery.
+        __on_error (ErrorHandler | None): Called with the observer,
+        the event (or the list of events of a batch) and the exception
+        of every failed delivery.
+        __lanes (dict[Observer, _Lane]): The lane of each observer.
+        __failures (dict[Observer, int]): The failures of each observer.
+        __closed (bool): Whether `close` was called.
+        __stop (threading.Event): Stops the watchdog.
+        __watchdog (threading.Thread | None): Fails the deliveries over
+        the `timeout`.
+    """
+
+    @property
+    def failures(self) -> dict[Observer, int]:
+        """
+        The number of failed deliveries of each observer.
+        """
+        with self.__lock:
+            return dict(self.__failures)
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        timeout: float | None = None,
+        on_error: ErrorHandler | None = None,
+    ) -> None:
+        """
+        Constructor method for the `ThreadPoolDispatcher` class.
+
+        Args:
+            max_workers (int | None, optional): The number of worker
+            threads. Defaults to the `ThreadPoolExecutor` default.
+            timeout (float | None, optional): The time limit of a
+            delivery, in seconds. Defaults to None.
+            on_error (ErrorHandler | None, optional): Called with the
+            observer, the event (or the list of events of a batch) and
+            the exception of every failed delivery. It must not raise.
+            Defaults to None.
+        """
+        self.__executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='ThreadPoolDispatcher',
+        )
+        self.__timeout = timeout
+        self.__on_error = on_error
+        self.__lanes: dict[Observer, _Lane] = {}
+        self.__failures: dict[Observer, int] = {}
+        self.__lock = threading.Lock()
+        self.__closed = False
+        self.__stop = threading.Event()
+        self.__watchdog: threading.Thread | None = None
+        if timeout is not None:
+            self.__watchdog = threading.Thread(
+                target=self.__watch,
+                name='ThreadPoolDispatcher-watchdog',
+                daemon=True,
+            )
+            self.__watchdog.start()
+
+    def dispatch(
+        self,
+        device: ObservableDevice,
+        observers: Sequence[Observer],
+        event: dict,
+    ) -> dict[Observer, Future]:
+        """
+        Queues the event in the lane of each observer,
+        and returns without waiting for the deliveries. The lanes of
+        stalled observers, and a closed dispatcher, fail the delivery
+        at once.
+
+        Args:
+            device (ObservableDevice): The device that changed its state.
+            observers (Sequence[Observer]): The registered observers.
+            event (dict): The notification, e.g. `{'state': ...}`.
+
+        Returns:
+            dict[Observer, Future]: The delivery to each observer.
+            A failed delivery raises its exception from `result()`.
+        """
+        return self.__enqueue(observers, event)
+
+    def dispatch_batch(
+        self,
+        observer: Observer,
+        events: list[dict],
+    ) -> Future:
+        """
+        Queues the events of a bulk operation in the lane of an
+        observer, delivered as a single `notify_batch`, and returns
+        without waiting for the delivery.
+
+        Args:
+            observer (Observer): The observer.
+            events (list[dict]): The events, in the order they happened.
+
+        Returns:
+            Future: The delivery. A failed delivery raises its exception
+            from `result()`.
+        """
+        return self.__enqueue((observer,), events)[observer]
+
+    def __enqueue(
+        self,
+        observers: Sequence[Observer],
+        event: Payload,
+    ) -> dict[Observer, Future]:
+        """
+        Queues an event, or a batch, in the lane of each observer.
+        """
+        deliveries = {}
+        refused = []
+        with self.__lock:
+            closed = self.__closed
+            for observer in observers:
+                future = deliveries[observer] = Future()
+                if closed:
+                    refused.append((observer, future))
+                    continue
+                lane = self.__lanes.get(observer)
+                if lane is None:
+                    lane = self.__lanes[observer] = _Lane(observer)
+                if lane.stalled:
+                    refused.append((observer, future))
+                    continue
+                lane.pending.append((event, future))
+                if not lane.running:
+                    lane.running = True
+                    self.__executor.submit(self.__drain, lane)
+        for observer, future in refused:
+            if closed:
+                err = RuntimeError('The dispatcher is closed.')
+            else:
+                err = TimeoutError(
+                    f'The observer is stalled on a delivery over the '
+                    f'{self.__timeout}s limit.'
+                )
+            future.set_running_or_notify_cancel()
+            self.__fail(observer, event, future, err)
+        return deliveries
+
+    def __drain(self, lane: _Lane) -> None:
+        """
+        Delivers the pending events of a lane, in order.
+        Runs in a worker thread.
+        """
+        timeout = self.__timeout
+        while True:
+            with self.__lock:
+                if not lane.pending:
+                    lane.running = False
+                    return
+                event, future = lane.pending.popleft()
+                if not future.set_running_or_notify_cancel():
+                    continue
+                lane.current = (event, future)
+                if timeout is not None:
+                    lane.deadline = monotonic() + timeout
+            error = None
+            try:
+                if type(event) is list:
+                    lane.observer.notify_batch(event)
+                else:
+                    lane.observer.notify(**event)
+            except Exception as err:
+                error = err
+            with self.__lock:
+                lane.current = None
+                # The watchdog already failed this delivery.
+                timed_out, lane.stalled = lane.stalled, False
+            if timed_out:
+                continue
+            if error is not None:
+                self.__fail(lane.observer, event, future, error)
+            else:
+                future.set_result(None)
+
+    def __watch(self) -> None:
+        """
+        Fails the deliveries running over the `timeout`, and the ones
+        queued behind them. Runs in the watchdog thread, waking up at
+        the earliest deadline.
+        """
+        timeout = self.__timeout
+        wait = timeout
+        while not self.__stop.wait(wait):
+            now = monotonic()
+            wait = timeout
+            expired = []
+            with self.__lock:
+                for lane in self.__lanes.values():
+                    if lane.current is None or lane.stalled:
+                        continue
+                    left = lane.deadline - now
+                    if left > 0:
+                        wait = min(wait, left)
+                        continue
+                    lane.stalled = True
+                    expired.append((lane.observer, lane.current, [
+                        delivery for delivery in lane.pending
+                        if delivery[1].set_running_or_notify_cancel()
+                    ]))
+                    lane.pending.clear()
+            for observer, (event, future), skipped in expired:
+                self.__fail(observer, event, future, TimeoutError(
+                    f'The delivery is running over the {timeout}s limit.'
+                ))
+                for event, future in skipped:
+                    self.__fail(observer, event, future, TimeoutError(
+                        'Skipped, behind a delivery over the '
+                        f'{timeout}s limit.'
+                    ))
+
+    def __fail(
+        self,
+        observer: Observer,
+        event: Payload,
+        future: Future,
+        err: BaseException,
+    ) -> None:
+        """
+        Reports a failed delivery.
+        """
+        with self.__lock:
+            self.__failures[observer] = self.__failures.get(observer, 0) + 1
+        future.set_exception(err)
+        if self.__on_error is not None:
+            self.__on_error(observer, event, err)
+
+    def close(self) -> None:
+        """
+        Waits for the pending deliveries and stops the worker threads.
+        A delivery dispatched afterwards fails with a `RuntimeError`.
+        """
+        with self.__lock:
+            self.__closed = True
+        self.__executor.shutdown(wait=True)
+        self.__stop.set()
+        if self.__watchdog is not None:
+            self.__watchdog.join()
+            self.__watchdog = None
@@ -0,0 +1,229 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, NamedTuple, Union
+from dispositivos.dispositivo import State
+from dispositivos.dispositivo_factory import (
+    DispositivoFactory,
+    DispositivosEnum,
+)
+if TYPE_CHECKING:
+    from casa_inteligente import CasaInteligente
+
+# The target of an action: a device name, or all the devices of a type.
+Target = Union[str, DispositivosEnum]
+
+
+class Rule(NamedTuple):
+    """
+    An automation: when a device of a type reaches a state, fire some
+    triggers, e.g. when the security system `alarme` is
+    `ARMADO_SEM_NINGUEM`, turn off all the lights:
+
+        Rule(
+            'saida',
+            DispositivosEnum.SISTEMA_SEGURANCA,
+            SisSegState.ARMADO_SEM_NINGUEM,
+            ((DispositivosEnum.LUZ, 'desligar'),),
+            device='alarme',
+        )
+
+    Attributes:
+        name (str): The unique name of the rule.
+        device_type (DispositivosEnum): The type of the devices watched.
+        state (State): The state that fires the rule.
+        actions (tuple[tuple[Target, str], ...]): The target and the
+        trigger of each action. A target is a device name, or a device
+        type to fire the trigger on all the devices of the type.
+        device (str | None): Only the device with this name is watched.
+        Defaults to None, for all the devices of the type.
+    """
+
+    name: str
+    device_type: DispositivosEnum
+    state: State
+    actions: tuple[tuple[Target, str], ...]
+    device: str | None = None
+
+
+class RuleEngine:
+    """
+    Runs the `Rule`s of a `CasaInteligente`, set with
+    `CasaInteligente.set_rule_engine`.
+
+    The rules are indexed by the state that fires them (each state
+    belongs to a single device type), and by device name for the rules
+    of a single device, so a transition only looks at the rules that
+    match it. The matches are queued, and their actions are run once
+    the bulk operation that caused them is over: the actions on named
+    devices with a single `CasaInteligente.control_many` call, and the
+    actions on device types with a `CasaInteligente.broadcast` each.
+    The transitions caused by the actions can fire more rules, which
+    are run in the next wave, until no rule matches.
+
+    A rule fired twice for the same device in one cascade means the
+    rules form a cycle, e.g. one turning a light on when another turns
+    it off. The second firing is skipped, and recorded in `cycles`.
+
+    Attributes:
+        __rules (dict[str, Rule]): The rules, by name.
+        __by_state (dict[State, list[Rule]]): The rules watching all the
+        devices of a type, by the state that fires them.
+        __by_device (dict[str, dict[State, list[Rule]]]): The rules
+        watching a single device, by device name and state.
+        __pending (list[tuple[Rule, str]]): The rules matched and not
+        run yet, with the name of the device that fired them.
+        __running (bool): Whether a cascade is running.
+        cycles (list[tuple[str, str]]): The rule and device names of the
+        firings skipped because of a cycle.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor method for the `RuleEngine` class.
+        """
+        self.__rules: dict[str, Rule] = {}
+        self.__by_state: dict[State, list[Rule]] = {}
+        self.__by_device: dict[str, dict[State, list[Rule]]] = {}
+        self.__pending: list[tuple[Rule, str]] = []
+        self.__running = False
+        self.cycles: list[tuple[str, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.__rules)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__rules
+
+    @staticmethod
+    def __validate(rule: Rule) -> None:
+        """
+        Checks that the state and the triggers of a rule exist.
+        """
+        cls = DispositivoFactory.classe_dispositivo(rule.device_type)
+        if rule.state not in cls._table.states:
+            raise ValueError(
+                f'{rule.name}: {rule.state} is not a state of '
+                f'{rule.device_type.name}.'
+            )
+        if not rule.actions:
+            raise ValueError(f'{rule.name}: A rule needs actions.')
+        for target, trigger in rule.actions:
+            if not isinstance(target, DispositivosEnum):
+                continue
+            try:
+                DispositivoFactory.classe_dispositivo(target)._table.edges(
+                    trigger,
+                )
+            except AttributeError:
+                raise ValueError(
+                    f'{rule.name}: {target.name} has no trigger {trigger}.'
+                )
+
+    def add_rule(self, rule: Rule) -> None:
+        """Adds a rule.
+
+        Args:
+            rule (Rule): The rule.
+
+        Raises:
+            ValueError: If there is already a rule with the same name,
+            if the state is not a state of the device type, or if an
+            action on a device type has a trigger the type lacks.
+        """
+        if rule.name in self.__rules:
+            raise ValueError(f'There is already a rule named {rule.name}.')
+        self.__validate(rule)
+        self.__rules[rule.name] = rule
+        if rule.device is None:
+            index = self.__by_state
+        else:
+            index = self.__by_device.setdefault(rule.device, {})
+        index.setdefault(rule.state, []).append(rule)
+
+    def remove_rule(self, name: str) -> bool:
+        """Removes a rule.
+
+        Args:
+            name (str): The name of the rule.
+
+        Returns:
+            bool: False if there was no rule with that name.
+        """
+        rule = self.__rules.pop(name, None)
+        if rule is None:
+            return False
+        if rule.device is None:
+            index = self.__by_state
+        else:
+            index = self.__by_device[rule.device]
+        rules = index[rule.state]
+        rules.remove(rule)
+        if not rules:
+            del index[rule.state]
+        if rule.device is not None and not index:
+            del self.__by_device[rule.device]
+        return True
+
+    def rules(self) -> list[Rule]:
+        """Lists the rules.
+
+        Returns:
+            list[Rule]: The rules, in the order they were added.
+        """
+        return list(self.__rules.values())
+
+    def match(self, device_name: str, state: State) -> None:
+        """Queues the rules fired by a device reaching a state.
+        Called by the house after every transition.
+
+        Args:
+            device_name (str): The name of the device.
+            state (State): The state it reached.
+        """
+        rules = self.__by_state.get(state)
+        if rules is not None:
+            self.__pending.extend([(rule, device_name) for rule in rules])
+        by_state = self.__by_device.get(device_name)
+        if by_state is not None:
+            rules = by_state.get(state)
+            if rules is not None:
+                self.__pending.extend(
+                    [(rule, device_name) for rule in rules],
+                )
+
+    def run(self, house: CasaInteligente) -> None:
+        """Runs the actions of the queued rules, in waves, until the
+        transitions they cause fire no more rules. Called by the house
+        after each bulk operation, and after each single transition.
+        Calls made while a cascade runs return at once: the cascade
+        picks their matches up in its next wave.
+
+        Args:
+            house (CasaInteligente): The house of the devices.
+        """
+        if self.__running or not self.__pending:
+            return
+        self.__running = True
+        fired: set[tuple[str, str]] = set()
+        try:
+            while self.__pending:
+                pending, self.__pending = self.__pending, []
+                commands: list[tuple[str, str]] = []
+                broadcasts: dict[tuple[DispositivosEnum, str], None] = {}
+                for rule, device_name in pending:
+                    key = (rule.name, device_name)
+                    if key in fired:
+                        self.cycles.append(key)
+                        continue
+                    fired.add(key)
+                    for target, trigger in rule.actions:
+                        if isinstance(target, DispositivosEnum):
+                            broadcasts[(target, trigger)] = None
+                        else:
+                            commands.append((target, trigger))
+                if commands:
+                    house.control_many(commands)
+                for device_type, trigger in broadcasts:
+                    house.broadcast(device_type, trigger)
+        finally:
+            self.__pending = []
+            self.__running = False
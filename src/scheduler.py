@@ -0,0 +1,493 @@
+from __future__ import annotations
+import heapq
+import math
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Callable, Iterable, Union
+from dispositivos.dispositivo_factory import DispositivosEnum
+if TYPE_CHECKING:
+    from casa_inteligente import CasaInteligente
+
+# The target of a command: a device name, or all the devices of a type.
+Target = Union[str, DispositivosEnum]
+
+_ALIASES = {
+    '@hourly': '0 * * * *',
+    '@daily': '0 0 * * *',
+    '@weekly': '0 0 * * 0',
+    '@monthly': '0 0 1 * *',
+    '@yearly': '0 0 1 1 *',
+}
+
+
+def _parse_field(field: str, low: int, high: int) -> list[int]:
+    """
+    Parses a field of a cron expression into the sorted values it
+    allows, e.g. `*/15` into `[0, 15, 30, 45]` for the minutes.
+    """
+    values = set()
+    for part in field.split(','):
+        expr, _, step = part.partition('/')
+        if expr == '*':
+            start, end = low, high
+        elif '-' in expr:
+            first, _, last = expr.partition('-')
+            start, end = int(first), int(last)
+        else:
+            start = int(expr)
+            end = high if step else start
+        step = int(step) if step else 1
+        if not low <= start <= end <= high or step < 1:
+            raise ValueError(f'Invalid cron field {field}.')
+        values.update(range(start, end + 1, step))
+    return sorted(values)
+
+
+class Cron:
+    """
+    A cron-like recurrence, with the usual five fields: minute, hour,
+    day of the month, month and day of the week (0 or 7 is Sunday),
+    e.g. `0 6 * * 1-5` for 06:00 on weekdays. The fields accept `*`,
+    lists, ranges and steps, as in `0,30 8-18/2 * * *`, and the aliases
+    `@hourly`, `@daily`, `@weekly`, `@monthly` and `@yearly` are
+    understood. As in cron, when both the day of the month and the day
+    of the week are restricted, a day matching either one is taken.
+
+    The times are local, and their resolution is a minute.
+
+    Attributes:
+        expression (str): The expression.
+    """
+
+    __slots__ = (
+        'expression',
+        '__minutes',
+        '__hours',
+        '__days',
+        '__months',
+        '__weekdays',
+        '__any_day',
+        '__any_weekday',
+    )
+
+    def __init__(self, expression: str) -> None:
+        """
+        Constructor method for the `Cron` class.
+
+        Args:
+            expression (str): The cron expression.
+
+        Raises:
+            ValueError: If the expression is not valid.
+        """
+        fields = _ALIASES.get(expression.strip(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f'Invalid cron expression {expression}.')
+        self.expression = expression
+        try:
+            self.__minutes = _parse_field(fields[0], 0, 59)
+            self.__hours = _parse_field(fields[1], 0, 23)
+            self.__days = set(_parse_field(fields[2], 1, 31))
+            self.__months = set(_parse_field(fields[3], 1, 12))
+            self.__weekdays = {
+                day % 7 for day in _parse_field(fields[4], 0, 7)
+            }
+        except ValueError:
+            raise ValueError(f'Invalid cron expression {expression}.')
+        self.__any_day = fields[2] == '*'
+        self.__any_weekday = fields[4] == '*'
+
+    def __repr__(self) -> str:
+        return f'Cron({self.expression!r})'
+
+    def __day_matches(self, day: datetime) -> bool:
+        """
+        Whether the day of the month or of the week of a date matches.
+        """
+        in_month = day.day in self.__days
+        # `weekday` counts from Monday, and cron from Sunday.
+        in_week = (day.weekday() + 1) % 7 in self.__weekdays
+        if self.__any_day or self.__any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next_after(self, timestamp: float) -> float:
+        """Finds the first time of the recurrence after a time.
+
+        Args:
+            timestamp (float): The time, in seconds since the epoch.
+
+        Raises:
+            ValueError: If the recurrence never happens, e.g. `0 0 31 2 *`.
+
+        Returns:
+            float: The next time, in seconds since the epoch.
+        """
+        moment = datetime.fromtimestamp(timestamp).replace(
+            second=0, microsecond=0,
+        ) + timedelta(minutes=1)
+        minutes, hours = self.__minutes, self.__hours
+        # Skips whole months and days first, so a search takes a few
+        # steps per day at most, over a leap-year cycle at most.
+        limit = moment + timedelta(days=366 * 4 + 1)
+        while moment < limit:
+            if moment.month not in self.__months:
+                year = moment.year + moment.month // 12
+                moment = datetime(year, moment.month % 12 + 1, 1)
+                continue
+            if not self.__day_matches(moment):
+                moment = datetime(moment.year, moment.month, moment.day)
+                moment += timedelta(days=1)
+                continue
+            index = bisect_left(hours, moment.hour)
+            if index == len(hours):
+                moment = datetime(moment.year, moment.month, moment.day)
+                moment += timedelta(days=1)
+                continue
+            if hours[index] != moment.hour:
+                moment = moment.replace(hour=hours[index], minute=0)
+            index = bisect_left(minutes, moment.minute)
+            if index == len(minutes):
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+                continue
+            return moment.replace(minute=minutes[index]).timestamp()
+        raise ValueError(f'{self.expression} never happens.')
+
+
+class _Job:
+    """
+    A scheduled job: its commands, when it is due next, and how it
+    recurs, if it does.
+    """
+
+    __slots__ = ('id', 'commands', 'due', 'interval', 'cron')
+
+    def __init__(
+        self,
+        job_id: int,
+        commands: tuple[tuple[Target, str], ...],
+        due: float,
+        interval: float | None = None,
+        cron: Cron | None = None,
+    ) -> None:
+        self.id = job_id
+        self.commands = commands
+        self.due = due
+        self.interval = interval
+        self.cron = cron
+
+    def next_due(self, now: float) -> float | None:
+        """
+        When the job is due again after running at `now`, or None if
+        it doesn't recur. Missed runs are skipped, not caught up.
+        """
+        if self.interval is not None:
+            missed = max(0, math.floor((now - self.due) / self.interval))
+            return self.due + (missed + 1) * self.interval
+        if self.cron is not None:
+            return self.cron.next_after(max(now, self.due))
+        return None
+
+
+class Scheduler:
+    """
+    Fires the triggers of a `CasaInteligente` at scheduled times, e.g.
+    the lights off at 23:00 and the thermostats `aquecer` at 06:00 on
+    weekdays, for thousands of jobs.
+
+    The jobs are kept in a heap ordered by due time, so finding the due
+    jobs costs O(log n) each, and only one timer is needed: a single
+    background thread sleeps until the next due time. The times are
+    rounded up to ticks of `resolution` seconds, and all the jobs due at
+    the same tick run together, with a single
+    `CasaInteligente.control_many` call whose observers get a single
+    digest.
+
+    The clock can be injected, e.g. a fake one in tests, and the jobs
+    can be run without the thread, by calling `run_pending`.
+
+    A job that fails doesn't stop the others, nor the thread: its
+    error is kept in `errors`, and a recurring job whose next time
+    can't be computed is dropped.
+
+    Attributes:
+        __house (CasaInteligente): The house.
+        __clock (Callable[[], float]): Returns the current time,
+        in seconds since the epoch.
+        __resolution (float): The length of a tick, in seconds.
+        __heap (list[tuple[float, int]]): The due time and the id of the
+        scheduled jobs. Cancelled jobs are dropped when popped.
+        __jobs (dict[int, _Job]): The scheduled jobs, by id.
+        __lock (threading.Lock): Guards the jobs, since they can be
+        scheduled while the background thread runs.
+        errors (deque[Exception]): The last errors of the jobs and of
+        the background thread.
+    """
+
+    __MAX_ERRORS = 100
+
+    def __init__(
+        self,
+        house: CasaInteligente,
+        clock: Callable[[], float] = time.time,
+        resolution: float = 1.0,
+    ) -> None:
+        """
+        Constructor method for the `Scheduler` class.
+
+        Args:
+            house (CasaInteligente): The house.
+            clock (Callable[[], float], optional): Returns the current
+            time, in seconds since the epoch. Defaults to `time.time`.
+            resolution (float, optional): The length of a tick,
+            in seconds. Defaults to 1.
+        """
+        self.__house = house
+        self.__clock = clock
+        self.__resolution = resolution
+        self.__heap: list[tuple[float, int]] = []
+        self.__jobs: dict[int, _Job] = {}
+        self.__next_id = 1
+        self.__lock = threading.Lock()
+        self.__wakeup = threading.Event()
+        self.__stop = threading.Event()
+        self.__thread: threading.Thread | None = None
+        self.errors: deque[Exception] = deque(maxlen=self.__MAX_ERRORS)
+
+    def __len__(self) -> int:
+        return len(self.__jobs)
+
+    def __tick(self, timestamp: float) -> float:
+        """
+        Rounds a time up to its tick.
+        """
+        return math.ceil(timestamp / self.__resolution) * self.__resolution
+
+    def __add(
+        self,
+        commands: Iterable[tuple[Target, str]],
+        due: float,
+        interval: float | None = None,
+        cron: Cron | None = None,
+    ) -> int:
+        """
+        Schedules a job, and wakes the background thread up, in case
+        the job is due before the time it sleeps until.
+        """
+        commands = tuple(commands)
+        if not commands:
+            raise ValueError('A job needs commands.')
+        with self.__lock:
+            job = _Job(self.__next_id, commands, self.__tick(due), interval,
+                       cron)
+            self.__next_id += 1
+            self.__jobs[job.id] = job
+            heapq.heappush(self.__heap, (job.due, job.id))
+        self.__wakeup.set()
+        return job.id
+
+    def at(
+        self,
+        timestamp: float,
+        commands: Iterable[tuple[Target, str]],
+    ) -> int:
+        """Schedules commands to run once, e.g.
+        `at(time.time() + 60, [('luz-sala', 'desligar')])`.
+
+        Args:
+            timestamp (float): When to run, in seconds since the epoch.
+            commands (Iterable[tuple[Target, str]]): The target and the
+            trigger of each command. A target is a device name, or a
+            device type to fire the trigger on all the devices of the
+            type.
+
+        Returns:
+            int: The id of the job, e.g. to `cancel` it.
+        """
+        return self.__add(commands, timestamp)
+
+    def every(
+        self,
+        interval: float,
+        commands: Iterable[tuple[Target, str]],
+        start: float | None = None,
+    ) -> int:
+        """Schedules commands to run at a fixed interval.
+
+        Args:
+            interval (float): The interval, in seconds.
+            commands (Iterable[tuple[Target, str]]): The commands,
+            as in `at`.
+            start (float | None, optional): The first run, in seconds
+            since the epoch. Defaults to None, for one interval from now.
+
+        Raises:
+            ValueError: If the interval is not positive.
+
+        Returns:
+            int: The id of the job.
+        """
+        if interval <= 0:
+            raise ValueError('The interval must be positive.')
+        if start is None:
+            start = self.__clock() + interval
+        return self.__add(commands, start, interval=interval)
+
+    def cron(
+        self,
+        expression: str | Cron,
+        commands: Iterable[tuple[Target, str]],
+    ) -> int:
+        """Schedules commands to run on a cron-like recurrence, e.g.
+        `cron('0 6 * * 1-5', [(DispositivosEnum.TERMOSTATO, 'aquecer')])`.
+
+        Args:
+            expression (str | Cron): The recurrence, see `Cron`.
+            commands (Iterable[tuple[Target, str]]): The commands,
+            as in `at`.
+
+        Raises:
+            ValueError: If the expression is not valid.
+
+        Returns:
+            int: The id of the job.
+        """
+        if isinstance(expression, str):
+            expression = Cron(expression)
+        due = expression.next_after(self.__clock())
+        return self.__add(commands, due, cron=expression)
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancels a job.
+
+        Args:
+            job_id (int): The id of the job.
+
+        Returns:
+            bool: False if there was no such job.
+        """
+        with self.__lock:
+            return self.__jobs.pop(job_id, None) is not None
+
+    def next_due(self) -> float | None:
+        """Returns when the next job is due.
+
+        Returns:
+            float | None: The time, in seconds since the epoch,
+            or None if no job is scheduled.
+        """
+        with self.__lock:
+            heap, jobs = self.__heap, self.__jobs
+            while heap and heap[0][1] not in jobs:
+                heapq.heappop(heap)
+            return heap[0][0] if heap else None
+
+    def run_pending(self) -> int:
+        """Runs the jobs due by now, in order, with a single bulk apply.
+        The recurring jobs are scheduled again. The errors of the jobs
+        are kept in `errors` instead of raised.
+
+        Returns:
+            int: The number of jobs run.
+        """
+        now = self.__clock()
+        due_jobs = []
+        with self.__lock:
+            heap, jobs = self.__heap, self.__jobs
+            while heap and heap[0][0] <= now:
+                due, job_id = heapq.heappop(heap)
+                job = jobs.get(job_id)
+                if job is None:
+                    continue
+                due_jobs.append(job)
+                try:
+                    next_due = job.next_due(now)
+                except Exception as err:
+                    self.errors.append(err)
+                    next_due = None
+                if next_due is None:
+                    del jobs[job_id]
+                else:
+                    job.due = self.__tick(next_due)
+                    heapq.heappush(heap, (job.due, job_id))
+        if due_jobs:
+            self.__apply(due_jobs)
+        return len(due_jobs)
+
+    def __apply(self, due_jobs: list[_Job]) -> None:
+        """
+        Fires the commands of some jobs with a single `control_many`
+        call. The device types are expanded to their devices.
+        """
+        house = self.__house
+        names: dict[DispositivosEnum, list[str]] = {}
+        commands = []
+        for job in due_jobs:
+            job_commands = []
+            try:
+                for target, trigger in job.commands:
+                    if isinstance(target, DispositivosEnum):
+                        if target not in names:
+                            names[target] = house.get_device_names(target)
+                        job_commands.extend(
+                            [(name, trigger) for name in names[target]],
+                        )
+                    else:
+                        job_commands.append((target, trigger))
+            except Exception as err:
+                self.errors.append(err)
+                continue
+            commands.extend(job_commands)
+        try:
+            house.control_many(commands)
+        except Exception as err:
+            self.errors.append(err)
+
+    def start(self) -> None:
+        """
+        Starts a background thread running the jobs when they are due.
+        The house is not locked: its other users must not run commands
+        at the same time, e.g. the thread is meant for a house only
+        driven by its schedule.
+        """
+        if self.__thread is not None:
+            return
+        self.__stop.clear()
+        self.__thread = threading.Thread(
+            target=self.__run,
+            name='Scheduler',
+            daemon=True,
+        )
+        self.__thread.start()
+
+    def __run(self) -> None:
+        """
+        The loop of the background thread. It sleeps until the next job
+        is due, or until a job is scheduled.
+        """
+        while not self.__stop.is_set():
+            timeout = None
+            try:
+                self.run_pending()
+                next_due = self.next_due()
+                if next_due is not None:
+                    timeout = max(0.0, next_due - self.__clock())
+            except Exception as err:
+                self.errors.append(err)
+                # Tried again on the next tick.
+                timeout = self.__resolution
+            self.__wakeup.wait(timeout)
+            self.__wakeup.clear()
+
+    def close(self) -> None:
+        """
+        Stops the background thread.
+        """
+        if self.__thread is not None:
+            self.__stop.set()
+            self.__wakeup.set()
+            self.__thread.join()
+            self.__thread = None
@@ -0,0 +1,265 @@
+from __future__ import annotations
+import shlex
+import sys
+from fnmatch import filter as fnfilter
+from typing import TYPE_CHECKING, Iterable, TextIO
+from dispositivos.dispositivo_factory import DispositivosEnum
+if TYPE_CHECKING:
+    from casa_inteligente import CasaInteligente
+
+HELP = '''\
+Commands, one per line (`#` starts a comment):
+  on <name|pattern>             turns lights on
+  off <name|pattern>            turns lights off
+  set <name|pattern> <trigger>  fires a trigger, e.g. `set termo1 aquecer`
+  status [--type TYPE] [name|pattern]
+  lights                        lists the lights turned on
+  add <TYPE> <name>             pairs a device
+  remove <name>                 removes a device
+Patterns are shell-style, as in `luz-*`. Quote names with spaces.
+'''
+
+
+def _is_pattern(target: str) -> bool:
+    """
+    Whether a command target is a shell-style pattern.
+    """
+    return any(char in target for char in '*?[')
+
+
+class ScriptRunner:
+    """
+    Runs a script of commands against a `CasaInteligente`, without
+    menus or prompts, e.g. from `main.py --script commands.txt` or
+    from a pipe.
+
+    The commands that fire triggers (`on`, `off` and `set`) are
+    collected, and applied with a single `CasaInteligente.control_many`
+    call when another kind of command comes, when the batch is full,
+    or at the end of the script. Their observers get one digest per
+    batch. The output is buffered and written in large chunks.
+
+    Attributes:
+        __house (CasaInteligente): The house.
+        __out (TextIO): Where the output is written.
+        __batch_size (int): The maximum number of triggers in a batch.
+        __pending (list[tuple[str, str]]): The `(device, trigger)`
+        commands of the current batch.
+        __lines (list[int | None]): The script line of each pending
+        command named explicitly, or None if it came from a pattern.
+        __names (dict[DispositivosEnum | None, list[str]]): The device
+        names by type, cached for the pattern expansion until a device
+        is added or removed.
+        __output (list[str]): The buffered output.
+        errors (int): The number of commands that failed.
+    """
+
+    __OUTPUT_CHUNK = 1 << 10
+
+    def __init__(
+        self,
+        house: CasaInteligente,
+        out: TextIO = sys.stdout,
+        batch_size: int = 4096,
+    ) -> None:
+        """
+        Constructor method for the `ScriptRunner` class.
+
+        Args:
+            house (CasaInteligente): The house.
+            out (TextIO, optional): Where the output is written.
+            Defaults to `sys.stdout`.
+            batch_size (int, optional): The maximum number of triggers
+            applied at once. Defaults to 4096.
+        """
+        self.__house = house
+        self.__out = out
+        self.__batch_size = batch_size
+        self.__pending: list[tuple[str, str]] = []
+        self.__lines: list[int | None] = []
+        self.__names: dict[DispositivosEnum | None, list[str]] = {}
+        self.__output: list[str] = []
+        self.errors = 0
+
+    def run(self, lines: Iterable[str]) -> int:
+        """Runs the commands of a script.
+
+        Args:
+            lines (Iterable[str]): The lines of the script,
+            e.g. an open file.
+
+        Returns:
+            int: The number of commands that failed.
+        """
+        try:
+            for number, line in enumerate(lines, 1):
+                self.__run_line(number, line)
+        finally:
+            self.__flush_batch()
+            self.__flush_output()
+        return self.errors
+
+    def __write(self, text: str) -> None:
+        """
+        Buffers a line of output.
+        """
+        self.__output.append(text)
+        if len(self.__output) >= self.__OUTPUT_CHUNK:
+            self.__flush_output()
+
+    def __flush_output(self) -> None:
+        """
+        Writes the buffered output.
+        """
+        if self.__output:
+            self.__out.write('\n'.join(self.__output) + '\n')
+            self.__output.clear()
+        self.__out.flush()
+
+    def __error(self, number: int, message: str) -> None:
+        """
+        Reports a command that failed.
+        """
+        self.errors += 1
+        self.__write(f'error: line {number}: {message}')
+
+    def __run_line(self, number: int, line: str) -> None:
+        """
+        Parses and runs one line of the script.
+        """
+        line = line.strip()
+        if not line or line.startswith('#'):
+            return
+        if '"' in line or "'" in line or '#' in line:
+            try:
+                words = shlex.split(line, comments=True)
+            except ValueError as err:
+                self.__error(number, str(err))
+                return
+            if not words:
+                return
+        else:
+            words = line.split()
+        command, args = words[0].lower(), words[1:]
+        if command in ('on', 'off') and len(args) == 1:
+            trigger = 'ligar' if command == 'on' else 'desligar'
+            self.__fire(number, args[0], trigger, DispositivosEnum.LUZ)
+        elif command == 'set' and len(args) == 2:
+            self.__fire(number, args[0], args[1], None)
+        else:
+            self.__flush_batch()
+            self.__run_command(number, command, args)
+
+    def __fire(
+        self,
+        number: int,
+        target: str,
+        trigger: str,
+        device_type: DispositivosEnum | None,
+    ) -> None:
+        """
+        Adds the commands of a trigger to the batch.
+        """
+        if _is_pattern(target):
+            for name in fnfilter(self.__names_of(device_type), target):
+                self.__pending.append((name, trigger))
+                self.__lines.append(None)
+        else:
+            self.__pending.append((target, trigger))
+            self.__lines.append(number)
+        if len(self.__pending) >= self.__batch_size:
+            self.__flush_batch()
+
+    def __flush_batch(self) -> None:
+        """
+        Applies the batch of triggers.
+        """
+        if not self.__pending:
+            return
+        # The observers print their notifications directly, so the
+        # output so far goes first.
+        self.__flush_output()
+        results = self.__house.control_many(self.__pending)
+        for (name, trigger), number, applied in zip(
+            self.__pending, self.__lines, results,
+        ):
+            if not applied and number is not None:
+                self.__error(number, f"can't {trigger} {name}")
+        self.__pending = []
+        self.__lines = []
+
+    def __names_of(self, device_type: DispositivosEnum | None) -> list[str]:
+        """
+        The names of the devices of a type, or of all of them.
+        """
+        names = self.__names.get(device_type)
+        if names is None:
+            names = self.__names[device_type] = (
+                self.__house.get_device_names(device_type)
+            )
+        return names
+
+    def __run_command(
+        self,
+        number: int,
+        command: str,
+        args: list[str],
+    ) -> None:
+        """
+        Runs a command that is not batched.
+        """
+        if command == 'status':
+            self.__status(number, args)
+        elif command == 'lights' and not args:
+            for light in self.__house.get_lights_on():
+                self.__write(f'{light.name}\t\t {light.state.name}')
+        elif command == 'add' and len(args) == 2:
+            try:
+                device_type = DispositivosEnum[args[0].upper()]
+            except KeyError:
+                self.__error(number, f'unknown device type {args[0]}')
+                return
+            rejected = self.__house.add_devices(
+                [(device_type, args[1], None)],
+            )
+            for name, reason in rejected:
+                self.__error(number, f'{name}: {reason}')
+            self.__names.clear()
+        elif command == 'remove' and len(args) == 1:
+            if not self.__house.remove_device_by_name(args[0]):
+                self.__error(number, f'unknown device {args[0]}')
+            self.__names.clear()
+        elif command == 'help':
+            self.__write(HELP.rstrip('\n'))
+        else:
+            self.__error(
+                number, 'invalid command: ' + ' '.join([command, *args]),
+            )
+
+    def __status(self, number: int, args: list[str]) -> None:
+        """
+        Lists the states of the devices, optionally of one type
+        and whose names match a pattern.
+        """
+        device_type = None
+        if len(args) >= 2 and args[0] == '--type':
+            try:
+                device_type = DispositivosEnum[args[1].upper()]
+            except KeyError:
+                self.__error(number, f'unknown device type {args[1]}')
+                return
+            args = args[2:]
+        if len(args) > 1:
+            self.__error(number, 'usage: status [--type TYPE] [pattern]')
+            return
+        states = self.__house.get_device_states(device_type)
+        if args:
+            pattern = args[0]
+            if _is_pattern(pattern):
+                names = set(fnfilter([name for name, _ in states], pattern))
+            else:
+                names = {pattern}
+            states = [(name, state) for name, state in states
+                      if name in names]
+        for name, state in states:
+            self.__write(f'{name}\t\t {state.name}')
@@ -0,0 +1,272 @@
+from __future__ import annotations
+from collections import Counter
+from itertools import islice
+from typing import TYPE_CHECKING, Iterable, Iterator, NamedTuple, Optional
+from dispositivos.dispositivo import State
+from dispositivos.dispositivo_factory import DispositivosEnum
+from dispositivos.sistema_seguranca import SisSegState
+if TYPE_CHECKING:
+    from casa_inteligente import CasaInteligente
+
+# The sensors on the doors and windows, which guard the house while
+# people are inside, and the ones inside the house.
+PERIMETER = frozenset({'porta', 'janela'})
+INTERIOR = frozenset({'movimento'})
+# An armed zone: its system, the state of the system, and the sensor
+# kinds it watches, or None for all of them.
+_ArmedZone = tuple[str, State, Optional[frozenset[str]]]
+
+
+class Reading(NamedTuple):
+    """
+    A reading of a sensor. Plain tuples with the same fields work too.
+
+    Attributes:
+        zone (str): The zone of the sensor, e.g. `sala`.
+        sensor (str): The id of the sensor.
+        kind (str): The kind of the sensor, e.g. `porta` or `movimento`.
+        active (bool): Whether the sensor was tripped, e.g. a door
+        opened or a motion detected.
+    """
+
+    zone: str
+    sensor: str
+    kind: str
+    active: bool
+
+
+class Alarm(NamedTuple):
+    """
+    An alarm raised by a security system.
+
+    Attributes:
+        system (str): The name of the security system.
+        zone (str): The zone of the sensor.
+        sensor (str): The id of the sensor.
+        kind (str): The kind of the sensor.
+        state (State): The armed state of the system.
+    """
+
+    system: str
+    zone: str
+    sensor: str
+    kind: str
+    state: State
+
+
+def batched(
+    readings: Iterable[tuple[str, str, str, bool]],
+    size: int = 4096,
+) -> Iterator[list[tuple[str, str, str, bool]]]:
+    """Splits a stream of readings into batches, e.g. to feed
+    `SensorPipeline.ingest` from a socket or a file.
+
+    Args:
+        readings (Iterable[tuple[str, str, str, bool]]): The readings.
+        size (int, optional): The size of the batches. Defaults to 4096.
+
+    Yields:
+        list[tuple[str, str, str, bool]]: The batches.
+    """
+    iterator = iter(readings)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class SensorPipeline:
+    """
+    Feeds the readings of door, window and motion sensors to the
+    `SistemaSeguranca` devices of a `CasaInteligente`, and raises alarms.
+
+    Each zone belongs to a security system. A reading of a tripped
+    sensor raises an alarm when its system is armed for that kind of
+    sensor: `ARMADO_COM_GENTE` only watches the `PERIMETER` sensors,
+    since people move inside the house, and `ARMADO_SEM_NINGUEM` watches
+    all of them. A disarmed system ignores its sensors.
+
+    The readings come in batches. The zones to watch, and the sensor
+    kinds of each, are resolved from the states of the systems when a
+    device of the house changed since the previous batch, so each
+    reading costs a couple of lookups. A sensor tripped
+    many times in a batch raises a single alarm, and the alarms of a
+    batch are published together with `CasaInteligente.publish_many`,
+    to `alarm.<system>.<zone>`, so each observer gets a single digest.
+
+    Attributes:
+        __house (CasaInteligente): The house.
+        __zones (dict[str, str]): The security system of each zone.
+        __watched (dict[State, frozenset[str] | None]): The sensor kinds
+        watched in each armed state, or None for all of them.
+        __armed (dict[str, _ArmedZone]): The zones whose system is armed,
+        cached until the `version` of the house or the zones change.
+        __armed_version (int | None): The version of the house `__armed`
+        was resolved at, or None if it is stale.
+        stats (Counter[str]): The number of `readings`, of readings of
+        `unknown` zones, of readings `ignored` by their system, and of
+        `alarms` raised.
+    """
+
+    def __init__(
+        self,
+        house: CasaInteligente,
+        stay_kinds: frozenset[str] | None = PERIMETER,
+        away_kinds: frozenset[str] | None = None,
+    ) -> None:
+        """
+        Constructor method for the `SensorPipeline` class.
+
+        Args:
+            house (CasaInteligente): The house.
+            stay_kinds (frozenset[str] | None, optional): The sensor kinds
+            watched in `ARMADO_COM_GENTE`, or None for all of them.
+            Defaults to `PERIMETER`.
+            away_kinds (frozenset[str] | None, optional): The sensor kinds
+            watched in `ARMADO_SEM_NINGUEM`, or None for all of them.
+            Defaults to None.
+        """
+        self.__house = house
+        self.__zones: dict[str, str] = {}
+        self.__watched: dict[State, frozenset[str] | None] = {
+            SisSegState.ARMADO_COM_GENTE: stay_kinds,
+            SisSegState.ARMADO_SEM_NINGUEM: away_kinds,
+        }
+        self.__armed: dict[str, _ArmedZone] = {}
+        self.__armed_version: int | None = None
+        self.stats: Counter[str] = Counter(
+            readings=0, unknown=0, ignored=0, alarms=0,
+        )
+
+    def assign_zone(self, zone: str, system: str) -> None:
+        """Makes a security system watch the sensors of a zone.
+
+        Args:
+            zone (str): The zone.
+            system (str): The name of the security system.
+
+        Raises:
+            ValueError: If there is no security system with that name.
+        """
+        device_type = self.__house.get_device_type(system)
+        if device_type is not DispositivosEnum.SISTEMA_SEGURANCA:
+            raise ValueError(f'There is no security system named {system}.')
+        self.__zones[zone] = system
+        self.__armed_version = None
+
+    def remove_zone(self, zone: str) -> bool:
+        """Stops watching the sensors of a zone.
+
+        Args:
+            zone (str): The zone.
+
+        Returns:
+            bool: False if the zone was not watched.
+        """
+        self.__armed_version = None
+        return self.__zones.pop(zone, None) is not None
+
+    def zones(self, system: str | None = None) -> list[str]:
+        """Lists the zones watched, optionally by one system.
+
+        Args:
+            system (str | None, optional): The name of a security system.
+            Defaults to None, for all of them.
+
+        Returns:
+            list[str]: The zones.
+        """
+        return [zone for zone, owner in self.__zones.items()
+                if system is None or owner == system]
+
+    def __armed_zones(self) -> dict[str, _ArmedZone]:
+        """
+        The zones whose system is armed, with the system, its state and
+        the sensor kinds it watches.
+        """
+        version = self.__house.version
+        if version == self.__armed_version:
+            return self.__armed
+        get_state = self.__house.get_device_state
+        watched = self.__watched
+        states: dict[str, State | None] = {}
+        armed = {}
+        for zone, system in self.__zones.items():
+            if system not in states:
+                states[system] = get_state(system)
+            state = states[system]
+            if state in watched:
+                armed[zone] = (system, state, watched[state])
+        self.__armed, self.__armed_version = armed, version
+        return armed
+
+    def process(
+        self,
+        readings: Iterable[tuple[str, str, str, bool]],
+    ) -> list[Alarm]:
+        """Evaluates a batch of readings, and publishes its alarms.
+
+        Args:
+            readings (Iterable[tuple[str, str, str, bool]]): The zone,
+            sensor id, kind and whether it was tripped, of each reading.
+
+        Returns:
+            list[Alarm]: The alarms raised, one per tripped sensor.
+        """
+        armed = self.__armed_zones()
+        zones = self.__zones
+        alarms: dict[tuple[str, str], Alarm] = {}
+        count = unknown = ignored = 0
+        for zone, sensor, kind, active in readings:
+            count += 1
+            if not active:
+                continue
+            target = armed.get(zone)
+            if target is None:
+                if zone in zones:
+                    ignored += 1
+                else:
+                    unknown += 1
+                continue
+            system, state, kinds = target
+            if kinds is not None and kind not in kinds:
+                ignored += 1
+                continue
+            if (zone, sensor) not in alarms:
+                alarms[(zone, sensor)] = Alarm(
+                    system, zone, sensor, kind, state,
+                )
+        stats = self.stats
+        stats['readings'] += count
+        stats['unknown'] += unknown
+        stats['ignored'] += ignored
+        stats['alarms'] += len(alarms)
+        if alarms:
+            self.__house.publish_many([
+                (
+                    alarm.system,
+                    ('alarm', alarm.system, alarm.zone),
+                    {'zone': alarm.zone, 'sensor': alarm.sensor,
+                     'kind': alarm.kind},
+                )
+                for alarm in alarms.values()
+            ])
+        return list(alarms.values())
+
+    def ingest(
+        self,
+        batches: Iterable[Iterable[tuple[str, str, str, bool]]],
+    ) -> Iterator[list[Alarm]]:
+        """Processes a stream of batches of readings, lazily, e.g.
+        `for alarms in pipeline.ingest(batched(readings)): ...`.
+
+        Args:
+            batches (Iterable[Iterable[tuple[str, str, str, bool]]]):
+            The batches.
+
+        Yields:
+            list[Alarm]: The alarms of each batch.
+        """
+        for batch in batches:
+            yield self.process(batch)
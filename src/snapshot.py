@@ -0,0 +1,411 @@
+from __future__ import annotations
+import os
+import tempfile
+import threading
+from array import array
+from struct import Struct
+from typing import TYPE_CHECKING
+from dispositivos.dispositivo import State
+from dispositivos.dispositivo_factory import (
+    DispositivoFactory,
+    DispositivosEnum,
+)
+from observers.celular import Celular
+from observers.email import EMail
+from observers.event_bus import Topic
+from observers.observer import Observer
+if TYPE_CHECKING:
+    from casa_inteligente import CasaInteligente
+
+# magic, version, devices, observers, subscriptions, patterns
+_HEADER = Struct('<4sBIIII')
+_MAGIC = b'CASA'
+_VERSION = 1
+_TYPE_SHIFT = 4
+_STATE_MASK = 0x0F
+# The observer types that can be saved, with their code, and the
+# attribute holding the argument of their constructor.
+_OBSERVER_KINDS: dict[type[Observer], tuple[int, str]] = {
+    Celular: (1, 'number'),
+    EMail: (2, 'address'),
+}
+_OBSERVER_TYPES = {code: cls for cls, (code, _) in _OBSERVER_KINDS.items()}
+_states_cache: dict[DispositivosEnum, tuple[State, ...]] = {}
+
+
+def _states_of(device_type: DispositivosEnum) -> tuple[State, ...]:
+    """
+    The states of a device type, indexed by state code.
+    """
+    states = _states_cache.get(device_type)
+    if states is None:
+        cls = DispositivoFactory.classe_dispositivo(device_type)
+        states = _states_cache[device_type] = tuple(cls._table.states)
+    return states
+
+
+def _pack_strings(strings: list[str]) -> bytes:
+    """
+    Encodes strings as their UTF-8 lengths followed by their bytes.
+    """
+    encoded = [string.encode('utf-8') for string in strings]
+    lengths = array('I', map(len, encoded))
+    blob = b''.join(encoded)
+    return lengths.tobytes() + Struct('<I').pack(len(blob)) + blob
+
+
+def _unpack_strings(
+    data: memoryview,
+    offset: int,
+    count: int,
+) -> tuple[list[str], int]:
+    """
+    Decodes `count` strings packed by `_pack_strings` at `offset`,
+    returning them with the offset after them.
+    """
+    lengths = array('I')
+    lengths.frombytes(data[offset:offset + count * lengths.itemsize])
+    offset += count * lengths.itemsize
+    (size,) = Struct('<I').unpack_from(data, offset)
+    offset += 4
+    raw = bytes(data[offset:offset + size])
+    offset += size
+    text = raw.decode('utf-8')
+    strings = []
+    start = 0
+    # The lengths count bytes, so the decoded text can only be sliced
+    # directly when it is plain ASCII.
+    if len(text) == size:
+        for length in lengths:
+            strings.append(text[start:start + length])
+            start += length
+    else:
+        for length in lengths:
+            strings.append(raw[start:start + length].decode('utf-8'))
+            start += length
+    return strings, offset
+
+
+def _unpack_ints(
+    data: memoryview,
+    offset: int,
+    count: int,
+) -> tuple[array, int]:
+    """
+    Decodes `count` unsigned ints at `offset`,
+    returning them with the offset after them.
+    """
+    ints = array('I')
+    ints.frombytes(data[offset:offset + count * ints.itemsize])
+    return ints, offset + count * ints.itemsize
+
+
+class Snapshot:
+    """
+    A snapshot of the devices of a `CasaInteligente`, with their
+    names, types and states, and of the observers subscribed to them.
+
+    The binary format is columnar: a header with the counts, the
+    device names, one byte per device with its type code in the high
+    nibble and its state code in the low nibble (as in the
+    `DeviceStateStore`), the observers, and the subscriptions as pairs
+    of indexes, so a snapshot is read with a few bulk `frombytes` calls.
+
+    Only the observers of the types that can be saved, see `savable`,
+    are part of a snapshot. The others, such as the clients of the
+    `/events` stream of the HTTP server, are transient: they are left
+    out, and only counted in `skipped`.
+
+    Attributes:
+        names (list[str]): The names of the devices, in pairing order.
+        codes (bytes): The `type << 4 | state` code of each device.
+        observers (list[Observer]): The subscribed observers.
+        subscriptions (list[tuple[int, int]]): The subscriptions to the
+        devices, as observer and device indexes.
+        patterns (list[tuple[int, Topic]]): The subscriptions to topic
+        patterns, as observer index and pattern.
+        skipped (int): The number of observers left out, as they can't
+        be saved. It is not saved itself.
+    """
+
+    def __init__(
+        self,
+        names: list[str],
+        codes: bytes,
+        observers: list[Observer],
+        subscriptions: list[tuple[int, int]],
+        patterns: list[tuple[int, Topic]],
+        skipped: int = 0,
+    ) -> None:
+        """
+        Constructor method for the `Snapshot` class.
+
+        Args:
+            names (list[str]): The names of the devices.
+            codes (bytes): The `type << 4 | state` code of each device.
+            observers (list[Observer]): The subscribed observers.
+            subscriptions (list[tuple[int, int]]): The observer and
+            device indexes of each subscription to a device.
+            patterns (list[tuple[int, Topic]]): The observer index and
+            the pattern of each subscription to a topic pattern.
+            skipped (int, optional): The number of observers left out.
+            Defaults to 0.
+        """
+        self.names = names
+        self.codes = codes
+        self.observers = observers
+        self.subscriptions = subscriptions
+        self.patterns = patterns
+        self.skipped = skipped
+
+    @staticmethod
+    def savable(observer: Observer) -> bool:
+        """Tells whether an observer can be part of a snapshot.
+
+        Args:
+            observer (Observer): The observer.
+
+        Returns:
+            bool: True if the type of the observer can be saved.
+        """
+        return type(observer) in _OBSERVER_KINDS
+
+    @staticmethod
+    def code(device_type: DispositivosEnum, state: State) -> int:
+        """Encodes the type and the state of a device.
+
+        Args:
+            device_type (DispositivosEnum): The type of the device.
+            state (State): The state of the device.
+
+        Returns:
+            int: The code.
+        """
+        return (
+            device_type.value << _TYPE_SHIFT
+            | _states_of(device_type).index(state)
+        )
+
+    def devices(self) -> list[tuple[str, DispositivosEnum, State]]:
+        """Decodes the devices of the snapshot.
+
+        Returns:
+            list[tuple[str, DispositivosEnum, State]]: The name, type
+            and state of each device, in pairing order.
+        """
+        decoded = {}
+        for code in set(self.codes):
+            device_type = DispositivosEnum(code >> _TYPE_SHIFT)
+            decoded[code] = (
+                device_type,
+                _states_of(device_type)[code & _STATE_MASK],
+            )
+        return [(name, *decoded[code])
+                for name, code in zip(self.names, self.codes)]
+
+    def dumps(self) -> bytes:
+        """Encodes the snapshot.
+
+        Raises:
+            ValueError: If an observer is of a type that can't be saved.
+
+        Returns:
+            bytes: The encoded snapshot.
+        """
+        kinds = bytearray()
+        arguments = []
+        for observer in self.observers:
+            kind = _OBSERVER_KINDS.get(type(observer))
+            if kind is None:
+                raise ValueError(
+                    f"Can't save an observer of type "
+                    f'{type(observer).__name__}.'
+                )
+            kinds.append(kind[0])
+            arguments.append(getattr(observer, kind[1]))
+        parts = [
+            _HEADER.pack(
+                _MAGIC,
+                _VERSION,
+                len(self.names),
+                len(self.observers),
+                len(self.subscriptions),
+                len(self.patterns),
+            ),
+            _pack_strings(self.names),
+            bytes(self.codes),
+            bytes(kinds),
+            _pack_strings(arguments),
+            array('I', [obs for obs, _ in self.subscriptions]).tobytes(),
+            array('I', [dev for _, dev in self.subscriptions]).tobytes(),
+            array('I', [obs for obs, _ in self.patterns]).tobytes(),
+            _pack_strings(
+                ['\0'.join(pattern) for _, pattern in self.patterns],
+            ),
+        ]
+        return b''.join(parts)
+
+    @classmethod
+    def loads(cls, data: bytes) -> Snapshot:
+        """Decodes a snapshot.
+
+        Args:
+            data (bytes): The encoded snapshot.
+
+        Raises:
+            ValueError: If the data is not a snapshot of a known version.
+
+        Returns:
+            Snapshot: The snapshot.
+        """
+        view = memoryview(data)
+        if len(view) < _HEADER.size:
+            raise ValueError('Not a snapshot.')
+        magic, version, n_devices, n_observers, n_subs, n_patterns = (
+            _HEADER.unpack_from(view)
+        )
+        if magic != _MAGIC:
+            raise ValueError('Not a snapshot.')
+        if version != _VERSION:
+            raise ValueError(f'Unknown snapshot version {version}.')
+        offset = _HEADER.size
+        names, offset = _unpack_strings(view, offset, n_devices)
+        codes = bytes(view[offset:offset + n_devices])
+        offset += n_devices
+        kinds = bytes(view[offset:offset + n_observers])
+        offset += n_observers
+        arguments, offset = _unpack_strings(view, offset, n_observers)
+        observers = [_OBSERVER_TYPES[kind](argument)
+                     for kind, argument in zip(kinds, arguments)]
+        sub_observers, offset = _unpack_ints(view, offset, n_subs)
+        sub_devices, offset = _unpack_ints(view, offset, n_subs)
+        pattern_observers, offset = _unpack_ints(view, offset, n_patterns)
+        patterns, offset = _unpack_strings(view, offset, n_patterns)
+        return cls(
+            names,
+            codes,
+            observers,
+            list(zip(sub_observers, sub_devices)),
+            [(observer, tuple(pattern.split('\0')))
+             for observer, pattern in zip(pattern_observers, patterns)],
+        )
+
+    def save(self, path: str) -> None:
+        """Writes the snapshot atomically: to a temporary file
+        next to `path`, which then replaces it, so a crash never
+        leaves a partial snapshot behind.
+
+        Args:
+            path (str): The path of the snapshot.
+        """
+        data = self.dumps()
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory, prefix='.snapshot-', suffix='.tmp',
+        )
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> Snapshot:
+        """Reads a snapshot saved with `save`.
+
+        Args:
+            path (str): The path of the snapshot.
+
+        Raises:
+            ValueError: If the file is not a snapshot of a known version.
+
+        Returns:
+            Snapshot: The snapshot.
+        """
+        with open(path, 'rb') as file:
+            return cls.loads(file.read())
+
+
+class PeriodicSnapshot:
+    """
+    Saves snapshots of a `CasaInteligente` periodically, in a
+    background thread. The state of the house is captured without
+    locking it, and the encoding and writing happen in the thread,
+    so the commands keep running while a snapshot is saved.
+
+    Attributes:
+        __house (CasaInteligente): The house.
+        __path (str): The path of the snapshots.
+        __interval (float): The time between two snapshots, in seconds.
+        errors (list[Exception]): The errors of the failed snapshots.
+    """
+
+    def __init__(
+        self,
+        house: CasaInteligente,
+        path: str,
+        interval: float = 60.0,
+    ) -> None:
+        """
+        Constructor method for the `PeriodicSnapshot` class.
+
+        Args:
+            house (CasaInteligente): The house.
+            path (str): The path of the snapshots.
+            interval (float, optional): The time between two snapshots,
+            in seconds. Defaults to 60.
+        """
+        self.__house = house
+        self.__path = path
+        self.__interval = interval
+        self.__stop = threading.Event()
+        self.__thread: threading.Thread | None = None
+        self.errors: list[Exception] = []
+
+    def start(self) -> None:
+        """
+        Starts the background thread.
+        """
+        if self.__thread is not None:
+            return
+        self.__stop.clear()
+        self.__thread = threading.Thread(
+            target=self.__run,
+            name='PeriodicSnapshot',
+            daemon=True,
+        )
+        self.__thread.start()
+
+    def __run(self) -> None:
+        """
+        The loop of the background thread.
+        """
+        while not self.__stop.wait(self.__interval):
+            self.save()
+
+    def save(self) -> bool:
+        """Saves a snapshot of the house now.
+
+        Returns:
+            bool: False if the snapshot failed, see `errors`.
+        """
+        try:
+            self.__house.snapshot().save(self.__path)
+        except (OSError, ValueError, RuntimeError) as err:
+            self.errors.append(err)
+            return False
+        return True
+
+    def close(self) -> None:
+        """
+        Stops the background thread, and saves a last snapshot.
+        """
+        if self.__thread is not None:
+            self.__stop.set()
+            self.__thread.join()
+            self.__thread = None
+        self.save()
@@ -0,0 +1,30 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from casa_inteligente import CasaInteligente  # noqa: E402
+from dispositivos.dispositivo_factory import DispositivosEnum  # noqa: E402
+from tests.recorder import Recorder  # noqa: E402
+
+
+@pytest.fixture
+def recorder() -> Recorder:
+    return Recorder()
+
+
+@pytest.fixture
+def house() -> CasaInteligente:
+    """
+    A house with three lights and a thermostat, all in their initial
+    state.
+    """
+    house = CasaInteligente(10, singleton=False)
+    house.add_devices([
+        (DispositivosEnum.LUZ, 'luz1', None),
+        (DispositivosEnum.LUZ, 'luz2', None),
+        (DispositivosEnum.LUZ, 'luz3', None),
+        (DispositivosEnum.TERMOSTATO, 'termo', None),
+    ])
+    return house
@@ -0,0 +1,28 @@
+import threading
+
+from observers.observer import Observer
+
+
+class Recorder(Observer):
+    """
+    An observer that records its notifications and its batches.
+    """
+
+    def __init__(self, fail: bool = False) -> None:
+        super().__init__()
+        self.events: list[dict] = []
+        self.batches: list[list[dict]] = []
+        self.fail = fail
+        self.delivered = threading.Event()
+
+    def notify(self, *args, **kwargs) -> None:
+        if self.fail:
+            raise RuntimeError('The observer failed.')
+        self.events.append(kwargs)
+        self.delivered.set()
+
+    def notify_batch(self, events: list[dict]) -> None:
+        if self.fail:
+            raise RuntimeError('The observer failed.')
+        self.batches.append(list(events))
+        self.delivered.set()
@@ -0,0 +1,109 @@
+import threading
+
+import pytest
+
+from dispositivos.luz import LuzState
+from observers.async_dispatcher import AsyncDispatcher, OverflowPolicy
+from tests.recorder import Recorder
+
+
+class GatedRecorder(Recorder):
+    """
+    A recorder whose first notification waits for `release`,
+    so the events queued meanwhile pile up.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def notify(self, *args, **kwargs) -> None:
+        if not self.started.is_set():
+            self.started.set()
+            self.release.wait(5)
+        super().notify(*args, **kwargs)
+
+
+@pytest.fixture
+def gated():
+    """
+    Yields a gated recorder, already blocked on its first event,
+    and a dispatcher whose queues hold two events.
+    """
+    def build(overflow: OverflowPolicy):
+        dispatcher = AsyncDispatcher(max_queue=2, overflow=overflow)
+        dispatchers.append(dispatcher)
+        observer = GatedRecorder()
+        dispatcher.dispatch(None, [observer], {'n': 0})
+        assert observer.started.wait(5)
+        return dispatcher, observer
+
+    dispatchers = []
+    yield build
+    for dispatcher in dispatchers:
+        dispatcher.close()
+
+
+def _deliver(dispatcher, observer):
+    observer.release.set()
+    dispatcher.join(timeout=5)
+    return [event['n'] for event in observer.events]
+
+
+def test_events_are_delivered_in_order(house, recorder):
+    dispatcher = AsyncDispatcher()
+    house.set_dispatcher(dispatcher)
+    house.add_observer(recorder, 'luz1')
+    light = house.get_device('luz1')
+    try:
+        for _ in range(10):
+            light.ligar()
+            light.desligar()
+        dispatcher.join(timeout=5)
+    finally:
+        dispatcher.close()
+    assert [event['state'] for event in recorder.events] == [
+        LuzState.LIGADA, LuzState.DESLIGADA,
+    ] * 10
+    assert dispatcher.dropped == 0
+
+
+def test_drop_oldest(gated):
+    dispatcher, observer = gated(OverflowPolicy.DROP_OLDEST)
+    for n in range(1, 5):
+        dispatcher.dispatch(None, [observer], {'n': n})
+    assert _deliver(dispatcher, observer) == [0, 3, 4]
+    assert dispatcher.dropped == 2
+
+
+def test_coalesce_replaces_the_newest_event(gated):
+    dispatcher, observer = gated(OverflowPolicy.COALESCE)
+    for n in range(1, 5):
+        dispatcher.dispatch(None, [observer], {'n': n})
+    assert _deliver(dispatcher, observer) == [0, 1, 4]
+    assert dispatcher.dropped == 2
+
+
+def test_coalesce_never_replaces_a_batch(gated):
+    dispatcher, observer = gated(OverflowPolicy.COALESCE)
+    dispatcher.dispatch(None, [observer], {'n': 1})
+    dispatcher.dispatch(None, [observer], {'n': 2})
+    dispatcher.dispatch_batch(observer, [{'n': 3}])
+    dispatcher.dispatch(None, [observer], {'n': 4})
+    dispatcher.dispatch(None, [observer], {'n': 5})
+    assert _deliver(dispatcher, observer) == [0, 5]
+    assert observer.batches == [[{'n': 3}]]
+    assert dispatcher.dropped == 3
+
+
+def test_failures_are_counted():
+    dispatcher = AsyncDispatcher()
+    failing, recorder = Recorder(fail=True), Recorder()
+    try:
+        dispatcher.dispatch(None, [failing, recorder], {'n': 0})
+        dispatcher.join(timeout=5)
+    finally:
+        dispatcher.close()
+    assert dispatcher.errors == 1
+    assert recorder.events == [{'n': 0}]
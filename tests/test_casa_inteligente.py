@@ -0,0 +1,103 @@
+from dispositivos.dispositivo_factory import DispositivosEnum
+from dispositivos.luz import LuzState
+from dispositivos.termostato import TermostatoState
+
+
+def _lights_on(house) -> list[str]:
+    return [light.name for light in house.get_lights_on()]
+
+
+def test_devices_by_type(house):
+    assert house.get_device_names(DispositivosEnum.LUZ) == [
+        'luz1', 'luz2', 'luz3',
+    ]
+    assert house.get_device_states(DispositivosEnum.TERMOSTATO) == [
+        ('termo', TermostatoState.DESLIGADO),
+    ]
+    assert house.get_device_names(DispositivosEnum.SISTEMA_SEGURANCA) == []
+
+
+def test_lights_on_follow_the_transitions(house):
+    assert _lights_on(house) == []
+    house.get_device('luz2').ligar()
+    assert _lights_on(house) == ['luz2']
+    house.turn_lights_on()
+    assert sorted(_lights_on(house)) == ['luz1', 'luz2', 'luz3']
+    house.get_device('luz1').desligar()
+    assert sorted(_lights_on(house)) == ['luz2', 'luz3']
+    house.remove_device_by_name('luz3')
+    assert _lights_on(house) == ['luz2']
+    house.turn_lights_off()
+    assert _lights_on(house) == []
+
+
+def test_lights_paired_on_are_tracked(house):
+    house.add_devices([(DispositivosEnum.LUZ, 'luz4', LuzState.LIGADA)])
+    assert _lights_on(house) == ['luz4']
+
+
+def test_count_and_find_by_state(house):
+    house.turn_lights_on()
+    house.get_device('luz1').desligar()
+    assert house.count_devices(DispositivosEnum.LUZ, LuzState.LIGADA) == 2
+    assert [light.name for light in house.get_devices_by_state(
+        DispositivosEnum.LUZ, LuzState.DESLIGADA,
+    )] == ['luz1']
+
+
+def test_control_many(house, recorder):
+    house.subscribe(recorder, '#')
+    results = house.control_many([
+        ('luz1', 'ligar'),
+        ('luz1', 'ligar'),
+        ('nada', 'ligar'),
+        ('luz2', 'aquecer'),
+        ('termo', 'esfriar'),
+    ])
+    assert results == [True, False, False, False, True]
+    assert house.get_device_state('termo') is TermostatoState.ESFRIANDO
+    [batch] = recorder.batches
+    assert [(event['device'], event['state']) for event in batch] == [
+        ('luz1', LuzState.LIGADA), ('termo', TermostatoState.ESFRIANDO),
+    ]
+
+
+def test_broadcast(house):
+    house.get_device('luz2').ligar()
+    assert house.broadcast(DispositivosEnum.LUZ, 'ligar') == {
+        'luz1': True, 'luz2': False, 'luz3': True,
+    }
+    assert house.broadcast(
+        DispositivosEnum.LUZ, 'desligar',
+        predicate=lambda light: light.name != 'luz3',
+    ) == {'luz1': True, 'luz2': True, 'luz3': False}
+    assert _lights_on(house) == ['luz3']
+    assert house.broadcast(DispositivosEnum.SISTEMA_SEGURANCA, 'x') == {}
+
+
+def test_report_changes_cursors(house):
+    cursor, changes = house.report_changes()
+    assert [name for name, _ in changes] == ['luz1', 'luz2', 'luz3', 'termo']
+    assert house.report_changes(cursor) == (cursor, [])
+
+    house.control_many([('luz2', 'ligar'), ('termo', 'aquecer')])
+    house.control_many([('luz2', 'desligar')])
+    cursor, changes = house.report_changes(cursor)
+    assert changes == [
+        ('termo', TermostatoState.AQUECENDO),
+        ('luz2', LuzState.DESLIGADA),
+    ]
+    assert cursor == house.version
+
+
+def test_report_changes_forgets_removed_devices(house):
+    cursor, _ = house.report_changes()
+    house.remove_device_by_name('luz1')
+    house.add_devices([(DispositivosEnum.LUZ, 'luz4', None)])
+    assert house.report_changes(cursor)[1] == [
+        ('luz4', LuzState.DESLIGADA),
+    ]
+    assert [name for name, _ in house.report_changes()[1]] == [
+        'luz2', 'luz3', 'termo', 'luz4',
+    ]
+
@@ -0,0 +1,97 @@
+import pytest
+
+from casa_inteligente import CasaInteligente
+from climate import ClimateModel
+from dispositivos.dispositivo_factory import DispositivosEnum
+from dispositivos.termostato import TermostatoState
+
+
+def _house(columnar: bool) -> CasaInteligente:
+    house = CasaInteligente(10, columnar=columnar, singleton=False)
+    house.add_devices([
+        (DispositivosEnum.TERMOSTATO, 'sala', None),
+        (DispositivosEnum.TERMOSTATO, 'quarto', None),
+        (DispositivosEnum.LUZ, 'luz', None),
+    ])
+    return house
+
+
+def _model(house) -> ClimateModel:
+    return ClimateModel(house, heat_rate=1.0, cool_rate=1.0, leak=0.0)
+
+
+def test_attach(house):
+    model = _model(house)
+    with pytest.raises(ValueError):
+        model.attach('luz1', 20.0)
+    model.attach('termo', 20.0)
+    assert 'termo' in model
+    assert model.temperature('termo') == model.outside
+    model.set_setpoint('termo', 22.0)
+    assert model.setpoint('termo') == 22.0
+    with pytest.raises(KeyError):
+        model.temperature('luz1')
+
+
+@pytest.mark.parametrize('columnar', [False, True])
+def test_hysteresis(columnar):
+    house = _house(columnar)
+    model = _model(house)
+    model.attach('sala', 20.0, temperature=19.6)
+    model.attach('quarto', 20.0, temperature=22.0)
+    assert model.step() == 1
+    assert house.get_device_state('sala') is TermostatoState.DESLIGADO
+    assert house.get_device_state('quarto') is TermostatoState.ESFRIANDO
+    model.set_setpoint('sala', 21.0)
+    assert model.step() == 1
+    assert house.get_device_state('sala') is TermostatoState.AQUECENDO
+    assert model.temperature('quarto') == 21.0
+    # Heats until the setpoint, not just back into the band.
+    assert model.step() == 1
+    assert model.temperature('sala') == 20.6
+    assert house.get_device_state('quarto') is TermostatoState.DESLIGADO
+    assert model.step() == 1
+    assert model.temperature('sala') == pytest.approx(21.6)
+    assert house.get_device_state('sala') is TermostatoState.DESLIGADO
+
+
+def test_columnar_parity():
+    histories = []
+    for columnar in (False, True):
+        house = _house(columnar)
+        model = ClimateModel(house, outside=10.0)
+        model.attach('sala', 21.0)
+        model.attach('quarto', 8.0, temperature=12.0)
+        history = []
+        for _ in range(2000):
+            model.step(5.0)
+            history.append(tuple(state for _, state in
+                                 house.get_device_states()))
+        histories.append((history, model.temperature('sala')))
+    assert histories[0] == histories[1]
+
+
+@pytest.mark.parametrize('columnar', [False, True])
+def test_removed_thermostats_are_released(columnar):
+    house = _house(columnar)
+    model = _model(house)
+    model.attach('sala', 20.0, temperature=10.0)
+    model.attach('quarto', 20.0, temperature=30.0)
+    house.remove_device_by_name('sala')
+    assert model.step() == 1
+    assert len(model) == 1
+    assert 'sala' not in model
+    assert house.get_device_state('quarto') is TermostatoState.ESFRIANDO
+    house.add_devices([(DispositivosEnum.TERMOSTATO, 'sala', None)])
+    model.step()
+    assert 'sala' not in model
+
+
+def test_detach_keeps_the_state(house):
+    model = _model(house)
+    model.attach('termo', 20.0, temperature=10.0)
+    model.step()
+    assert model.detach('termo')
+    assert not model.detach('termo')
+    assert len(model) == 0
+    assert house.get_device_state('termo') is TermostatoState.AQUECENDO
@@ -0,0 +1,131 @@
+import pytest
+
+from dispositivos.luz import LuzState
+from observers.coalescing_dispatcher import CoalescingDispatcher
+from tests.recorder import Recorder
+
+
+class SlowRecorder(Recorder):
+    """
+    A recorder type with a longer window.
+    """
+
+
+class ImmediateRecorder(Recorder):
+    """
+    A recorder type without a window.
+    """
+
+
+class InnerDispatcher:
+    """
+    An inner dispatcher that records what it is handed.
+    """
+
+    def __init__(self) -> None:
+        self.dispatched = []
+        self.closed = False
+
+    def dispatch(self, device, observers, event) -> None:
+        self.dispatched.append((device.name, list(observers), event))
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class FakeClock:
+    def __init__(self, now: float = 0.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+def _flap(light, times: int) -> None:
+    for _ in range(times):
+        light.ligar()
+        light.desligar()
+
+
+def test_windows_by_observer_type(house, clock):
+    dispatcher = CoalescingDispatcher(
+        {Recorder: 1.0, SlowRecorder: 5.0, ImmediateRecorder: 0},
+        clock=clock,
+    )
+    house.set_dispatcher(dispatcher)
+    fast, slow, immediate = Recorder(), SlowRecorder(), ImmediateRecorder()
+    for observer in (fast, slow, immediate):
+        house.add_observer(observer, 'luz1')
+    _flap(house.get_device('luz1'), 3)
+    assert len(immediate.events) == 6
+    assert fast.events == slow.events == []
+    assert dispatcher.pending == 2
+    clock.now = 1.0
+    assert dispatcher.flush() == 1
+    assert fast.events == [{
+        'device': 'luz1',
+        'state': LuzState.DESLIGADA,
+        'transitions': 6,
+    }]
+    assert slow.events == []
+    clock.now = 5.0
+    assert dispatcher.flush() == 1
+    assert slow.events[0]['transitions'] == 6
+
+
+def test_windows_are_per_device(house, clock, recorder):
+    dispatcher = CoalescingDispatcher({Recorder: 1.0}, clock=clock)
+    house.set_dispatcher(dispatcher)
+    house.subscribe_many(recorder, pattern='luz*')
+    house.get_device('luz1').ligar()
+    clock.now = 0.5
+    house.get_device('luz2').ligar()
+    house.get_device('luz1').desligar()
+    clock.now = 1.0
+    assert dispatcher.flush() == 1
+    assert [(event['device'], event['transitions'])
+            for event in recorder.events] == [('luz1', 2)]
+    clock.now = 1.5
+    assert dispatcher.flush() == 1
+    assert recorder.events[-1]['device'] == 'luz2'
+
+
+def test_dispatch_closes_due_windows(house, clock, recorder):
+    dispatcher = CoalescingDispatcher({Recorder: 1.0}, clock=clock)
+    house.set_dispatcher(dispatcher)
+    house.add_observer(recorder, 'luz1')
+    light = house.get_device('luz1')
+    light.ligar()
+    clock.now = 2.0
+    light.desligar()
+    assert [event['state'] for event in recorder.events] == [
+        LuzState.LIGADA,
+    ]
+    assert dispatcher.pending == 1
+
+
+def test_force_flush_and_close(house, clock, recorder):
+    inner = InnerDispatcher()
+    dispatcher = CoalescingDispatcher(
+        {Recorder: 60.0}, inner=inner, clock=clock,
+    )
+    house.set_dispatcher(dispatcher)
+    house.add_observer(recorder, 'luz1')
+    house.add_observer(recorder, 'luz2')
+    house.get_device('luz1').ligar()
+    assert dispatcher.flush(force=True) == 1
+    house.get_device('luz2').ligar()
+    dispatcher.close()
+    assert dispatcher.pending == 0
+    assert inner.closed
+    assert [(name, observers, event['transitions'])
+            for name, observers, event in inner.dispatched] == [
+        ('luz1', [recorder], 1),
+        ('luz2', [recorder], 1),
+    ]
+    assert recorder.events == []
@@ -0,0 +1,92 @@
+import pytest
+
+from dispositivos.luz import LuzState
+from observers.async_dispatcher import AsyncDispatcher
+from observers.coalescing_dispatcher import CoalescingDispatcher
+from observers.thread_pool_dispatcher import ThreadPoolDispatcher
+from tests.recorder import Recorder
+
+LIGHTS = ['luz1', 'luz2', 'luz3']
+
+
+def _states(batch: list[dict]) -> list[tuple[str, LuzState]]:
+    return [(event['device'], event['state']) for event in batch]
+
+
+def test_batch_without_dispatcher(house, recorder):
+    house.subscribe(recorder, 'type.LUZ.*')
+    house.turn_lights_on()
+    assert recorder.events == []
+    assert [_states(batch) for batch in recorder.batches] == [
+        [(name, LuzState.LIGADA) for name in LIGHTS],
+    ]
+
+
+def test_batch_through_async_dispatcher(house, recorder):
+    dispatcher = AsyncDispatcher()
+    house.set_dispatcher(dispatcher)
+    try:
+        house.subscribe(recorder, 'type.LUZ.*')
+        house.turn_lights_on()
+        dispatcher.join(timeout=5)
+    finally:
+        dispatcher.close()
+    assert [_states(batch) for batch in recorder.batches] == [
+        [(name, LuzState.LIGADA) for name in LIGHTS],
+    ]
+
+
+def test_batch_through_thread_pool_dispatcher(house, recorder):
+    dispatcher = ThreadPoolDispatcher(max_workers=2)
+    house.set_dispatcher(dispatcher)
+    try:
+        house.subscribe(recorder, 'type.LUZ.*')
+        house.turn_lights_on()
+        assert recorder.delivered.wait(5)
+    finally:
+        dispatcher.close()
+    assert [_states(batch) for batch in recorder.batches] == [
+        [(name, LuzState.LIGADA) for name in LIGHTS],
+    ]
+
+
+def test_thread_pool_dispatch_batch_returns_future(recorder):
+    dispatcher = ThreadPoolDispatcher(max_workers=1)
+    try:
+        events = [{'device': 'luz1', 'state': LuzState.LIGADA}]
+        dispatcher.dispatch_batch(recorder, events).result(timeout=5)
+    finally:
+        dispatcher.close()
+    assert recorder.batches == [events]
+    with pytest.raises(RuntimeError):
+        dispatcher.dispatch_batch(recorder, events).result(timeout=5)
+
+
+def test_batch_through_coalescing_dispatcher(house, recorder):
+    now = [0.0]
+    dispatcher = CoalescingDispatcher({Recorder: 1.0}, clock=lambda: now[0])
+    house.set_dispatcher(dispatcher)
+    house.subscribe(recorder, 'device.luz1.state')
+    for _ in range(5):
+        house.turn_lights_on()
+        house.turn_lights_off()
+    assert recorder.events == []
+    assert dispatcher.pending == 1
+    now[0] = 2.0
+    assert dispatcher.flush() == 1
+    assert recorder.events == [{
+        'device': 'luz1',
+        'state': LuzState.DESLIGADA,
+        'transitions': 10,
+    }]
+
+
+def test_failing_observer_does_not_block_the_batch(house, recorder):
+    failing = Recorder(fail=True)
+    house.subscribe(failing, 'type.LUZ.*')
+    house.subscribe(recorder, 'type.LUZ.*')
+    house.turn_lights_on()
+    assert len(recorder.batches) == 1
+    [(observer, error)] = house.delivery_errors
+    assert observer is failing
+    assert isinstance(error, RuntimeError)
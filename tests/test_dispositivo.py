@@ -0,0 +1,51 @@
+import pytest
+
+from dispositivos.luz import Luz
+from dispositivos.sistema_seguranca import SistemaSeguranca
+from dispositivos.termostato import Termostato
+from observers.celular import Celular
+from observers.email import EMail
+
+
+@pytest.mark.parametrize('instance', [
+    Luz(),
+    Termostato(),
+    SistemaSeguranca(),
+    Celular('11 99999-0000'),
+    EMail('casa@example.com'),
+], ids=lambda instance: type(instance).__name__)
+def test_slots(instance):
+    assert not hasattr(instance, '__dict__')
+    with pytest.raises(AttributeError):
+        instance.unknown = 1
+
+
+def test_unregistered_observers_are_dropped():
+    light = Luz()
+    phone, mail = Celular('11 99999-0000'), EMail('casa@example.com')
+    light.register(phone)
+    light.register(mail)
+    light.register(phone)
+    assert light.observers == (phone, mail)
+    light.unregister(phone.observer_id)
+    assert light.observers == (mail,)
+    light.unregister_observer(mail)
+    assert light.observers == ()
+    with pytest.raises(TypeError):
+        light.register(object())
+
+
+def test_paired_observers_are_cached(house, recorder):
+    light = house.get_device('luz1')
+    mail = EMail('casa@example.com')
+    light.register(recorder)
+    observers = light.observers
+    assert observers == (recorder,)
+    assert light.observers is observers
+    light.register(mail)
+    assert light.observers == (recorder, mail)
+    assert light.observers is light.observers
+    house.remove_observer(recorder, 'luz1')
+    assert light.observers == (mail,)
+    house.remove_device_by_name('luz1')
+    assert light.observers == ()
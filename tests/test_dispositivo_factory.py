@@ -0,0 +1,98 @@
+import importlib.metadata
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from casa_inteligente import CasaInteligente
+from dispositivos.dispositivo_factory import (
+    ENTRY_POINT_GROUP,
+    DispositivoFactory,
+    DispositivosEnum,
+)
+from dispositivos.luz import Luz
+
+SRC = os.path.join(os.path.dirname(__file__), '..', 'src')
+
+
+class LuzDimmer(Luz):
+    """
+    A light of a plugin.
+    """
+
+    __slots__ = ()
+
+
+@pytest.fixture
+def registry():
+    """
+    Restores the default class of the lights after the test.
+    """
+    yield DispositivoFactory
+    DispositivoFactory.registrar(DispositivosEnum.LUZ, 'dispositivos.luz:Luz')
+
+
+def test_device_modules_are_imported_on_first_use():
+    probe = '''
+import sys
+from casa_inteligente import CasaInteligente
+from dispositivos.dispositivo_factory import DispositivosEnum
+house = CasaInteligente(5, singleton=False)
+house.add_devices([(DispositivosEnum.TERMOSTATO, 'termo', None)])
+print('dispositivos.luz' in sys.modules)
+house.add_devices([(DispositivosEnum.LUZ, 'luz', None)])
+house.turn_lights_on()
+print([light.name for light in house.get_lights_on()])
+'''
+    out = subprocess.run(
+        [sys.executable, '-c', probe],
+        cwd=SRC, capture_output=True, text=True, check=True,
+    ).stdout.splitlines()
+    assert out == ['False', "['luz']"]
+
+
+def test_registrar(registry):
+    registry.registrar(
+        DispositivosEnum.LUZ, 'tests.test_dispositivo_factory:LuzDimmer',
+    )
+    assert registry.classe_dispositivo(DispositivosEnum.LUZ) is LuzDimmer
+    house = CasaInteligente(5, singleton=False)
+    house.add_devices([(DispositivosEnum.LUZ, 'luz', None)])
+    assert isinstance(house.get_device('luz'), LuzDimmer)
+    house.turn_lights_on()
+    assert [light.name for light in house.get_lights_on()] == ['luz']
+    registry.registrar(DispositivosEnum.LUZ, Luz)
+    assert type(registry.parear_dispositivo(DispositivosEnum.LUZ)) is Luz
+
+
+@pytest.mark.parametrize('path', ['dispositivos.luz', ':Luz', 'luz:'])
+def test_registrar_rejects_invalid_paths(registry, path):
+    with pytest.raises(ValueError):
+        registry.registrar(DispositivosEnum.LUZ, path)
+    assert registry.classe_dispositivo(DispositivosEnum.LUZ) is Luz
+
+
+def test_registered_class_must_be_a_device(registry):
+    registry.registrar(DispositivosEnum.LUZ, 'collections:OrderedDict')
+    with pytest.raises(TypeError):
+        registry.parear_dispositivo(DispositivosEnum.LUZ)
+
+
+def test_registrar_entry_points(registry, monkeypatch):
+    groups = []
+
+    def entry_points(group):
+        groups.append(group)
+        return [
+            SimpleNamespace(
+                name='luz', value='tests.test_dispositivo_factory:LuzDimmer',
+            ),
+            SimpleNamespace(name='porta', value='plugin.porta:Porta'),
+        ]
+
+    monkeypatch.setattr(importlib.metadata, 'entry_points', entry_points)
+    assert registry.registrar_entry_points() == 1
+    assert groups == [ENTRY_POINT_GROUP]
+    assert registry.classe_dispositivo(DispositivosEnum.LUZ) is LuzDimmer
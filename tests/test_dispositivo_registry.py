@@ -0,0 +1,85 @@
+import pytest
+
+from dispositivos.dispositivo_factory import (
+    DispositivoFactory,
+    DispositivosEnum,
+)
+from dispositivos.dispositivo_registry import DispositivoRegistry
+
+
+def _new(device_type: DispositivosEnum):
+    return DispositivoFactory.parear_dispositivo(device_type)
+
+
+@pytest.fixture
+def registry() -> DispositivoRegistry:
+    registry = DispositivoRegistry()
+    registry.add('luz1', DispositivosEnum.LUZ, _new(DispositivosEnum.LUZ))
+    registry.add(
+        'termo', DispositivosEnum.TERMOSTATO,
+        _new(DispositivosEnum.TERMOSTATO),
+    )
+    registry.add('luz2', DispositivosEnum.LUZ, _new(DispositivosEnum.LUZ))
+    return registry
+
+
+def test_lookups(registry):
+    assert len(registry) == 3
+    assert 'luz1' in registry and 'nada' not in registry
+    assert registry.names() == ['luz1', 'termo', 'luz2']
+    assert registry.type_of('termo') is DispositivosEnum.TERMOSTATO
+    assert registry.type_of('nada') is None
+    assert registry.get('nada') is None
+    assert list(registry) == [registry.get(name) for name in registry.names()]
+
+
+def test_of_type_keeps_pairing_order(registry):
+    assert registry.of_type(DispositivosEnum.LUZ) == [
+        registry.get('luz1'), registry.get('luz2'),
+    ]
+    assert registry.of_type(DispositivosEnum.SISTEMA_SEGURANCA) == []
+
+
+def test_remove(registry):
+    device = registry.get('luz1')
+    assert registry.remove('luz1') is device
+    assert registry.remove('luz1') is None
+    assert registry.names() == ['termo', 'luz2']
+    assert registry.type_of('luz1') is None
+    assert registry.of_type(DispositivosEnum.LUZ) == [registry.get('luz2')]
+
+
+def test_repeated_names_are_rejected(registry):
+    with pytest.raises(ValueError):
+        registry.add('luz1', DispositivosEnum.LUZ, _new(DispositivosEnum.LUZ))
+    with pytest.raises(ValueError):
+        registry.add_many([
+            ('luz3', DispositivosEnum.LUZ, _new(DispositivosEnum.LUZ)),
+            ('luz3', DispositivosEnum.LUZ, _new(DispositivosEnum.LUZ)),
+        ])
+    with pytest.raises(ValueError):
+        registry.add_many([
+            ('luz4', DispositivosEnum.LUZ, _new(DispositivosEnum.LUZ)),
+            ('termo', DispositivosEnum.LUZ, _new(DispositivosEnum.LUZ)),
+        ])
+    assert registry.names() == ['luz1', 'termo', 'luz2']
+
+
+def test_add_many(registry):
+    registry.add_many([
+        ('alarme', DispositivosEnum.SISTEMA_SEGURANCA,
+         _new(DispositivosEnum.SISTEMA_SEGURANCA)),
+        ('luz3', DispositivosEnum.LUZ, _new(DispositivosEnum.LUZ)),
+    ])
+    assert registry.names()[-2:] == ['alarme', 'luz3']
+    assert len(registry.of_type(DispositivosEnum.LUZ)) == 3
+
+
+def test_house_indexes_devices_by_name(house, capsys):
+    assert house.has_device('luz2')
+    assert house.get_device_type('termo') is DispositivosEnum.TERMOSTATO
+    house.add_device(DispositivosEnum.LUZ, 'luz1')
+    assert 'There is already a device named luz1.' in capsys.readouterr().out
+    assert house.remove_device_by_name('luz2')
+    assert not house.remove_device_by_name('luz2')
+    assert house.get_device_names() == ['luz1', 'luz3', 'termo']
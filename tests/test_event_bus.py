@@ -0,0 +1,73 @@
+import pytest
+
+from observers.event_bus import EventBus
+from tests.recorder import Recorder
+
+
+@pytest.fixture
+def bus() -> EventBus:
+    return EventBus()
+
+
+@pytest.mark.parametrize('pattern, topic, matches', [
+    ('type.LUZ.*', 'type.LUZ.LIGADA', True),
+    ('type.LUZ.*', 'type.LUZ', False),
+    ('type.LUZ.*', 'type.LUZ.LIGADA.extra', False),
+    ('type.*.LIGADA', 'type.LUZ.LIGADA', True),
+    ('type.*.LIGADA', 'type.LUZ.DESLIGADA', False),
+    ('house.#', 'house', True),
+    ('house.#', 'house.paired', True),
+    ('house.#', 'house.a.b.c', True),
+    ('house.#', 'device.luz1.state', False),
+    ('#', 'device.luz1.state', True),
+    ('*.*.state', 'device.luz1.state', True),
+])
+def test_wildcards(bus, pattern, topic, matches):
+    observer = Recorder()
+    bus.subscribe(observer, pattern)
+    assert (observer in bus.subscribers(bus.topic(topic))) is matches
+
+
+def test_multi_wildcard_must_be_last(bus):
+    with pytest.raises(ValueError):
+        bus.subscribe(Recorder(), 'house.#.paired')
+
+
+def test_observer_matching_many_topics_is_listed_once(bus):
+    observer = Recorder()
+    bus.subscribe(observer, 'device.luz1.*')
+    bus.subscribe(observer, 'type.#')
+    topics = (bus.topic('device.luz1.state'), bus.topic('type.LUZ.LIGADA'))
+    assert bus.subscribers(*topics) == (observer,)
+    assert len(bus) == 1
+
+
+def test_unsubscribe(bus):
+    observer = Recorder()
+    first = bus.subscribe(observer, 'type.LUZ.*')
+    second = bus.subscribe(observer, 'type.#')
+    topic = bus.topic('type.LUZ.LIGADA')
+    assert bus.subscribers(topic) == (observer,)
+    assert bus.unsubscribe(first)
+    assert bus.subscribers(topic) == (observer,)
+    assert len(bus) == 1
+    assert bus.unsubscribe(second)
+    assert bus.subscribers(topic) == ()
+    assert len(bus) == 0
+    assert not bus.unsubscribe(second)
+    assert bus.subscriptions() == []
+
+
+def test_unsubscribe_keeps_sibling_patterns(bus):
+    light, heater = Recorder(), Recorder()
+    bus.subscribe(light, 'type.LUZ.*')
+    subscription_id = bus.subscribe(heater, 'type.TERMOSTATO.*')
+    bus.unsubscribe(subscription_id)
+    assert bus.subscribers(bus.topic('type.LUZ.LIGADA')) == (light,)
+    assert bus.subscribers(bus.topic('type.TERMOSTATO.AQUECENDO')) == ()
+
+
+def test_house_publishes_topics(house, recorder):
+    house.subscribe(recorder, ('house', '#'))
+    house.remove_device_by_name('luz3')
+    assert [event['device'] for event in recorder.events] == ['luz3']
@@ -0,0 +1,134 @@
+import pytest
+
+from casa_inteligente import CasaInteligente
+from dispositivos.dispositivo_factory import DispositivosEnum
+from dispositivos.event_log import EventLog, EventLogReader
+from dispositivos.luz import LuzState
+from dispositivos.termostato import TermostatoState
+from tests.recorder import Recorder
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def log_path(tmp_path) -> str:
+    return str(tmp_path / 'casa.log')
+
+
+def _record(house, log_path, clock) -> None:
+    """
+    Pairs two devices at 1000, turns the light on at 1010,
+    and heats at 1020. The log is closed with the devices still paired.
+    """
+    with EventLog(log_path, clock=clock) as log:
+        house.set_event_log(log)
+        house.add_devices([
+            (DispositivosEnum.LUZ, 'luz', None),
+            (DispositivosEnum.TERMOSTATO, 'termo', None),
+        ])
+        clock.now = 1010.0
+        house.control_many([('luz', 'ligar')])
+        clock.now = 1020.0
+        house.control_many([('termo', 'aquecer')])
+
+
+def test_round_trip(log_path):
+    clock = FakeClock()
+    _record(CasaInteligente(10, singleton=False), log_path, clock)
+    with EventLogReader(log_path) as reader:
+        events = list(reader.replay())
+        assert len(reader) == 4
+        assert [(e.timestamp, e.device, e.source, e.dest, e.trigger)
+                for e in events[2:]] == [
+            (1010.0, 'luz', LuzState.DESLIGADA, LuzState.LIGADA, 'ligar'),
+            (1020.0, 'termo', TermostatoState.DESLIGADO,
+             TermostatoState.AQUECENDO, 'aquecer'),
+        ]
+        assert [e.source for e in events[:2]] == [None, None]
+        assert reader.count(DispositivosEnum.LUZ, 'ligar') == 1
+
+
+def test_torn_writes_are_dropped(log_path):
+    clock = FakeClock()
+    _record(CasaInteligente(10, singleton=False), log_path, clock)
+    with open(log_path, 'ab') as log:
+        log.write(b'\x00' * 5)
+    with open(log_path + '.devices', 'a', encoding='utf-8') as devices:
+        devices.write('[2, "LUZ", "lu')
+    with EventLogReader(log_path) as reader:
+        assert len(reader) == 4
+        assert {e.device for e in reader.replay()} == {'luz', 'termo'}
+    house = CasaInteligente(10, singleton=False)
+    with EventLog(log_path, clock=clock) as log:
+        house.set_event_log(log)
+        house.add_devices([(DispositivosEnum.LUZ, 'luz2', None)])
+    with open(log_path + '.devices', encoding='utf-8') as devices:
+        assert devices.read().splitlines()[-1] == '[2, "LUZ", "luz2"]'
+    with EventLogReader(log_path) as reader:
+        assert len(reader) == 5
+        assert list(reader.replay())[-1].device == 'luz2'
+
+
+def test_timestamps_never_go_backwards(log_path):
+    clock = FakeClock()
+    house = CasaInteligente(10, singleton=False)
+    with EventLog(log_path, clock=clock) as log:
+        house.set_event_log(log)
+        house.add_devices([(DispositivosEnum.LUZ, 'luz', None)])
+        clock.now = 500.0
+        house.control_many([('luz', 'ligar')])
+        house.set_event_log(None)
+    with EventLog(log_path, clock=clock) as log:
+        house.set_event_log(log)
+        house.control_many([('luz', 'desligar')])
+        house.set_event_log(None)
+    with EventLogReader(log_path) as reader:
+        timestamps = [event.timestamp for event in reader.replay()]
+    assert timestamps == sorted(timestamps)
+    assert timestamps[-1] == 1000.0
+
+
+def test_restore_at_a_timestamp(log_path, recorder, capsys):
+    _record(CasaInteligente(10, singleton=False), log_path, FakeClock())
+    house = CasaInteligente(10, singleton=False)
+    house.add_devices([(DispositivosEnum.LUZ, 'extra', None)])
+    house.subscribe(recorder, '#')
+    with EventLogReader(log_path) as reader:
+        house.restore(reader, 1015.0)
+        assert house.get_device_names() == ['luz', 'termo']
+        assert house.get_device_state('luz') is LuzState.LIGADA
+        assert house.get_device_state('termo') is TermostatoState.DESLIGADO
+        assert [light.name for light in house.get_lights_on()] == ['luz']
+        house.restore(reader)
+        assert house.get_device_state('termo') is TermostatoState.AQUECENDO
+    assert recorder.events == [] and recorder.batches == []
+    assert capsys.readouterr().out == ''
+
+
+def test_restore_over_the_device_limit(log_path):
+    _record(CasaInteligente(10, singleton=False), log_path, FakeClock())
+    house = CasaInteligente(1, singleton=False)
+    house.add_devices([(DispositivosEnum.LUZ, 'extra', None)])
+    with EventLogReader(log_path) as reader:
+        with pytest.raises(ValueError):
+            house.restore(reader)
+    assert house.get_device_names() == ['extra']
+
+
+def test_removal_is_silent_to_the_restored_observers(log_path):
+    _record(CasaInteligente(10, singleton=False), log_path, FakeClock())
+    house = CasaInteligente(10, singleton=False)
+    with EventLogReader(log_path) as reader:
+        house.restore(reader)
+    observer = Recorder()
+    house.subscribe(observer, 'house.#')
+    with EventLogReader(log_path) as reader:
+        house.restore(reader, 999.0)
+    assert house.total_devices == 0
+    assert observer.events == []
@@ -0,0 +1,88 @@
+import pytest
+
+from dispositivos.dispositivo_factory import DispositivosEnum
+from dispositivos.luz import LuzState
+from house_manager import HouseManager
+
+
+@pytest.fixture
+def manager():
+    with HouseManager(workers=2, max_devices=3) as manager:
+        manager.create_houses(['casa-1', 'casa-2', 'casa-3'])
+        yield manager
+
+
+def test_create_and_remove_houses(manager):
+    with pytest.raises(ValueError):
+        manager.create_house('casa-1')
+    assert manager.status()['houses'] == 3
+    assert manager.remove_house('casa-2')
+    assert not manager.remove_house('casa-2')
+    assert manager.status()['houses'] == 2
+    with pytest.raises(KeyError):
+        manager.call('casa-2', 'get_device_names')
+
+
+def test_call(manager):
+    manager.call('casa-1', 'add_device', DispositivosEnum.LUZ, 'luz1')
+    assert manager.call('casa-1', 'control_many', [('luz1', 'ligar')]) == [
+        True,
+    ]
+    assert manager.call('casa-1', 'get_device_state', 'luz1') is (
+        LuzState.LIGADA
+    )
+    assert manager.call('casa-3', 'get_device_names') == []
+    with pytest.raises(ValueError):
+        manager.call('casa-1', 'get_lights_on')
+
+
+def test_add_device_errors(manager):
+    manager.call('casa-1', 'add_device', DispositivosEnum.LUZ, 'luz1')
+    with pytest.raises(ValueError, match='luz1'):
+        manager.call('casa-1', 'add_device', DispositivosEnum.LUZ, 'luz1')
+    for name in ('luz2', 'luz3'):
+        manager.call('casa-1', 'add_device', DispositivosEnum.LUZ, name)
+    with pytest.raises(ValueError):
+        manager.call('casa-1', 'add_device', DispositivosEnum.LUZ, 'luz4')
+
+
+def test_status(manager):
+    manager.call_many([
+        ('casa-1', 'add_device', DispositivosEnum.LUZ, 'luz1'),
+        ('casa-1', 'add_device', DispositivosEnum.LUZ, 'luz2'),
+        ('casa-3', 'add_device', DispositivosEnum.TERMOSTATO, 'termo'),
+        ('casa-1', 'turn_lights_on'),
+    ])
+    assert manager.status() == {
+        'houses': 3, 'devices': 3, 'observers': 0, 'lights_on': 2,
+    }
+    assert manager.status('casa-3') == {
+        'houses': 1, 'devices': 1, 'observers': 0, 'lights_on': 0,
+    }
+    assert manager.status('nada')['houses'] == 0
+
+
+def test_call_many_runs_every_call(manager):
+    calls = [
+        ('casa-1', 'add_device', DispositivosEnum.LUZ, 'luz1'),
+        ('nada', 'has_device', 'luz1'),
+        ('casa-1', 'has_device', 'luz1'),
+        ('casa-2', 'has_device', 'luz1'),
+    ]
+    results = manager.call_many(calls, return_exceptions=True)
+    assert results[0] is None
+    assert isinstance(results[1], KeyError)
+    assert results[2:] == [True, False]
+    with pytest.raises(KeyError):
+        manager.call_many([
+            ('nada', 'has_device', 'luz1'),
+            ('casa-2', 'add_device', DispositivosEnum.LUZ, 'luz1'),
+        ])
+    assert manager.call('casa-2', 'has_device', 'luz1')
+    with pytest.raises(ValueError):
+        manager.call_many([('casa-1', 'snapshot')])
+
+
+def test_houses_are_spread_across_the_workers(manager):
+    assert manager.workers == 2
+    assert {manager.shard_of(f'casa-{n}') for n in range(20)} == {0, 1}
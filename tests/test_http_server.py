@@ -0,0 +1,188 @@
+import asyncio
+import json
+
+from http_server import HouseServer
+
+
+async def _request(
+    port: int,
+    method: str,
+    target: str,
+    body: object = None,
+) -> tuple[int, object]:
+    """
+    Sends a request on a new connection, and returns the status
+    and the JSON payload of the response.
+    """
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    data = b'' if body is None else json.dumps(body).encode('utf-8')
+    writer.write(
+        f'{method} {target} HTTP/1.1\r\n'
+        f'Content-Length: {len(data)}\r\n'
+        'Connection: close\r\n\r\n'.encode('latin-1') + data
+    )
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b'\r\n\r\n')
+    status = int(head.split(b' ')[1])
+    return status, json.loads(payload)
+
+
+def _serve(house, scenario):
+    """
+    Runs a coroutine against a server of the house on a free port.
+    """
+    async def main():
+        server = HouseServer(house, port=0)
+        await server.start()
+        try:
+            return await scenario(server)
+        finally:
+            await server.close()
+
+    return asyncio.run(main())
+
+
+def test_status_and_devices(house):
+    async def scenario(server):
+        house.control_many([('luz1', 'ligar')])
+        return [
+            await _request(server.port, 'GET', '/status'),
+            await _request(server.port, 'GET', '/devices?type=termostato'),
+            await _request(server.port, 'GET', '/devices/luz1'),
+            await _request(server.port, 'GET', '/devices/nada'),
+            await _request(server.port, 'GET', '/devices?type=porta'),
+            await _request(server.port, 'GET', '/nada'),
+        ]
+
+    responses = _serve(house, scenario)
+    assert responses[0] == (200, {
+        'devices': 4, 'observers': 0, 'lights_on': 1,
+    })
+    assert responses[1] == (200, [
+        {'name': 'termo', 'type': 'TERMOSTATO', 'state': 'DESLIGADO'},
+    ])
+    assert responses[2] == (200, {
+        'name': 'luz1', 'type': 'LUZ', 'state': 'LIGADA',
+    })
+    assert [status for status, _ in responses[3:]] == [404, 400, 404]
+
+
+def test_triggers_and_commands(house):
+    async def scenario(server):
+        port = server.port
+        return [
+            await _request(port, 'POST', '/devices/luz2/ligar'),
+            await _request(port, 'POST', '/devices/luz2/ligar'),
+            await _request(port, 'POST', '/devices/nada/ligar'),
+            await _request(port, 'POST', '/commands', [
+                {'device': 'termo', 'trigger': 'aquecer'},
+                {'device': 'nada', 'trigger': 'ligar'},
+            ]),
+            await _request(port, 'POST', '/commands', {'device': 'luz1'}),
+        ]
+
+    responses = _serve(house, scenario)
+    assert responses[0] == (200, {
+        'name': 'luz2', 'type': 'LUZ', 'state': 'LIGADA',
+    })
+    assert [status for status, _ in responses[1:3]] == [409, 404]
+    assert responses[3] == (200, {'applied': [True, False]})
+    assert responses[4][0] == 400
+    assert house.get_device_state('termo').name == 'AQUECENDO'
+
+
+def test_changes(house):
+    async def scenario(server):
+        status, first = await _request(server.port, 'GET', '/changes')
+        house.control_many([('luz3', 'ligar')])
+        _, second = await _request(
+            server.port, 'GET', f'/changes?since={first["cursor"]}',
+        )
+        invalid = await _request(server.port, 'GET', '/changes?since=x')
+        return first, second, invalid
+
+    first, second, invalid = _serve(house, scenario)
+    assert [change['name'] for change in first['changes']] == [
+        'luz1', 'luz2', 'luz3', 'termo',
+    ]
+    assert second == {
+        'cursor': house.version,
+        'changes': [{'name': 'luz3', 'state': 'LIGADA'}],
+    }
+    assert invalid[0] == 400
+
+
+def test_subscriptions(house):
+    async def scenario(server):
+        port = server.port
+        return [
+            await _request(port, 'POST', '/subscriptions', {
+                'observer': 'email', 'address': 'a@b', 'device': 'luz1',
+            }),
+            await _request(port, 'POST', '/subscriptions', {
+                'observer': 'email', 'address': 'a@b',
+                'pattern': 'type.LUZ.*',
+            }),
+            await _request(port, 'POST', '/subscriptions', {
+                'observer': 'email', 'address': 'a@b', 'device': 'nada',
+            }),
+            await _request(port, 'POST', '/subscriptions', {
+                'observer': 'pombo', 'address': 'a@b', 'device': 'luz1',
+            }),
+            await _request(port, 'POST', '/subscriptions', {
+                'observer': 'email', 'address': 'a@b', 'pattern': '#.x',
+            }),
+        ]
+
+    responses = _serve(house, scenario)
+    assert responses[0] == (201, {
+        'observer': 'email', 'address': 'a@b', 'device': 'luz1',
+    })
+    assert responses[1][0] == 201
+    assert [status for status, _ in responses[2:]] == [404, 400, 400]
+    assert house.total_observers == 1
+
+
+def test_unexpected_errors_answer_500(house, monkeypatch):
+    def fail(*args):
+        raise RuntimeError('The house failed.')
+
+    monkeypatch.setattr(house, 'report_changes', fail)
+
+    async def scenario(server):
+        response = await _request(server.port, 'GET', '/changes')
+        return response, list(server.errors)
+
+    (status, payload), errors = _serve(house, scenario)
+    assert (status, payload) == (500, {'error': 'Internal server error.'})
+    [error] = errors
+    assert isinstance(error, RuntimeError)
+
+
+def test_events_stream(house):
+    async def scenario(server):
+        reader, writer = await asyncio.open_connection(
+            '127.0.0.1', server.port,
+        )
+        writer.write(
+            b'GET /events?pattern=type.LUZ.* HTTP/1.1\r\n\r\n',
+        )
+        head = await reader.readuntil(b'\r\n\r\n')
+        house.control_many([('luz1', 'ligar'), ('termo', 'aquecer')])
+        house.get_device('luz2').ligar()
+        lines = [await reader.readline() for _ in range(4)]
+        writer.close()
+        return head, lines, house.total_observers
+
+    head, lines, observers = _serve(house, scenario)
+    assert head.startswith(b'HTTP/1.1 200 OK\r\n')
+    assert b'Content-Type: text/event-stream' in head
+    events = [json.loads(line[len(b'data: '):])
+              for line in lines if line.strip()]
+    assert events == [
+        {'device': 'luz1', 'state': 'LIGADA'},
+        {'device': 'luz2', 'state': 'LIGADA'},
+    ]
+    assert observers == 1
+    assert house.total_observers == 0
@@ -0,0 +1,101 @@
+import json
+
+from casa_inteligente import CasaInteligente
+from dispositivos.dispositivo_factory import DispositivosEnum
+from dispositivos.luz import LuzState
+from dispositivos.termostato import TermostatoState
+from manifest import ManifestReport, provision
+from observers.celular import Celular
+
+
+def _write_lines(path, records) -> str:
+    with open(path, 'w', encoding='utf-8') as file:
+        for record in records:
+            if isinstance(record, str):
+                file.write(record + '\n')
+            else:
+                file.write(json.dumps(record) + '\n')
+    return str(path)
+
+
+def test_add_devices_reports_rejects(house, capsys):
+    rejected = house.add_devices([
+        (DispositivosEnum.LUZ, 'luz1', None),
+        (DispositivosEnum.LUZ, 'nova', LuzState.LIGADA),
+    ])
+    assert rejected == [('luz1', 'The name is already taken.')]
+    assert house.get_device_state('nova') is LuzState.LIGADA
+    assert capsys.readouterr().out == ''
+
+
+def test_provision_json_lines(tmp_path):
+    path = _write_lines(tmp_path / 'casa.jsonl', [
+        {'type': 'luz', 'device': 'sala', 'state': 'ligada'},
+        {'type': 'termostato', 'device': 'quarto'},
+        '',
+        {'observer': 'celular', 'address': '11 99999-0000',
+         'device': 'sala'},
+        {'observer': 'celular', 'address': '11 99999-0000',
+         'pattern': 'type.TERMOSTATO.*'},
+    ])
+    house = CasaInteligente(10, singleton=False)
+    report = provision(house, path, chunk_size=1)
+    assert (report.devices, report.subscriptions) == (2, 2)
+    assert report.total_errors == 0
+    assert house.get_device_state('sala') is LuzState.LIGADA
+    assert house.get_device_state('quarto') is TermostatoState.DESLIGADO
+    [phone] = house.get_device_observers('sala')
+    assert isinstance(phone, Celular)
+    assert house.total_observers == 1
+
+
+def test_provision_csv(tmp_path):
+    path = tmp_path / 'casa.csv'
+    path.write_text(
+        'type,device,state,observer,address\n'
+        'luz,sala,,,\n'
+        'sistema_seguranca,alarme,armado_com_gente,,\n'
+        ',sala,,email,casa@example.com\n',
+        encoding='utf-8',
+    )
+    house = CasaInteligente(10, singleton=False)
+    report = provision(house, str(path))
+    assert (report.devices, report.subscriptions) == (2, 1)
+    assert house.get_device_names() == ['sala', 'alarme']
+    assert house.get_device_state('alarme').name == 'ARMADO_COM_GENTE'
+
+
+def test_provision_reports_errors(tmp_path):
+    path = _write_lines(tmp_path / 'casa.jsonl', [
+        {'type': 'luz', 'device': 'sala'},
+        {'type': 'luz', 'device': 'sala'},
+        {'type': 'porta', 'device': 'entrada'},
+        {'type': 'luz', 'device': 'cozinha', 'state': 'aquecendo'},
+        {'type': 'luz'},
+        'not json',
+        [1, 2],
+        {'observer': 'pombo', 'address': 'x', 'device': 'sala'},
+        {'observer': 'email', 'device': 'sala'},
+        {'observer': 'email', 'address': 'a@b', 'device': 'nada'},
+        {'observer': 'email', 'address': 'a@b', 'pattern': '#.x'},
+        {'observer': 'email', 'address': 'a@b'},
+    ])
+    house = CasaInteligente(10, singleton=False)
+    report = provision(house, path)
+    assert report.devices == 1
+    assert report.subscriptions == 0
+    assert report.total_errors == 11
+    assert report.errors['Invalid JSON object.'] == 2
+    assert (2, 'sala: The name is already taken.') in report.samples
+    summary = report.summary()
+    assert summary.startswith('1 devices paired, 0 subscriptions, 11 errors.')
+    assert '  2x Invalid JSON object.' in summary.splitlines()
+
+
+def test_report_keeps_a_few_samples():
+    report = ManifestReport()
+    for line in range(1, 101):
+        report.error(line, 'Unknown device type.', f'd{line}')
+    assert report.total_errors == 100
+    assert len(report.samples) == ManifestReport.MAX_SAMPLES
+    assert report.samples[0] == (1, 'd1: Unknown device type.')
@@ -0,0 +1,77 @@
+import pytest
+
+from dispositivos.dispositivo_factory import DispositivosEnum
+from dispositivos.luz import LuzState
+from dispositivos.termostato import TermostatoState
+from rules import Rule, RuleEngine
+
+
+@pytest.fixture
+def engine(house) -> RuleEngine:
+    engine = RuleEngine()
+    house.set_rule_engine(engine)
+    return engine
+
+
+def test_rule_fires_on_its_state(house, engine):
+    engine.add_rule(Rule(
+        'aquece', DispositivosEnum.LUZ, LuzState.LIGADA,
+        (('termo', 'aquecer'),), device='luz1',
+    ))
+    house.control_many([('luz2', 'ligar')])
+    assert house.get_device_state('termo') is TermostatoState.DESLIGADO
+    house.control_many([('luz1', 'ligar')])
+    assert house.get_device_state('termo') is TermostatoState.AQUECENDO
+
+
+def test_rules_cascade(house, engine):
+    engine.add_rule(Rule(
+        'acende', DispositivosEnum.LUZ, LuzState.LIGADA,
+        (('luz2', 'ligar'),), device='luz1',
+    ))
+    engine.add_rule(Rule(
+        'todas', DispositivosEnum.LUZ, LuzState.LIGADA,
+        ((DispositivosEnum.LUZ, 'ligar'),), device='luz2',
+    ))
+    house.control_many([('luz1', 'ligar')])
+    assert len(house.get_lights_on()) == 3
+    assert engine.cycles == []
+
+
+def test_cycle_is_detected(house, engine):
+    engine.add_rule(Rule(
+        'liga', DispositivosEnum.LUZ, LuzState.DESLIGADA,
+        (('luz1', 'ligar'),), device='luz1',
+    ))
+    engine.add_rule(Rule(
+        'desliga', DispositivosEnum.LUZ, LuzState.LIGADA,
+        (('luz1', 'desligar'),), device='luz1',
+    ))
+    house.control_many([('luz1', 'ligar')])
+    assert engine.cycles == [('desliga', 'luz1')]
+    assert house.get_device_state('luz1') is LuzState.LIGADA
+    # The next cascade starts over.
+    engine.cycles.clear()
+    house.control_many([('luz1', 'desligar')])
+    assert engine.cycles == [('liga', 'luz1')]
+
+
+def test_invalid_rules_are_rejected(engine):
+    with pytest.raises(ValueError):
+        engine.add_rule(Rule(
+            'errada', DispositivosEnum.LUZ, TermostatoState.AQUECENDO,
+            (('luz1', 'ligar'),),
+        ))
+    with pytest.raises(ValueError):
+        engine.add_rule(Rule(
+            'sem_gatilho', DispositivosEnum.LUZ, LuzState.LIGADA,
+            ((DispositivosEnum.LUZ, 'aquecer'),),
+        ))
+    rule = Rule(
+        'ok', DispositivosEnum.LUZ, LuzState.LIGADA, (('luz1', 'ligar'),),
+    )
+    engine.add_rule(rule)
+    with pytest.raises(ValueError):
+        engine.add_rule(rule)
+    assert engine.remove_rule('ok')
+    assert not engine.remove_rule('ok')
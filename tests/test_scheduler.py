@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import pytest
+
+from dispositivos.dispositivo_factory import DispositivosEnum
+from dispositivos.luz import LuzState
+from scheduler import Cron, Scheduler
+
+
+def _at(*args) -> float:
+    return datetime(*args).timestamp()
+
+
+@pytest.mark.parametrize('expression, now, expected', [
+    ('0 23 * * *', (2024, 3, 4, 12, 0), (2024, 3, 4, 23, 0)),
+    ('0 23 * * *', (2024, 3, 4, 23, 0), (2024, 3, 5, 23, 0)),
+    ('*/15 * * * *', (2024, 3, 4, 12, 7), (2024, 3, 4, 12, 15)),
+    ('0 6 * * 1-5', (2024, 3, 8, 7, 0), (2024, 3, 11, 6, 0)),
+    ('@monthly', (2024, 12, 31, 12, 0), (2025, 1, 1, 0, 0)),
+    ('0 0 29 2 *', (2024, 3, 1, 0, 0), (2028, 2, 29, 0, 0)),
+    ('30 8 1 * 1', (2024, 4, 2, 0, 0), (2024, 4, 8, 8, 30)),
+])
+def test_cron_next_after(expression, now, expected):
+    assert Cron(expression).next_after(_at(*now)) == _at(*expected)
+
+
+def test_cron_that_never_happens():
+    with pytest.raises(ValueError):
+        Cron('0 0 31 2 *').next_after(_at(2024, 1, 1))
+
+
+def test_jobs_run_when_due(house):
+    now = [_at(2024, 3, 4, 22, 0)]
+    scheduler = Scheduler(house, clock=lambda: now[0])
+    scheduler.cron('0 23 * * *', [(DispositivosEnum.LUZ, 'ligar')])
+    assert scheduler.run_pending() == 0
+    now[0] = _at(2024, 3, 4, 23, 0)
+    assert scheduler.run_pending() == 1
+    assert len(house.get_lights_on()) == 3
+    assert scheduler.next_due() == _at(2024, 3, 5, 23, 0)
+
+
+def test_failing_job_does_not_stop_the_others(house):
+    now = [0.0]
+    scheduler = Scheduler(house, clock=lambda: now[0])
+    scheduler.at(1.0, [('luz1', 'ligar', 'extra')])
+    scheduler.at(1.0, [('luz2', 'ligar')])
+    now[0] = 1.0
+    assert scheduler.run_pending() == 2
+    assert house.get_device_state('luz2') is LuzState.LIGADA
+    [error] = scheduler.errors
+    assert isinstance(error, ValueError)
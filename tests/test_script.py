@@ -0,0 +1,96 @@
+import io
+
+from dispositivos.luz import LuzState
+from dispositivos.termostato import TermostatoState
+from script import ScriptRunner
+
+
+def _run(house, script: str, **kwargs) -> tuple[int, list[str]]:
+    out = io.StringIO()
+    errors = ScriptRunner(house, out=out, **kwargs).run(
+        io.StringIO(script),
+    )
+    return errors, out.getvalue().splitlines()
+
+
+def test_triggers_are_batched(house, recorder):
+    house.subscribe(recorder, '#')
+    errors, output = _run(house, '''\
+# turns the lights on
+on luz*
+off luz2
+set termo aquecer
+''')
+    assert (errors, output) == (0, [])
+    assert [name for name, state in house.get_device_states()
+            if state is LuzState.LIGADA] == ['luz1', 'luz3']
+    assert house.get_device_state('termo') is TermostatoState.AQUECENDO
+    assert len(recorder.batches) == 1
+    assert recorder.events == []
+
+
+def test_batch_size(house, recorder):
+    house.subscribe(recorder, '#')
+    _run(house, 'on luz1\non luz2\non luz3\n', batch_size=2)
+    assert [len(batch) for batch in recorder.batches] == [2, 1]
+
+
+def test_status_and_lights(house):
+    errors, output = _run(house, '''\
+on luz2
+status --type luz luz[12]
+lights
+status termo
+''')
+    assert errors == 0
+    assert output == [
+        'luz1\t\t DESLIGADA',
+        'luz2\t\t LIGADA',
+        'luz2\t\t LIGADA',
+        'termo\t\t DESLIGADO',
+    ]
+
+
+def test_add_and_remove(house):
+    errors, output = _run(house, '''\
+add luz "luz da sala"
+on "luz da sala"
+on luz*
+remove luz1
+off luz?
+status
+''')
+    assert errors == 0
+    assert output == [
+        'luz2\t\t DESLIGADA',
+        'luz3\t\t DESLIGADA',
+        'termo\t\t DESLIGADO',
+        'luz da sala\t\t LIGADA',
+    ]
+
+
+def test_errors_are_reported_with_their_lines(house):
+    errors, output = _run(house, '''\
+on nada
+set termo ligar
+add porta p1
+add luz luz1
+remove nada
+status --type porta
+status a b
+dance
+on "luz1
+set luz* aquecer
+''')
+    assert errors == 9
+    assert output == [
+        "error: line 1: can't ligar nada",
+        "error: line 2: can't ligar termo",
+        'error: line 3: unknown device type porta',
+        'error: line 4: luz1: The name is already taken.',
+        'error: line 5: unknown device nada',
+        'error: line 6: unknown device type porta',
+        'error: line 7: usage: status [--type TYPE] [pattern]',
+        'error: line 8: invalid command: dance',
+        'error: line 9: No closing quotation',
+    ]
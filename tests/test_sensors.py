@@ -0,0 +1,83 @@
+import pytest
+
+from casa_inteligente import CasaInteligente
+from dispositivos.dispositivo_factory import DispositivosEnum
+from dispositivos.sistema_seguranca import SisSegState
+from sensors import Alarm, Reading, SensorPipeline, batched
+
+
+@pytest.fixture
+def alarm_house() -> CasaInteligente:
+    house = CasaInteligente(10, singleton=False)
+    house.add_devices([
+        (DispositivosEnum.SISTEMA_SEGURANCA, 'alarme', None),
+        (DispositivosEnum.LUZ, 'luz', None),
+    ])
+    return house
+
+
+@pytest.fixture
+def pipeline(alarm_house) -> SensorPipeline:
+    pipeline = SensorPipeline(alarm_house)
+    pipeline.assign_zone('sala', 'alarme')
+    return pipeline
+
+
+def test_assign_zone(pipeline):
+    with pytest.raises(ValueError):
+        pipeline.assign_zone('cozinha', 'luz')
+    pipeline.assign_zone('quarto', 'alarme')
+    assert pipeline.zones('alarme') == ['sala', 'quarto']
+    assert pipeline.remove_zone('quarto')
+    assert not pipeline.remove_zone('quarto')
+    assert pipeline.zones() == ['sala']
+
+
+def test_armed_states(alarm_house, pipeline, recorder):
+    alarm_house.subscribe(recorder, 'alarm.#')
+    readings = [
+        Reading('sala', 'porta1', 'porta', True),
+        ('sala', 'pir1', 'movimento', True),
+        ('sala', 'porta1', 'porta', True),
+        ('sala', 'janela1', 'janela', False),
+        ('garagem', 'porta2', 'porta', True),
+    ]
+    assert pipeline.process(readings) == []
+    alarm_house.control_many([('alarme', 'armar_com_gente')])
+    assert pipeline.process(readings) == [
+        Alarm('alarme', 'sala', 'porta1', 'porta',
+              SisSegState.ARMADO_COM_GENTE),
+    ]
+    alarm_house.control_many([
+        ('alarme', 'desarmar'), ('alarme', 'armar_sem_ninguem'),
+    ])
+    assert [alarm.sensor for alarm in pipeline.process(readings)] == [
+        'porta1', 'pir1',
+    ]
+    assert pipeline.stats == {
+        'readings': 15, 'unknown': 3, 'ignored': 4, 'alarms': 3,
+    }
+    assert [[event['sensor'] for event in batch]
+            for batch in recorder.batches] == [['porta1'], ['porta1', 'pir1']]
+
+
+def test_ingest(alarm_house, pipeline):
+    alarm_house.control_many([('alarme', 'armar_sem_ninguem')])
+    readings = [('sala', f's{n}', 'movimento', True) for n in range(10)]
+    assert [len(alarms) for alarms in
+            pipeline.ingest(batched(readings, size=4))] == [4, 4, 2]
+
+
+def test_removed_system_raises_no_alarms(alarm_house, pipeline, recorder):
+    alarm_house.subscribe(recorder, '#')
+    alarm_house.control_many([('alarme', 'armar_sem_ninguem')])
+    reading = [('sala', 'porta1', 'porta', True)]
+    assert len(pipeline.process(reading)) == 1
+    cursor = alarm_house.version
+    assert alarm_house.remove_device_by_name('alarme')
+    assert alarm_house.version > cursor
+    assert alarm_house.report_changes(cursor) == (alarm_house.version, [])
+    recorder.batches.clear()
+    assert pipeline.process(reading) == []
+    assert pipeline.stats['alarms'] == 1
+    assert recorder.batches == []
@@ -0,0 +1,76 @@
+from casa_inteligente import CasaInteligente
+from dispositivos.dispositivo_factory import DispositivosEnum
+from dispositivos.luz import LuzState
+from dispositivos.termostato import TermostatoState
+from observers.celular import Celular
+from snapshot import PeriodicSnapshot, Snapshot
+
+
+def test_save_and_load(house, tmp_path):
+    phone = Celular('11 99999-0000')
+    house.add_observer(phone, 'luz1')
+    house.subscribe(phone, 'type.TERMOSTATO.*')
+    house.control_many([('luz2', 'ligar'), ('termo', 'esfriar')])
+    path = str(tmp_path / 'casa.snapshot')
+    house.snapshot().save(path)
+
+    snapshot = Snapshot.load(path)
+    assert snapshot.devices() == [
+        ('luz1', DispositivosEnum.LUZ, LuzState.DESLIGADA),
+        ('luz2', DispositivosEnum.LUZ, LuzState.LIGADA),
+        ('luz3', DispositivosEnum.LUZ, LuzState.DESLIGADA),
+        ('termo', DispositivosEnum.TERMOSTATO, TermostatoState.ESFRIANDO),
+    ]
+    restored = CasaInteligente(10, singleton=False)
+    restored.add_devices([(DispositivosEnum.LUZ, 'old', None)])
+    restored.load_snapshot(snapshot)
+    assert restored.get_device_names() == ['luz1', 'luz2', 'luz3', 'termo']
+    assert restored.get_device_state('termo') is TermostatoState.ESFRIANDO
+    assert [light.name for light in restored.get_lights_on()] == ['luz2']
+    [observer] = restored.get_device_observers('luz1')
+    assert isinstance(observer, Celular)
+    assert observer.number == '11 99999-0000'
+    assert restored.total_observers == 1
+
+
+def test_dumps_and_loads_round_trip(house):
+    house.control_many([('luz3', 'ligar')])
+    snapshot = house.snapshot()
+    loaded = Snapshot.loads(snapshot.dumps())
+    assert loaded.names == snapshot.names
+    assert loaded.codes == snapshot.codes
+    assert loaded.devices() == snapshot.devices()
+
+
+def test_transient_observers_are_skipped(house, recorder, tmp_path):
+    phone = Celular('11 99999-0000')
+    house.add_observer(phone, 'luz1')
+    house.add_observer(recorder, 'luz1')
+    house.subscribe(recorder, 'house.#')
+    snapshot = house.snapshot()
+    assert snapshot.observers == [phone]
+    assert snapshot.skipped == 1
+    periodic = PeriodicSnapshot(house, str(tmp_path / 'casa.snapshot'))
+    assert periodic.save()
+    assert periodic.errors == []
+
+
+def test_load_snapshot_keeps_transient_observers(house, recorder):
+    phone = Celular('11 99999-0000')
+    house.add_observer(phone, 'luz1')
+    snapshot = house.snapshot()
+    house.add_observer(recorder, 'luz1')
+    house.add_observer(recorder, 'luz2')
+    house.subscribe(recorder, 'house.#')
+    house.subscribe(phone, 'type.LUZ.*')
+    house.remove_device_by_name('luz2')
+    recorder.events.clear()
+    house.load_snapshot(snapshot)
+    assert house.get_observed_devices(recorder) == ['luz1']
+    assert house.get_observed_devices(phone) == ['luz1']
+    assert house.total_observers == 2
+    house.control_many([('luz1', 'ligar')])
+    [batch] = recorder.batches
+    assert [event['device'] for event in batch] == ['luz1']
+    house.remove_device_by_name('luz1')
+    assert recorder.events[-1]['device'] == 'luz1'
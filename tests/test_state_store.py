@@ -0,0 +1,98 @@
+import pytest
+
+from casa_inteligente import CasaInteligente
+from dispositivos.dispositivo_factory import (
+    DispositivoFactory,
+    DispositivosEnum,
+)
+from dispositivos.luz import LuzState
+from dispositivos.sistema_seguranca import SisSegState
+from dispositivos.state_store import DeviceStateStore
+from dispositivos.termostato import TermostatoState
+
+ALL_STATES = [*LuzState, *TermostatoState, *SisSegState]
+
+
+def _house(columnar: bool) -> CasaInteligente:
+    house = CasaInteligente(20, columnar=columnar, singleton=False)
+    house.add_devices(
+        [(DispositivosEnum.LUZ, f'luz{i}', None) for i in range(4)]
+        + [(DispositivosEnum.TERMOSTATO, f'termo{i}', None)
+           for i in range(3)]
+        + [(DispositivosEnum.SISTEMA_SEGURANCA, 'alarme', None)]
+    )
+    house.control_many([
+        ('luz1', 'ligar'), ('luz3', 'ligar'),
+        ('termo0', 'aquecer'), ('termo2', 'esfriar'),
+        ('alarme', 'armar_com_gente'),
+    ])
+    house.remove_device_by_name('luz0')
+    house.add_devices([(DispositivosEnum.LUZ, 'luz4', LuzState.LIGADA)])
+    return house
+
+
+@pytest.fixture(scope='module')
+def houses() -> tuple[CasaInteligente, CasaInteligente]:
+    return _house(columnar=False), _house(columnar=True)
+
+
+@pytest.mark.parametrize('device_type', list(DispositivosEnum))
+@pytest.mark.parametrize('state', ALL_STATES)
+def test_columnar_house_matches_object_house(houses, device_type, state):
+    objects, columnar = houses
+    assert (columnar.count_devices(device_type, state)
+            == objects.count_devices(device_type, state))
+    assert (sorted(dev.name for dev in
+                   columnar.get_devices_by_state(device_type, state))
+            == sorted(dev.name for dev in
+                      objects.get_devices_by_state(device_type, state)))
+
+
+def test_columnar_states_match(houses):
+    objects, columnar = houses
+    assert columnar.get_device_states() == objects.get_device_states()
+    assert columnar.state_store is not None
+    assert objects.state_store is None
+
+
+def test_state_of_another_type_matches_nothing():
+    store = DeviceStateStore()
+    light = DispositivoFactory.parear_dispositivo(DispositivosEnum.LUZ)
+    store.attach(light, DispositivosEnum.LUZ)
+    store.attach(
+        DispositivoFactory.parear_dispositivo(DispositivosEnum.TERMOSTATO),
+        DispositivosEnum.TERMOSTATO,
+    )
+    light.ligar()
+    assert store.count(DispositivosEnum.LUZ, LuzState.LIGADA) == 1
+    # AQUECENDO has the index of LIGADA in its own enumeration.
+    assert store.count(DispositivosEnum.LUZ, TermostatoState.AQUECENDO) == 0
+    assert store.devices(DispositivosEnum.LUZ,
+                         TermostatoState.AQUECENDO) == []
+    with pytest.raises(KeyError):
+        store.code(DispositivosEnum.LUZ, TermostatoState.AQUECENDO)
+
+
+def test_attach_and_detach():
+    store = DeviceStateStore()
+    lights = DispositivoFactory.parear_dispositivos(DispositivosEnum.LUZ, 3)
+    store.attach_many([(light, DispositivosEnum.LUZ) for light in lights])
+    lights[1].ligar()
+    assert len(store) == 3
+    assert store.devices(DispositivosEnum.LUZ, LuzState.LIGADA) == [lights[1]]
+    store.detach(lights[1])
+    assert lights[1].state is LuzState.LIGADA
+    assert len(store) == 2 and store.released == 1
+    assert store.codes()[1] == 0
+    assert store.count(DispositivosEnum.LUZ, LuzState.LIGADA) == 0
+
+
+def test_bulk_trigger():
+    store = DeviceStateStore()
+    lights = DispositivoFactory.parear_dispositivos(DispositivosEnum.LUZ, 4)
+    store.attach_many([(light, DispositivosEnum.LUZ) for light in lights])
+    lights[2].ligar()
+    changed = store.bulk_trigger(DispositivosEnum.LUZ, 'ligar')
+    assert changed == [lights[0], lights[1], lights[3]]
+    assert all(light.state is LuzState.LIGADA for light in lights)
+    assert store.bulk_trigger(DispositivosEnum.TERMOSTATO, 'aquecer') == []
@@ -0,0 +1,65 @@
+import pytest
+from transitions import MachineError
+
+from dispositivos.dispositivo_factory import (
+    DispositivoFactory,
+    DispositivosEnum,
+)
+from dispositivos.luz import Luz, LuzState
+from dispositivos.sistema_seguranca import SisSegState, SistemaSeguranca
+from dispositivos.state_table import StateTable
+from dispositivos.termostato import Termostato, TermostatoState
+
+
+@pytest.fixture
+def table() -> StateTable:
+    return StateTable(
+        states=LuzState,
+        initial=LuzState.DESLIGADA,
+        transitions=[
+            {'trigger': 'ligar', 'source': LuzState.DESLIGADA,
+             'dest': LuzState.LIGADA},
+            {'trigger': 'reset', 'source': '*', 'dest': LuzState.DESLIGADA},
+        ],
+    )
+
+
+def test_compiled_edges(table):
+    assert table.triggers == ['ligar', 'reset']
+    assert table.initial is LuzState.DESLIGADA
+    assert table.edges('ligar') == {LuzState.DESLIGADA: LuzState.LIGADA}
+    assert table.edges('reset') == {
+        LuzState.DESLIGADA: LuzState.DESLIGADA,
+        LuzState.LIGADA: LuzState.DESLIGADA,
+    }
+
+
+def test_next_state(table):
+    assert table.next_state('ligar', LuzState.DESLIGADA) is LuzState.LIGADA
+    with pytest.raises(MachineError):
+        table.next_state('ligar', LuzState.LIGADA)
+    with pytest.raises(AttributeError):
+        table.edges('piscar')
+
+
+def test_table_is_shared_by_the_class():
+    first = DispositivoFactory.parear_dispositivo(DispositivosEnum.LUZ)
+    second = DispositivoFactory.parear_dispositivo(DispositivosEnum.LUZ)
+    assert first._table is second._table is Luz._table
+    first.ligar()
+    assert first.state is LuzState.LIGADA
+    assert second.state is LuzState.DESLIGADA
+
+
+def test_device_transitions():
+    termo = Termostato()
+    assert termo.aquecer()
+    assert termo.state is TermostatoState.AQUECENDO
+    with pytest.raises(MachineError):
+        termo.esfriar()
+    assert termo.desligar()
+    alarme = SistemaSeguranca()
+    alarme.armar_sem_ninguem()
+    assert alarme.state is SisSegState.ARMADO_SEM_NINGUEM
+    alarme.desarmar()
+    assert alarme.state is SisSegState.DESARMADO
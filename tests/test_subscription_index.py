@@ -0,0 +1,60 @@
+from dispositivos.dispositivo_factory import DispositivosEnum
+from observers.subscription_index import SubscriptionIndex
+from tests.recorder import Recorder
+
+
+def test_attach_and_detach():
+    index = SubscriptionIndex()
+    first, second = Recorder(), Recorder()
+    assert index.attach(first, 'luz1', 1)
+    assert not index.attach(first, 'luz1', 2)
+    assert index.attach(second, 'luz1', 3)
+    assert index.attach(first, 'luz2', 4)
+    assert len(index) == 2
+    assert (first, 'luz1') in index
+    assert index.observers_of('luz1') == (first, second)
+    assert index.devices_of(first) == ['luz1', 'luz2']
+    assert index.subscription_ids() == {1, 3, 4}
+    assert index.pairs() == [
+        (first, 'luz1'), (first, 'luz2'), (second, 'luz1'),
+    ]
+    assert index.detach(first, 'luz1') == 1
+    assert index.detach(first, 'luz1') is None
+    assert index.observers_of('luz1') == (second,)
+    assert sorted(index.detach_device('luz1')) == [3]
+    assert len(index) == 1
+    assert index.observers_of('luz1') == ()
+    assert index.devices_of(second) == []
+
+
+def test_house_observers(house, recorder):
+    other = Recorder()
+    house.add_observer(recorder, 'luz1')
+    house.add_observer(recorder, 'luz1')
+    house.add_observer(recorder, 'nada')
+    house.add_observer(other, 'termo')
+    assert house.total_observers == 2
+    assert house.get_observed_devices(recorder) == ['luz1']
+    assert house.get_device_observers('luz1') == (recorder,)
+    assert house.remove_observer(recorder, 'luz1')
+    assert not house.remove_observer(recorder, 'luz1')
+    assert house.total_observers == 1
+    assert house.get_observed_devices(recorder) == []
+
+
+def test_subscribe_many(house, recorder):
+    assert house.subscribe_many(recorder, DispositivosEnum.LUZ) == 3
+    assert house.subscribe_many(recorder, pattern='*o') == 1
+    assert house.subscribe_many(recorder, pattern='luz*') == 0
+    assert house.get_observed_devices(recorder) == [
+        'luz1', 'luz2', 'luz3', 'termo',
+    ]
+    house.get_device('termo').aquecer()
+    assert [event['device'] for event in recorder.events] == ['termo']
+
+
+def test_removed_device_drops_its_observers(house, recorder):
+    house.subscribe_many(recorder)
+    assert house.remove_device_by_name('luz2')
+    assert house.get_observed_devices(recorder) == ['luz1', 'luz3', 'termo']
+    assert house.get_device_observers('luz2') == ()
@@ -0,0 +1,101 @@
+import threading
+from time import monotonic
+
+import pytest
+
+from observers.thread_pool_dispatcher import ThreadPoolDispatcher
+from tests.recorder import Recorder
+
+
+class SlowRecorder(Recorder):
+    """
+    A recorder whose notifications wait for `release`.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.release = threading.Event()
+
+    def notify(self, *args, **kwargs) -> None:
+        self.release.wait(5)
+        super().notify(*args, **kwargs)
+
+
+def test_each_observer_gets_its_events_in_order():
+    dispatcher = ThreadPoolDispatcher(max_workers=4)
+    observers = [Recorder() for _ in range(3)]
+    try:
+        futures = [dispatcher.dispatch(None, observers, {'n': n})
+                   for n in range(50)]
+        for deliveries in futures:
+            for future in deliveries.values():
+                future.result(timeout=5)
+    finally:
+        dispatcher.close()
+    for observer in observers:
+        assert [event['n'] for event in observer.events] == list(range(50))
+
+
+def test_failures_are_reported():
+    errors = []
+    dispatcher = ThreadPoolDispatcher(
+        max_workers=2,
+        on_error=lambda *args: errors.append(args),
+    )
+    failing, recorder = Recorder(fail=True), Recorder()
+    try:
+        deliveries = dispatcher.dispatch(None, [failing, recorder], {'n': 0})
+        with pytest.raises(RuntimeError):
+            deliveries[failing].result(timeout=5)
+        deliveries[recorder].result(timeout=5)
+    finally:
+        dispatcher.close()
+    assert recorder.events == [{'n': 0}]
+    assert dispatcher.failures == {failing: 1}
+    [(observer, event, error)] = errors
+    assert observer is failing
+    assert event == {'n': 0}
+    assert isinstance(error, RuntimeError)
+
+
+def test_stalled_observer_times_out():
+    dispatcher = ThreadPoolDispatcher(max_workers=2, timeout=0.05)
+    slow = SlowRecorder()
+    try:
+        running = dispatcher.dispatch(None, [slow], {'n': 0})[slow]
+        queued = dispatcher.dispatch(None, [slow], {'n': 1})[slow]
+        with pytest.raises(TimeoutError):
+            running.result(timeout=5)
+        with pytest.raises(TimeoutError):
+            queued.result(timeout=5)
+        refused = dispatcher.dispatch(None, [slow], {'n': 2})[slow]
+        with pytest.raises(TimeoutError):
+            refused.result(timeout=0)
+        slow.release.set()
+        # The lane resumes once the observer returns.
+        deadline = monotonic() + 5
+        while True:
+            future = dispatcher.dispatch(None, [slow], {'n': 3})[slow]
+            if future.exception(timeout=5) is None or monotonic() > deadline:
+                break
+        assert future.exception() is None
+    finally:
+        slow.release.set()
+        dispatcher.close()
+    assert [event['n'] for event in slow.events] == [0, 3]
+    assert list(dispatcher.failures) == [slow]
+    assert dispatcher.failures[slow] >= 3
+
+
+def test_closed_dispatcher_refuses_deliveries(recorder):
+    errors = []
+    dispatcher = ThreadPoolDispatcher(
+        max_workers=1,
+        on_error=lambda *args: errors.append(args),
+    )
+    dispatcher.close()
+    future = dispatcher.dispatch(None, [recorder], {'n': 0})[recorder]
+    with pytest.raises(RuntimeError):
+        future.result(timeout=0)
+    assert recorder.events == []
+    assert len(errors) == 1